@@ -1,6 +1,7 @@
 import re
 from os.path import basename
 from Camera.camera_calibration import CameraCalibration
+from Camera.camera_orientation import CameraOrientation, calibrate_orientation
 from Inclinometer.inclinometer_record import InclinometerRecord
 from Utilities.json_convert import JsonConvert
 
@@ -8,7 +9,7 @@ from Utilities.json_convert import JsonConvert
 @JsonConvert.register
 class Camera:
 
-    def __init__(self, name="", orientation=CameraCalibration(), default_calibration: CameraCalibration = None,
+    def __init__(self, name="", orientation: CameraCalibration = None, default_calibration: CameraCalibration = None,
                  inclinometer_calibration: CameraCalibration = None, image_regex=None, rotate_image=False):
 
         self.name = name
@@ -16,7 +17,7 @@ class Camera:
         self.rotate_image = rotate_image
 
         # Orientation of camera system. Default pointing straight down (x, y, z => 0, 0, 0)
-        self.orientation = orientation
+        self.orientation = orientation or CameraCalibration()
         # Calibration for images with no tiltometer data
         self.default_calibration = default_calibration
         # Calibration for images with tiltometer data
@@ -28,15 +29,22 @@ class Camera:
                f"   - Default Calibration:      {self.default_calibration}\n" \
                f"   - Inclinometer Calibration: {self.inclinometer_calibration}"
 
-    def get_calibrated_orientation(self, inclinometer_data: InclinometerRecord = None):
-        orientation = self.orientation
+    def get_calibrated_orientation(self, inclinometer_data: InclinometerRecord = None) -> CameraOrientation:
+        """
+        Camera orientation with calibration (and inclinometer angles when available) applied. Results are
+        memoized on the current calibration values, so edits to a calibration are always picked up and the
+        returned orientation can never modify the camera's base orientation.
+        :param inclinometer_data: Inclinometer record for image
+        :return: Immutable calibrated orientation
+        """
+        calibration = None
+        inclinometer_angles = None
         if inclinometer_data and self.inclinometer_calibration:
-            orientation += self.inclinometer_calibration
-            orientation.angle_x += inclinometer_data.angle_x
-            orientation.angle_y += inclinometer_data.angle_y
+            calibration = self.inclinometer_calibration.to_orientation()
+            inclinometer_angles = (inclinometer_data.angle_x, inclinometer_data.angle_y)
         elif self.default_calibration:
-            orientation += self.default_calibration
-        return orientation
+            calibration = self.default_calibration.to_orientation()
+        return calibrate_orientation(self.orientation.to_orientation(), calibration, inclinometer_angles)
 
     def get_calibrated_rotation(self, inclinometer_data=None):
         return self.get_calibrated_orientation(inclinometer_data).get_rotation()
@@ -1,3 +1,4 @@
+from Camera.camera_orientation import CameraOrientation, CAMERA_ORIENTATION_ATTRIBUTES
 from Utilities.json_convert import JsonConvert
 
 
@@ -18,12 +19,18 @@ class CameraCalibration(object):
 
     def __add__(self, other):
         sum_calibration = CameraCalibration()
-        for attr in ["angle_x", "angle_y", "angle_z", "hfov", "gps_delay_offset",  "altitude_offset"]:
+        for attr in CAMERA_ORIENTATION_ATTRIBUTES:
             self_val = getattr(self, attr)
             other_val = getattr(other, attr)
             setattr(sum_calibration, attr, self_val + other_val)
         return sum_calibration
 
+    def to_orientation(self) -> CameraOrientation:
+        """
+        Immutable snapshot of the current calibration values.
+        """
+        return CameraOrientation(*[getattr(self, attr) for attr in CAMERA_ORIENTATION_ATTRIBUTES])
+
     def get_rotation(self):
         return [self.angle_x, self.angle_y, self.angle_z]
 
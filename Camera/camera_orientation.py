@@ -0,0 +1,44 @@
+from collections import namedtuple
+from functools import lru_cache
+
+CAMERA_ORIENTATION_ATTRIBUTES = ["angle_x", "angle_y", "angle_z", "hfov", "gps_delay_offset", "altitude_offset"]
+
+
+class CameraOrientation(namedtuple("CameraOrientation", CAMERA_ORIENTATION_ATTRIBUTES,
+                                   defaults=[0] * len(CAMERA_ORIENTATION_ATTRIBUTES))):
+    """
+    Immutable, hashable camera orientation. Unlike CameraCalibration this can be safely cached
+    and shared since applying a calibration always returns a new orientation.
+    """
+    __slots__ = ()
+
+    def offset_by(self, other: "CameraOrientation"):
+        return CameraOrientation(*[self_val + other_val for self_val, other_val in zip(self, other)])
+
+    def offset_angles(self, angle_x=0, angle_y=0):
+        return self._replace(angle_x=self.angle_x + angle_x, angle_y=self.angle_y + angle_y)
+
+    def get_rotation(self):
+        return [self.angle_x, self.angle_y, self.angle_z]
+
+    def __str__(self):
+        return f"Rotation: [{self.angle_x}, {self.angle_y}, {self.angle_z}], " \
+               f"altitude offset: {self.altitude_offset}, hfov: {self.hfov} "
+
+
+@lru_cache(maxsize=4096)
+def calibrate_orientation(orientation: CameraOrientation, calibration: CameraOrientation = None,
+                          inclinometer_angles=None) -> CameraOrientation:
+    """
+    Applies a calibration (and optionally inclinometer x/y angles) to a base camera orientation.
+    Memoized on the orientation values, so repeated per-pixel calls for the same image are free.
+    :param orientation: Base camera orientation
+    :param calibration: Calibration offset to apply
+    :param inclinometer_angles: (angle_x, angle_y) from inclinometer record
+    :return: Calibrated camera orientation
+    """
+    if calibration is not None:
+        orientation = orientation.offset_by(calibration)
+    if inclinometer_angles is not None:
+        orientation = orientation.offset_angles(*inclinometer_angles)
+    return orientation
@@ -32,6 +32,14 @@ class OtterCheckerConfig(SerializableConfigBase):
         self.TOOLTIP_DELAY = 1.0
         self.GRID_COLUMNS = 4
         self.GRID_ROWS = 4
+        self.GRID_VALIDATION_COLUMNS = 8
+        self.GRID_VALIDATION_ROWS = 5
+
+        # Image Viewer
+        self.USE_IMAGE_TILE_CACHE = True
+        self.IMAGE_TILE_SIZE = 512
+        self.PREFETCH_IMAGE_COUNT = 2
+        self.IMAGE_CACHE_MEMORY_MB = 1024
 
         # Validation Settings
         self.VALIDATOR_MODE = True
@@ -25,6 +25,11 @@ class SeeOtterConfig(SerializableConfigBase):
         self.NEAR_TEMPORAL_ZONE_TOLERANCE = 1.5  # 1 - No tolerance, 2 - Twice area of original image projection
         self.IMAGE_COORDINATE_CHUNKING_DEGREES_LAT = .007
         self.IMAGE_COORDINATE_CHUNKING_DEGREES_LON = .011
+        self.IMAGE_ORIENTATION_THREADS = 8  # Threads patching image orientation tags during pre-processing
+        self.FILE_COPY_THREADS = 8  # Threads copying image files, e.g. when cloning surveys
+        self.CLONE_SURVEY_FILE_MODE = "reflink"  # Clone images as 'copy', 'reflink' or 'hardlink' (copy if unsupported)
+        self.SAVE_PROCESSING_PROFILES = True  # Saves stage timings of processing commands to Results/Profiles
+        self.PROCESSING_PROFILER = None  # Optional call profiler for processing commands: 'cprofile' or 'pyinstrument'
 
         # Predictions
         self.MAX_PREDICTION_RETRIES = 2
@@ -33,7 +38,11 @@ class SeeOtterConfig(SerializableConfigBase):
         self.PREDICTION_IMAGE_SIZE = 8688
         self.SLICE_PREDICTED_IMAGES = False
         self.BACKUP_SURVEY_ON_PREDICTIONS_COMPLETE = True
+        self.MAX_SURVEY_BACKUPS = -1  # Older backups are pruned after each backup (-1 to keep all)
         self.PREDICTION_AUTOSAVE_BATCH_SIZE = 100  # Number of predictions between autosave (-1 to disable)
+        self.EXTRACT_PREDICTION_CHIPS = True
+        self.PREDICTION_CHIP_SIZE = 128
+        self.PREDICTION_CHIP_CONTEXT_SCALE = 3  # Size of chip region relative to the larger side of the prediction
 
         # Transects
         self.TRANSECT_LATERAL_TOLERANCE = 200
@@ -1,4 +1,5 @@
 from typing import List
+import numpy as np
 from kivy.properties import BooleanProperty
 from Controller.image_filter_controller_interface import ImageFilterControllerInterface
 from SurveyEntities.object_prediction_data import ObjectPredictionData, ValidationState
@@ -16,23 +17,111 @@ def count_validated_predictions(predictions: List[ObjectPredictionData]):
                 if prediction.validation_state != ValidationState.UNVALIDATED])
 
 
+class PredictionFilterIndex:
+    """
+    Flattened arrays of the predictions of a list of images, used to evaluate filters with array masks instead of
+    re-filtering every prediction of every image. Scores are also kept sorted per validation state, so the
+    predictions above a confidence cutoff are found with a binary search.
+    """
+
+    def __init__(self, images: List[SurveyImage]):
+        self.images = images
+        self.image_idxs = {id(image): i for i, image in enumerate(images)}
+        self.predictions = [prediction for image in images for prediction in image.predictions]
+        self.prediction_idxs = {id(prediction): i for i, prediction in enumerate(self.predictions)}
+        self.prediction_image_idxs = np.array([i for i, image in enumerate(images) for _ in image.predictions],
+                                              dtype=int)
+        self.scores = np.array([prediction.score for prediction in self.predictions], dtype=float)
+        self.validation_states = np.array([prediction.validation_state for prediction in self.predictions],
+                                          dtype=int)
+        self.sorted_scores = None
+
+    @property
+    def num_images(self):
+        return len(self.images)
+
+    def get_image_idx(self, image):
+        return self.image_idxs.get(id(image))
+
+    def build_sorted_scores(self):
+        self.sorted_scores = {}
+        for validation_state in ValidationState:
+            prediction_idxs = np.flatnonzero(self.validation_states == validation_state)
+            order = np.argsort(self.scores[prediction_idxs], kind="stable")
+            self.sorted_scores[validation_state] = (self.scores[prediction_idxs][order],
+                                                    self.prediction_image_idxs[prediction_idxs][order])
+
+    def get_prediction_mask(self, confidence_cutoff, validation_states: List[ValidationState]):
+        validation_state_mask = np.isin(self.validation_states, [int(state) for state in validation_states])
+        return validation_state_mask & (self.scores >= confidence_cutoff)
+
+    def get_image_prediction_counts(self, confidence_cutoff, validation_states: List[ValidationState]):
+        """
+        Number of predictions of each image with a score of at least confidence_cutoff and one of the given
+        validation states.
+        """
+        if self.sorted_scores is None:
+            self.build_sorted_scores()
+        counts = np.zeros(self.num_images, dtype=int)
+        for validation_state in validation_states:
+            scores, image_idxs = self.sorted_scores[validation_state]
+            start = np.searchsorted(scores, confidence_cutoff, side="left")
+            counts += np.bincount(image_idxs[start:], minlength=self.num_images)
+        return counts
+
+    def update_validation_state(self, prediction: ObjectPredictionData):
+        """
+        :return: Previous validation state, or None if the prediction is not indexed
+        """
+        prediction_idx = self.prediction_idxs.get(id(prediction))
+        if prediction_idx is None:
+            return None
+        previous_validation_state = ValidationState(self.validation_states[prediction_idx])
+        if previous_validation_state != prediction.validation_state:
+            self.validation_states[prediction_idx] = prediction.validation_state
+            self.sorted_scores = None
+        return previous_validation_state
+
+
 class ImageFilterController(ImageFilterControllerInterface):
     """
     Filters images and predictions based off current settings.
     """
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.filter_index: PredictionFilterIndex = None
+        self.is_filter_index_stale = False
+        self.applied_confidence_cutoff = self.confidence_cutoff
+        self.applied_validation_states = self.get_shown_validation_states()
+        self.image_prediction_counts = None
+        self.is_filtered_image = None
+        self.filtered_image_idxs = None
+        self.matching_image_idxs = None
+
+    def get_shown_validation_states(self):
+        shown_validation_states = {ValidationState.UNVALIDATED: self.show_unvalidated_validations,
+                                   ValidationState.CORRECT: self.show_correct_validations,
+                                   ValidationState.INCORRECT: self.show_incorrect_validations,
+                                   ValidationState.AMBIGUOUS: self.show_ambiguous_validations}
+        return [validation_state for validation_state, is_shown in shown_validation_states.items() if is_shown]
+
     def get_filtered_images(self, survey: Survey):
-        filtered_images = []
         if not isinstance(survey, Survey):
-            return filtered_images
-        for image in survey.images:
-            predictions = self.get_filtered_predictions(image)
-            num_predictions = len(predictions)
-            if not self.show_images_with_no_predictions and num_predictions == 0:
-                continue
-            filtered_images.append(image)
-
-        return filtered_images
+            self.filter_index = None
+            return []
+        if self.filter_index is None or self.filter_index.images is not survey.images or self.is_filter_index_stale:
+            self.filter_index = PredictionFilterIndex(survey.images)
+            self.is_filter_index_stale = False
+        self.applied_confidence_cutoff = self.confidence_cutoff
+        self.applied_validation_states = self.get_shown_validation_states()
+        self.update_image_prediction_counts()
+        if self.show_images_with_no_predictions:
+            self.is_filtered_image = np.ones(self.filter_index.num_images, dtype=bool)
+        else:
+            self.is_filtered_image = self.image_prediction_counts > 0
+        self.filtered_image_idxs = np.flatnonzero(self.is_filtered_image)
+        return [survey.images[i] for i in self.filtered_image_idxs]
 
     def get_filtered_predictions(self, image: SurveyImage):
         filtered_predictions = []
@@ -52,3 +141,106 @@ class ImageFilterController(ImageFilterControllerInterface):
             filtered_predictions.append(prediction)
 
         return filtered_predictions
+
+    def get_all_filtered_predictions(self):
+        """
+        Predictions of all filtered images that match the applied filter, in image order.
+        """
+        if not self.refresh_filter_index():
+            return []
+        index = self.filter_index
+        mask = index.get_prediction_mask(self.applied_confidence_cutoff, self.applied_validation_states)
+        mask &= self.is_filtered_image[index.prediction_image_idxs]
+        return [index.predictions[i] for i in np.flatnonzero(mask)]
+
+    def get_filtered_image_index(self, image):
+        """
+        :return: Index of an image in the filtered images, or None if it was filtered out
+        """
+        image_idx = self.filter_index.get_image_idx(image) if self.filter_index else None
+        if image_idx is None or not self.is_filtered_image[image_idx]:
+            return None
+        return int(np.searchsorted(self.filtered_image_idxs, image_idx))
+
+    def get_closest_filtered_image_index(self, image):
+        """
+        :return: Index of an image in the filtered images. If it was filtered out, the index of the closest
+        filtered image before it.
+        """
+        image_idx = self.filter_index.get_image_idx(image) if self.filter_index else None
+        if image_idx is None:
+            return 0
+        return max(0, int(np.searchsorted(self.filtered_image_idxs, image_idx, side="right")) - 1)
+
+    def get_next_images_with_predictions(self, image, direction=1, count=1):
+        """
+        Filtered images with predictions that match the applied filter, following an image in the given direction
+        and wrapping around the survey. Found with a binary search over the indexes of the matching images.
+        :param image: Image to start after. Included last if it also has matching predictions.
+        :param direction: 1 -> Forward; -1 -> Backward
+        :param count: Max number of images to return
+        """
+        if not self.refresh_filter_index():
+            return []
+        if self.matching_image_idxs is None:
+            self.matching_image_idxs = np.flatnonzero((self.image_prediction_counts > 0) & self.is_filtered_image)
+        num_matching = len(self.matching_image_idxs)
+        if num_matching == 0:
+            return []
+        image_idx = self.filter_index.get_image_idx(image)
+        if image_idx is None:
+            image_idx = -1 if direction == 1 else self.filter_index.num_images
+        if direction == 1:
+            start = np.searchsorted(self.matching_image_idxs, image_idx, side="right")
+        else:
+            start = np.searchsorted(self.matching_image_idxs, image_idx, side="left") - 1
+        positions = (start + direction * np.arange(min(count, num_matching))) % num_matching
+        return [self.filter_index.images[i] for i in self.matching_image_idxs[positions]]
+
+    def get_next_image_with_predictions(self, image, direction=1):
+        images = self.get_next_images_with_predictions(image, direction=direction, count=1)
+        return images[0] if images else None
+
+    def update_prediction(self, prediction: ObjectPredictionData):
+        """
+        Updates the filter index after the validation state or score of a prediction changed.
+        """
+        if self.filter_index is None or self.is_filter_index_stale:
+            return
+        prediction_idx = self.filter_index.prediction_idxs.get(id(prediction))
+        if prediction_idx is not None and self.filter_index.scores[prediction_idx] != prediction.score:
+            self.invalidate_filter_index()
+            return
+        previous_validation_state = self.filter_index.update_validation_state(prediction)
+        if previous_validation_state is None or previous_validation_state == prediction.validation_state:
+            return
+        if prediction.score >= self.applied_confidence_cutoff:
+            image_idx = self.filter_index.prediction_image_idxs[prediction_idx]
+            self.image_prediction_counts[image_idx] += \
+                (prediction.validation_state in self.applied_validation_states) - \
+                (previous_validation_state in self.applied_validation_states)
+            self.matching_image_idxs = None
+
+    def invalidate_filter_index(self):
+        """
+        Marks the filter index to be rebuilt, e.g. after predictions were added or removed.
+        """
+        self.is_filter_index_stale = True
+
+    def refresh_filter_index(self):
+        """
+        Rebuilds a stale filter index for the same images, keeping the current filtered images.
+        :return: False if there is no filter index
+        """
+        if self.filter_index is None:
+            return False
+        if self.is_filter_index_stale:
+            self.filter_index = PredictionFilterIndex(self.filter_index.images)
+            self.is_filter_index_stale = False
+            self.update_image_prediction_counts()
+        return True
+
+    def update_image_prediction_counts(self):
+        self.image_prediction_counts = self.filter_index.get_image_prediction_counts(
+            self.applied_confidence_cutoff, self.applied_validation_states)
+        self.matching_image_idxs = None
@@ -6,10 +6,12 @@ from Controller.see_otter_controller_base import SeeOtterControllerBase, OTTER_C
     SeeOtterState
 from Controller.image_filter_controller import ImageFilterController
 from Controller.survey_command_controller import SurveyCommandController
+from Processing.survey_processing import get_chip_store
 from SurveyEntities.object_prediction_data import ObjectPredictionData, ValidationState
 from SurveyEntities.survey import Survey
 from SurveyEntities.survey_image import SurveyImage
-from Utilities.utilities import index_out_of_range, loop_iterator, open_explorer, get_root_path
+from Utilities.survey_save_worker import SurveySaveWorker
+from Utilities.utilities import index_out_of_range, open_explorer, get_root_path
 from View.Popups.clone_filtered_survey_popup import CloneFilteredSurveyPopup
 from View.Widgets.pannable_image import PannableImage
 from View.Windows.see_otter_window_base import SeeOtterWindowBase
@@ -22,11 +24,13 @@ class SeeOtterController(SeeOtterControllerBase):
     """
 
     window = None
+    navigation_direction = 1
 
     def __init__(self, window: SeeOtterWindowBase, survey: Survey = None):
         super().__init__()
         self.load_config()
         self.filter_controller = ImageFilterController(apply_filter_callback=self.apply_image_filters)
+        self.save_worker = SurveySaveWorker(run_on_main_thread=Clock.schedule_once)
         self.survey = survey
         self.window = window
         self.commands = SurveyCommandController(controller=self)
@@ -35,6 +39,9 @@ class SeeOtterController(SeeOtterControllerBase):
         SeeOtterController.config = OtterCheckerConfig().load()
 
     def on_survey(self, *args):
+        self.filter_controller.invalidate_filter_index()
+        if self.survey:
+            self.survey.statistics.invalidate()
         self.images = self.filter_controller.get_filtered_images(self.survey)
         if self.survey:
             self.state = SeeOtterState.SURVEY_LOADED
@@ -43,25 +50,34 @@ class SeeOtterController(SeeOtterControllerBase):
         else:
             self.state = SeeOtterState.NO_SURVEY_LOADED
             self.annotation_categories = []
+        if self.grid_mode:
+            self.load_chip_store()
+            self.refresh_grid_predictions()
 
     @property
     def image_panel(self):
         return self.window.otter_checker_screen.image_panel
 
+    @property
+    def chip_grid_panel(self):
+        return self.window.otter_checker_screen.chip_grid_panel
+
     @property
     def processed_images(self):
         return self.survey.processed_images
 
     def add_prediction(self, image: SurveyImage, prediction: ObjectPredictionData):
         self.has_unsaved_changes = True
-        image.predictions.append(prediction)
+        self.survey.add_prediction(image, prediction)
         self.predictions.append(prediction)
+        self.filter_controller.invalidate_filter_index()
         self.image_panel.redraw_annotations()
 
     def remove_prediction(self, image, prediction):
         self.has_unsaved_changes = True
-        image.predictions.remove(prediction)
+        self.survey.remove_prediction(image, prediction)
         self.predictions.remove(prediction)
+        self.filter_controller.invalidate_filter_index()
         self.image_panel.redraw_annotations()
 
     def toggle_draw_mode(self):
@@ -75,6 +91,7 @@ class SeeOtterController(SeeOtterControllerBase):
 
     def next_image(self, *kwargs):
         print("Next Image")
+        self.navigation_direction = 1
         if len(self.images) > 1:
             self.image_idx = self.image_idx + 1 if self.image_idx < len(self.images) - 1 else 0
             self.current_image = self.images[self.image_idx]
@@ -84,6 +101,7 @@ class SeeOtterController(SeeOtterControllerBase):
 
     def previous_image(self, *kwargs):
         print("Previous Image")
+        self.navigation_direction = -1
         if len(self.images) > 1:
             self.image_idx = self.image_idx - 1 if self.image_idx > 0 else len(self.images) - 1
             self.current_image = self.images[self.image_idx]
@@ -106,14 +124,31 @@ class SeeOtterController(SeeOtterControllerBase):
             self.update_current_prediction(self.predictions[self.prediction_idx])
 
     def select_next_image_with_predictions(self, direction=1):
-        for image in loop_iterator(self.images, self.image_idx, start_at_next=True, direction=direction):
-            filtered_predictions = self.filter_controller.get_filtered_predictions(image)
-            if len(filtered_predictions) > 0:
-                self.set_current_image(image=image)
-                self.prediction_idx = 0 if direction == 1 else len(filtered_predictions) - 1
-                self.predictions = filtered_predictions
-                self.current_prediction = self.predictions[self.prediction_idx]
-                return
+        self.navigation_direction = direction
+        image = self.filter_controller.get_next_image_with_predictions(self.current_image, direction=direction)
+        if image is None:
+            return
+        filtered_predictions = self.filter_controller.get_filtered_predictions(image)
+        if len(filtered_predictions) > 0:
+            self.set_current_image(image=image)
+            self.prediction_idx = 0 if direction == 1 else len(filtered_predictions) - 1
+            self.predictions = filtered_predictions
+            self.current_prediction = self.predictions[self.prediction_idx]
+
+    def get_images_to_prefetch(self):
+        """
+        Filtered images with predictions that are next in line to be validated. Images ahead of the current
+        image in the navigation direction come first, followed by the images behind it.
+        """
+        count = self.config.PREFETCH_IMAGE_COUNT
+        if count <= 0 or not isinstance(self.current_image, SurveyImage):
+            return []
+        images = []
+        for direction in [self.navigation_direction, -self.navigation_direction]:
+            next_images = self.filter_controller.get_next_images_with_predictions(self.current_image,
+                                                                                  direction=direction, count=count)
+            images += [image for image in next_images if image is not self.current_image and image not in images]
+        return images
 
     def update_current_prediction(self, prediction):
         self.current_prediction = prediction
@@ -122,9 +157,11 @@ class SeeOtterController(SeeOtterControllerBase):
         if not self.current_prediction:
             print("Warning: Tried to validate non-existant prediction")
             return
-        self.current_prediction.validate(validation_state=validation_state, validated_by=self.config.VALIDATOR_NAME)
+        self.survey.validate_prediction(self.current_prediction, validation_state=validation_state,
+                                        validated_by=self.config.VALIDATOR_NAME)
         if confidence:
             self.current_prediction.score = confidence
+        self.filter_controller.update_prediction(self.current_prediction)
         self.image_panel.select_prediction(None)
         self.image_panel.redraw_annotations()
         Clock.schedule_once(self.next_prediction, self.config.POST_VALIDATION_DELAY)
@@ -163,7 +200,8 @@ class SeeOtterController(SeeOtterControllerBase):
             else:
                 print("Current image index out of range")
         elif image is not None:
-            self.image_idx = self.images.index(image)
+            image_idx = self.filter_controller.get_filtered_image_index(image)
+            self.image_idx = image_idx if image_idx is not None else self.images.index(image)
             self.current_image = image
         else:
             raise Exception(f"Cannot set current image to type: {type(image)}")
@@ -185,25 +223,17 @@ class SeeOtterController(SeeOtterControllerBase):
             Clock.schedule_once(lambda x: self.set_current_prediction(self.predictions[self.prediction_idx]), .75)
         else:
             self.current_prediction = None
+        if self.grid_mode:
+            self.refresh_grid_predictions()
 
     def get_closest_image_index(self):
         """
         Updates image_idx to reflect actual index of current image. If images does not contain current
         image, set image_idx to the next closest image.
         """
-        new_image_idx = 0
-        if self.images.__contains__(self.current_image):
-            new_image_idx = self.images.index(self.current_image)
-        elif isinstance(self.current_image, SurveyImage):
-            previous_image_id = self.current_image.id
-            image_ids_to_search = [image.id for image in self.images if image.id < previous_image_id]
-            if image_ids_to_search:
-                closest_id = max(image_ids_to_search)
-                new_image = next(image for image in self.images if image.id == closest_id)
-                new_image_idx = self.images.index(new_image)
-        else:
-            new_image_idx = 0
-        return new_image_idx
+        if isinstance(self.current_image, SurveyImage):
+            return self.filter_controller.get_closest_filtered_image_index(self.current_image)
+        return 0
 
     def set_annotation_categories(self):
         category_set = set([(prediction.category_name, prediction.category_id)
@@ -230,18 +260,97 @@ class SeeOtterController(SeeOtterControllerBase):
         popup.open()
 
     def validate_current_selection(self, validation_state, *args):
+        if self.grid_mode:
+            self.validate_current_grid_prediction(validation_state)
+            return
         self.has_unsaved_changes = True
         self.set_current_image_validation_state(validation_state)
 
-    def save(self, update_status_message=True, *args):
-        if update_status_message:
-            self.program_status_message = "Saving Survey..."
-            Clock.schedule_once(partial(self.save, False))
+    def toggle_grid_mode(self, *args):
+        self.grid_mode = not self.grid_mode
+
+    def on_grid_mode(self, *args):
+        if self.grid_mode:
+            self.load_chip_store()
+            self.refresh_grid_predictions()
+
+    def load_chip_store(self):
+        self.chip_store = get_chip_store(self.survey) if self.survey else None
+
+    def refresh_grid_predictions(self):
+        """
+        Updates the predictions shown in the chip grid to the filtered predictions of all filtered images, keeping
+        the current selection if it is still included.
+        """
+        current_grid_prediction = self.current_grid_prediction
+        self.grid_predictions = self.filter_controller.get_all_filtered_predictions()
+        if current_grid_prediction in self.grid_predictions:
+            self.grid_prediction_idx = self.grid_predictions.index(current_grid_prediction)
+        else:
+            self.grid_prediction_idx = 0
+
+    def next_grid_prediction(self, *args):
+        if self.grid_prediction_idx < len(self.grid_predictions) - 1:
+            self.grid_prediction_idx += 1
+
+    def previous_grid_prediction(self, *args):
+        if self.grid_prediction_idx > 0:
+            self.grid_prediction_idx -= 1
+
+    def next_grid_page(self, *args):
+        next_page_prediction_idx = (self.grid_page_idx + 1) * self.grid_page_size
+        if next_page_prediction_idx < len(self.grid_predictions):
+            self.grid_prediction_idx = next_page_prediction_idx
+
+    def previous_grid_page(self, *args):
+        self.grid_prediction_idx = max(0, (self.grid_page_idx - 1) * self.grid_page_size)
+
+    def set_current_grid_prediction(self, prediction):
+        self.grid_prediction_idx = self.grid_predictions.index(prediction)
+
+    def validate_current_grid_prediction(self, validation_state):
+        prediction = self.current_grid_prediction
+        if not prediction:
+            print("Warning: Tried to validate non-existant prediction")
+            return
+        self.has_unsaved_changes = True
+        self.survey.validate_prediction(prediction, validation_state=validation_state,
+                                        validated_by=self.config.VALIDATOR_NAME)
+        self.filter_controller.update_prediction(prediction)
+        self.chip_grid_panel.redraw_tiles()
+        self.next_grid_prediction()
+
+    def open_grid_prediction(self, prediction):
+        """
+        Leaves grid mode and shows a prediction in its full image.
+        """
+        image = self.survey.get_image(prediction.image_name)
+        self.grid_mode = False
+        self.set_current_image(image=image)
+        self.predictions = self.filter_controller.get_filtered_predictions(image)
+        self.prediction_idx = self.predictions.index(prediction)
+        self.current_prediction = prediction
+
+    def save(self, *args, callback=None):
+        """
+        Saves the survey in the background. Changes made while saving are kept as unsaved changes.
+        :param callback: Called with (survey, error) once saved
+        """
+        if not self.survey:
             return
-        self.survey.save()
+        self.program_status_message = "Saving Survey..."
         self.has_unsaved_changes = False
+        self.save_worker.save(self.survey, callback=partial(self.on_save_complete, callback))
+
+    def on_save_complete(self, callback, survey, error):
         self.program_status_message = ""
-        self.set_snackbar_message(f"Saved survey: {self.survey.survey_name}")
+        if error is not None:
+            self.has_unsaved_changes = True
+            self.set_snackbar_message(f"Error saving survey: {survey.survey_name}. Error: {error}")
+        else:
+            self.set_snackbar_message(f"Saved survey: {survey.survey_name}")
+        if callback is not None:
+            callback(survey, error)
 
     def load_survey(self, survey, update_status_message=True, *args):
         self.commands.load_survey(survey=survey)
@@ -9,7 +9,7 @@ from Config.otter_checker_config import OtterCheckerConfig
 from Controller.image_filter_controller_interface import ImageFilterControllerInterface
 from Controller.survey_controller_base import SurveyControllerBase
 from SurveyEntities.object_prediction_data import ValidationState, ObjectPredictionData
-from Utilities.utilities import open_explorer, get_root_path
+from Utilities.utilities import open_explorer, get_root_path, index_out_of_range
 from config import USER_GUIDE_FILE
 
 
@@ -37,10 +37,13 @@ class SeeOtterControllerBase(SurveyControllerBase):
     images = ListProperty()
     predictions = ListProperty()
     annotation_categories = ListProperty()
+    grid_predictions = ListProperty()
+    chip_store = None
 
     # Indexes
     image_idx = NumericProperty(0)
     prediction_idx = NumericProperty(0)
+    grid_prediction_idx = NumericProperty(0)
 
     # Current Data
     current_image = ObjectProperty(allownone=True)
@@ -56,6 +59,7 @@ class SeeOtterControllerBase(SurveyControllerBase):
     is_loading = BooleanProperty(False)
     validator_mode = BooleanProperty(True)
     gridlines_visible = BooleanProperty(False)
+    grid_mode = BooleanProperty(False)
     config: OtterCheckerConfig = None
     snackbar_message = StringProperty()
 
@@ -126,6 +130,20 @@ class SeeOtterControllerBase(SurveyControllerBase):
     def edit_mode(self):
         return self.mode == OTTER_CHECKER_MODE.EDIT_ANNOTATION
 
+    @property
+    def grid_page_size(self):
+        return self.config.GRID_VALIDATION_COLUMNS * self.config.GRID_VALIDATION_ROWS
+
+    @property
+    def grid_page_idx(self):
+        return self.grid_prediction_idx // self.grid_page_size
+
+    @property
+    def current_grid_prediction(self):
+        if index_out_of_range(self.grid_prediction_idx, self.grid_predictions):
+            return None
+        return self.grid_predictions[self.grid_prediction_idx]
+
     @abstractmethod
     def add_prediction(self, image, prediction):
         pass
@@ -158,6 +176,9 @@ class SeeOtterControllerBase(SurveyControllerBase):
     def previous_prediction(self):
         pass
 
+    def get_images_to_prefetch(self):
+        return []
+
     @abstractmethod
     def set_current_image_validation_state(self, validation_state: ValidationState):
         pass
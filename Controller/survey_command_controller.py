@@ -18,12 +18,14 @@ from DataGenerators.kml_map_generator import KmlMapGenerator
 from DataGenerators.results_generator import ResultsGenerator
 from Processing.predict import run_image_detection
 from Processing.survey_processing import pre_processing, post_processing, get_images_to_preprocess, \
-    clone_filtered_survey, vote_ambiguous_validations
+    clone_filtered_survey, vote_ambiguous_validations, extract_prediction_chips
 from SurveyEntities.object_prediction_data import ValidationState
 from SurveyEntities.survey import Survey
 from SurveyEntities.waldo_survey import WaldoSurvey
 from Utilities.custom_exceptions import SurveyVersionException, ImageDirNotFoundException
+from Config.see_otter_config import SeeOtterConfig
 from Utilities.exit_flag import ExitFlag
+from Utilities.profiler import profile_run
 from Utilities.tqdm_plus import TqdmPlus
 from Utilities.utilities import PromptUserNotification
 from config import AMBIGUOUS_VOTE_DIR
@@ -71,7 +73,10 @@ class SurveyCommandController(EventDispatcher):
                 controller.state = SeeOtterState.RUNNING_COMMAND
                 command_controller.set_current_command(action_name)
                 Clock.schedule_once(partial(controller.set_snackbar_message, f"Running: {action_name}"))
-                command()
+                with profile_run(action_name, command_controller.get_profiles_dir,
+                                 sampler=SeeOtterConfig.instance().PROCESSING_PROFILER,
+                                 enabled=SeeOtterConfig.instance().SAVE_PROCESSING_PROFILES):
+                    command()
                 Clock.schedule_once(partial(controller.set_snackbar_message, f"Completed: {action_name}"))
                 if refresh:
                     Clock.schedule_once(controller.refresh_survey)
@@ -86,6 +91,9 @@ class SurveyCommandController(EventDispatcher):
         command_thread = threading.Thread(target=command_task, args=(self, command, action_name, refresh,))
         command_thread.start()
 
+    def get_profiles_dir(self):
+        return self.survey.profiles_dir if self.survey is not None else None
+
     def run_command_on_user_prompt(self, prompt, command, action_name, refresh=True):
 
         def run_command_on_user_prompt_task(controller: SurveyCommandController, command, action_name):
@@ -156,6 +164,10 @@ class SurveyCommandController(EventDispatcher):
         self.run_command(command=partial(post_processing, self.survey), action_name="Run Post-Processing",
                          refresh=True)
 
+    def extract_prediction_chips(self, *args, **kwargs):
+        self.run_command(command=partial(extract_prediction_chips, self.survey), action_name="Extract Prediction Chips",
+                         refresh=False)
+
     def reset_all_predictions(self, *args, **kwargs):
         if len(self.survey.predictions) < 0:
             self.controller.set_snackbar_message("Operation cancelled: Survey contains no predictions")
@@ -302,13 +314,14 @@ class SurveyCommandController(EventDispatcher):
                 save(survey.transect_map_file_path_kml)
 
             # Generate Results
-            ResultsGenerator(survey).all_otters().save('results_all_otters.csv')
-            ResultsGenerator(survey).distinct_otters().save('results_distinct_otters.csv')
-            ResultsGenerator(survey).all_predictions().save('results_all_predictions.csv')
-            ResultsGenerator(survey).distinct_otter_count_by_image().\
-                save('results_distinct_otter_count_by_image.csv')
-            ResultsGenerator(survey).validated_predictions().save('validated_predictions.csv')
-            ResultsGenerator(survey).survey_overview().save('survey_overview.csv')
+            results = ResultsGenerator(survey)
+            results.save_reports({
+                'results_all_otters.csv': results.all_otters_report(),
+                'results_distinct_otters.csv': results.distinct_otters_report(),
+                'results_all_predictions.csv': results.all_predictions_report(),
+                'results_distinct_otter_count_by_image.csv': results.distinct_otter_count_by_image_report(),
+                'validated_predictions.csv': results.validated_predictions_report(),
+                'survey_overview.csv': results.survey_overview_report()})
             subprocess.Popen(f'explorer /select,"{realpath(survey.get_relative_path(AMBIGUOUS_VOTE_DIR))}"')
 
         self.run_command(command=partial(generate_results_task, self.survey, self.controller),
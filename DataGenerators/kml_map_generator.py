@@ -4,6 +4,7 @@ from simplekml import Style
 from DataGenerators.map_generator import MapGenerator
 from Processing.survey_image_processing import get_coordinate_bounds
 from SurveyEntities.survey import Survey
+from Utilities.profiler import profile_stage
 
 # Color Format: aabbggrr
 kml_map_colors = ['550000ff', '55ff0000', '550099ff', '559900ff']
@@ -41,6 +42,7 @@ def get_camera_style_mapping(survey):
 class KmlMapGenerator:
 
     @classmethod
+    @profile_stage("generate_transect_map")
     def survey_transect_map(cls, survey: Survey, performance_mode=True):
         print("Generating Kml Map...")
         kml_map = simplekml.Kml()
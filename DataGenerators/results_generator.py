@@ -1,8 +1,46 @@
 import csv
+from contextlib import ExitStack
+from typing import Dict
 from Processing.survey_processing import *
+from Utilities.profiler import profile_stage
 from version import version
 
 
+class ResultsReport:
+    """
+    Definition of a csv report. Rows are any fixed rows, followed by the rows produced by image_rows(image,
+    image_fields) for each survey image.
+    """
+
+    def __init__(self, headers, image_rows=None, rows=None):
+        self.headers = headers
+        self.image_rows = image_rows
+        self.rows = rows or []
+
+
+class ImageResultFields:
+    """
+    Per-image result fields shared by every report written in the same pass. Fields are calculated on first use.
+    """
+
+    def __init__(self, image: SurveyImage):
+        self.image = image
+        self._info = None
+        self._bounds = None
+
+    @property
+    def info(self):
+        if self._info is None:
+            self._info = ResultsGenerator.image_info_fields(self.image)
+        return self._info
+
+    @property
+    def bounds(self):
+        if self._bounds is None:
+            self._bounds = ResultsGenerator.image_bounds_fields(self.image)
+        return self._bounds
+
+
 class ResultsGenerator:
     """
     Generates csv data output for a survey
@@ -12,7 +50,8 @@ class ResultsGenerator:
         self.survey: Survey = survey
         self.min_confidence = min_confidence
         self.headers = []
-        self.rows = []
+        self.report: ResultsReport = None
+        self._distinct_prediction_ids = None
 
     @staticmethod
     def image_bounds_headers():
@@ -69,147 +108,148 @@ class ResultsGenerator:
         else:
             return [NA for field in range(len(ResultsGenerator.inclinometer_data_headers()))]
 
+    @property
+    def distinct_prediction_ids(self):
+        """
+        Id's of distinct predictions (filtered by confidence). Calculated once per results generator and shared by
+        all reports.
+        """
+        if self._distinct_prediction_ids is None:
+            distinct_otters = get_distinct_predictions(self.survey)
+            distinct_otters = filter_predictions(distinct_otters, confidence_cutoff=self.min_confidence)
+            self._distinct_prediction_ids = {id(prediction) for prediction in distinct_otters}
+        return self._distinct_prediction_ids
+
+    def set_report(self, report: ResultsReport):
+        self.report = report
+        self.headers = report.headers
+        return self
+
     def save(self, file_name):
-        results_dir = self.survey.get_relative_path(RESULTS_DIR)
-        path = os.path.join(results_dir, file_name)
+        self.save_reports({file_name: self.report})
+
+    @profile_stage("generate_reports")
+    def save_reports(self, reports: Dict[str, ResultsReport]):
+        """
+        Streams several reports to csv in a single pass over the survey images. Rows are written as they are
+        produced, and per-image fields (ie: image footprint) are only calculated once per image.
+        :param reports: Dict of results file name to report
+        """
         if self.survey.has_no_images:
             print("No images in project. Skipping csv results generation.")
-        elif self.headers is None or self.rows is None:
+            return
+        reports = {file_name: report for file_name, report in reports.items() if report is not None}
+        if len(reports) == 0:
             print("No results to save.")
-        with open(path, 'w', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(self.headers)
-            writer.writerows(self.rows)
-            print(f"Saved results to {path}")
+            return
+        results_dir = self.survey.get_relative_path(RESULTS_DIR)
+        with ExitStack() as stack:
+            writers = []
+            for file_name, report in reports.items():
+                csv_file = stack.enter_context(open(os.path.join(results_dir, file_name), 'w', newline=''))
+                writer = csv.writer(csv_file)
+                writer.writerow(report.headers)
+                writer.writerows(report.rows)
+                if report.image_rows is not None:
+                    writers.append((writer, report.image_rows))
+            if writers:
+                for image in self.survey.images:
+                    image_fields = ImageResultFields(image)
+                    for writer, image_rows in writers:
+                        writer.writerows(image_rows(image, image_fields))
+        for file_name in reports:
+            print(f"Saved results to {os.path.join(results_dir, file_name)}")
 
-    def all_otters(self):
-        self.headers += ResultsGenerator.image_info_headers()
-        self.headers += ResultsGenerator.prediction_data_headers()
-        self.headers += ResultsGenerator.image_bounds_headers()
-
-        for image in self.survey.images:
-            if len(image.predictions) == 0:
-                row = []
-                if len(image.predictions) == 0:
-                    row += ResultsGenerator.image_info_fields(image)
-                    row += ResultsGenerator.prediction_data_fields(None)
-                    row += ResultsGenerator.image_bounds_fields(image)
-                    self.rows.append(row)
-            else:
-                predictions = filter_predictions(image.predictions, confidence_cutoff=self.min_confidence)
-                for prediction in predictions:
-                    row = []
-                    row += ResultsGenerator.image_info_fields(image)
-                    row += ResultsGenerator.prediction_data_fields(prediction)
-                    row += ResultsGenerator.image_bounds_fields(image)
-                    self.rows.append(row)
+    @staticmethod
+    def prediction_report_headers():
+        return ResultsGenerator.image_info_headers() + ResultsGenerator.prediction_data_headers() + \
+               ResultsGenerator.image_bounds_headers()
 
-        return self
+    @staticmethod
+    def prediction_rows(image_fields: ImageResultFields, predictions, include_empty_image=False):
+        if include_empty_image and len(image_fields.image.predictions) == 0:
+            yield image_fields.info + ResultsGenerator.prediction_data_fields(None) + image_fields.bounds
+            return
+        for prediction in predictions:
+            yield image_fields.info + ResultsGenerator.prediction_data_fields(prediction) + image_fields.bounds
+
+    def all_otters_report(self):
+        def image_rows(image: SurveyImage, image_fields: ImageResultFields):
+            predictions = filter_predictions(image.predictions, confidence_cutoff=self.min_confidence)
+            return self.prediction_rows(image_fields, predictions, include_empty_image=True)
+        return ResultsReport(self.prediction_report_headers(), image_rows=image_rows)
+
+    def distinct_otters_report(self):
+        def image_rows(image: SurveyImage, image_fields: ImageResultFields):
+            predictions = [prediction for prediction in image.predictions
+                           if id(prediction) in self.distinct_prediction_ids]
+            return self.prediction_rows(image_fields, predictions, include_empty_image=True)
+        return ResultsReport(self.prediction_report_headers(), image_rows=image_rows)
+
+    def all_predictions_report(self):
+        def image_rows(image: SurveyImage, image_fields: ImageResultFields):
+            return self.prediction_rows(image_fields, image.predictions, include_empty_image=True)
+        return ResultsReport(self.prediction_report_headers(), image_rows=image_rows)
+
+    def inclinometer_data_report(self):
+        def image_rows(image: SurveyImage, image_fields: ImageResultFields):
+            yield image_fields.info + ResultsGenerator.inclinometer_data_fields(image)
+        headers = ResultsGenerator.image_info_headers() + ResultsGenerator.inclinometer_data_headers()
+        return ResultsReport(headers, image_rows=image_rows)
+
+    def distinct_otter_count_by_image_report(self):
+        def image_rows(image: SurveyImage, image_fields: ImageResultFields):
+            otter_count = sum(1 for prediction in image.predictions if id(prediction) in self.distinct_prediction_ids)
+            yield image_fields.info + [otter_count] + image_fields.bounds
+        headers = ResultsGenerator.image_info_headers() + ["OtterCount"] + ResultsGenerator.image_bounds_headers()
+        return ResultsReport(headers, image_rows=image_rows)
+
+    def validated_predictions_report(self):
+        def image_rows(image: SurveyImage, image_fields: ImageResultFields):
+            predictions = [prediction for prediction in image.predictions if prediction.is_validated]
+            return self.prediction_rows(image_fields, predictions)
+        return ResultsReport(self.prediction_report_headers(), image_rows=image_rows)
+
+    def survey_overview_report(self):
+        predicted_otters = filter_predictions(self.survey.predictions, confidence_cutoff=self.min_confidence)
+        rows = [["SeeOtter Version", version],
+                ["Images", str(self.survey.num_images)],
+                ["Processed Images", str(len(self.survey.processed_images))],
+                ["All Predictions", str(len(self.survey.predictions))],
+                ["Otters Identified", str(len(predicted_otters))],
+                ["Distinct Otter Count", str(len(self.distinct_prediction_ids))]]
+        return ResultsReport(["Survey Name", self.survey.survey_name], rows=rows)
+
+    def all_reports(self):
+        """
+        Standard set of results reports, keyed by file name
+        """
+        return {'inclinometer_data.csv': self.inclinometer_data_report(),
+                'results_all_otters.csv': self.all_otters_report(),
+                'results_distinct_otters.csv': self.distinct_otters_report(),
+                'results_all_predictions.csv': self.all_predictions_report(),
+                'results_distinct_otter_count_by_image.csv': self.distinct_otter_count_by_image_report(),
+                'validated_predictions.csv': self.validated_predictions_report(),
+                'survey_overview.csv': self.survey_overview_report()}
 
-    def distinct_otters(self):
-        self.headers += ResultsGenerator.image_info_headers()
-        self.headers += ResultsGenerator.prediction_data_headers()
-        self.headers += ResultsGenerator.image_bounds_headers()
-        distinct_otters = get_distinct_predictions(self.survey)
-        distinct_otters = filter_predictions(distinct_otters, confidence_cutoff=self.min_confidence)
-
-        for image in self.survey.images:
-            if len(image.predictions) == 0:
-                row = []
-                if len(image.predictions) == 0:
-                    row += ResultsGenerator.image_info_fields(image)
-                    row += ResultsGenerator.prediction_data_fields(None)
-                    row += ResultsGenerator.image_bounds_fields(image)
-                    self.rows.append(row)
-            else:
-                predictions = [prediction for prediction in image.predictions if prediction in distinct_otters]
-                for prediction in predictions:
-                    row = []
-                    row += ResultsGenerator.image_info_fields(image)
-                    row += ResultsGenerator.prediction_data_fields(prediction)
-                    row += ResultsGenerator.image_bounds_fields(image)
-                    self.rows.append(row)
+    def all_otters(self):
+        return self.set_report(self.all_otters_report())
 
-        return self
+    def distinct_otters(self):
+        return self.set_report(self.distinct_otters_report())
 
     def all_predictions(self):
-        self.headers += ResultsGenerator.image_info_headers()
-        self.headers += ResultsGenerator.prediction_data_headers()
-        self.headers += ResultsGenerator.image_bounds_headers()
-
-        for image in self.survey.images:
-            row = []
-            if len(image.predictions) == 0:
-                row += ResultsGenerator.image_info_fields(image)
-                row += ResultsGenerator.prediction_data_fields(None)
-                row += ResultsGenerator.image_bounds_fields(image)
-                self.rows.append(row)
-            else:
-                for prediction in image.predictions:
-                    row = []
-                    row += ResultsGenerator.image_info_fields(image)
-                    row += ResultsGenerator.prediction_data_fields(prediction)
-                    row += ResultsGenerator.image_bounds_fields(image)
-                    self.rows.append(row)
-
-        return self
+        return self.set_report(self.all_predictions_report())
 
     def inclinometer_data(self):
-        self.headers += ResultsGenerator.image_info_headers()
-        self.headers += ResultsGenerator.inclinometer_data_headers()
-
-        for image in self.survey.images:
-            row = []
-            row += ResultsGenerator.image_info_fields(image)
-            row += ResultsGenerator.inclinometer_data_fields(image)
-            self.rows.append(row)
-
-        return self
+        return self.set_report(self.inclinometer_data_report())
 
     def distinct_otter_count_by_image(self):
-        self.headers += ResultsGenerator.image_info_headers()
-        self.headers.append("OtterCount")
-        self.headers += ResultsGenerator.image_bounds_headers()
-
-        distinct_otters = get_distinct_predictions(self.survey)
-        distinct_otters = filter_predictions(distinct_otters, confidence_cutoff=self.min_confidence)
-
-        for image in self.survey.images:
-            row = []
-            predictions = [prediction for prediction in image.predictions if distinct_otters.__contains__(prediction)]
-            row += ResultsGenerator.image_info_fields(image)
-            row.append(len(predictions))
-            row += ResultsGenerator.image_bounds_fields(image)
-            self.rows.append(row)
-
-        return self
+        return self.set_report(self.distinct_otter_count_by_image_report())
 
     def validated_predictions(self):
-        self.headers += ResultsGenerator.image_info_headers()
-        self.headers += ResultsGenerator.prediction_data_headers()
-        self.headers += ResultsGenerator.image_bounds_headers()
-
-        for image in self.survey.images:
-            validated_predictions = [prediction for prediction in image.predictions if prediction.is_validated]
-            for prediction in validated_predictions:
-                row = []
-                row += ResultsGenerator.image_info_fields(image)
-                row += ResultsGenerator.prediction_data_fields(prediction)
-                row += ResultsGenerator.image_bounds_fields(image)
-                self.rows.append(row)
-        return self
+        return self.set_report(self.validated_predictions_report())
 
     def survey_overview(self):
-        predicted_otters = filter_predictions(self.survey.predictions, confidence_cutoff=self.min_confidence)
-        distinct_otters = get_distinct_predictions(self.survey)
-        distinct_otters = filter_predictions(distinct_otters, confidence_cutoff=self.min_confidence)
+        return self.set_report(self.survey_overview_report())
 
-        self.headers += ["Survey Name", self.survey.survey_name]
-        self.rows.append(["SeeOtter Version", version])
-        self.rows.append(["Images", str(self.survey.num_images)])
-        self.rows.append(["Processed Images", str(len(self.survey.processed_images))])
-        self.rows.append(["All Predictions", str(len(self.survey.predictions))])
-        self.rows.append(["Otters Identified", str(len(predicted_otters))])
-        self.rows.append(["Distinct Otter Count", str(len(distinct_otters))])
-
-        return self
@@ -14,10 +14,5 @@ survey = load_survey()
 KmlMapGenerator.survey_transect_map(survey, performance_mode=True).save(survey.transect_map_file_path_kml)
 
 # Generate Results
-ResultsGenerator(survey).inclinometer_data().save('inclinometer_data.csv')
-ResultsGenerator(survey).all_otters().save('results_all_otters.csv')
-ResultsGenerator(survey).distinct_otters().save('results_distinct_otters.csv')
-ResultsGenerator(survey).all_predictions().save('results_all_predictions.csv')
-ResultsGenerator(survey).distinct_otter_count_by_image().save('results_distinct_otter_count_by_image.csv')
-ResultsGenerator(survey).validated_predictions().save('validated_predictions.csv')
-ResultsGenerator(survey).survey_overview().save('survey_overview.csv')
+results = ResultsGenerator(survey)
+results.save_reports(results.all_reports())
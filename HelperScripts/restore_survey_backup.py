@@ -0,0 +1,42 @@
+import argparse
+
+from Utilities.command_line import disable_kivy_argument_parsing
+
+disable_kivy_argument_parsing()
+
+from SurveyEntities.survey import Survey
+
+"""
+Lists and restores incremental survey backups.
+
+Example, restoring the latest backup:
+    python HelperScripts/restore_survey_backup.py "E:/GLBA/Waldo/2022/0605/savefile.json"
+
+Run with --list to show available backups and --backup <name> to restore a specific one. The current project files are
+backed up before restoring, so a restore can be undone by restoring that backup.
+"""
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Restore a survey backup")
+    parser.add_argument("survey", help="Survey save file, survey directory or survey name")
+    parser.add_argument("--backup", default=None, help="Name of the backup to restore. Defaults to the latest backup")
+    parser.add_argument("--list", action="store_true", help="List backups without restoring")
+    parser.add_argument("--prune", type=int, default=None, metavar="KEEP_LAST",
+                        help="Delete all but the given number of most recent backups")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    survey = Survey.load(args.survey, quick_load=True)
+    if args.prune is not None:
+        pruned = survey.backup_store.prune(keep_last=args.prune)
+        print(f"Pruned {len(pruned)} backups")
+    if args.list:
+        for manifest in survey.backup_store.list_backups():
+            print(f"  - {manifest['name']}: {len(manifest['files'])} files, created {manifest['created']}")
+    elif args.prune is None:
+        survey.restore_backup(args.backup)
+        survey = Survey.load(args.survey)
+        print(survey.description)
@@ -1,63 +1,60 @@
-from pathlib import Path
+import argparse
 
-from DataGenerators.kml_map_generator import KmlMapGenerator
-from Processing.survey_processing import pre_processing, post_processing, clone_filtered_survey
+from Utilities.command_line import disable_kivy_argument_parsing
+
+disable_kivy_argument_parsing()
+
+from Processing.batch_runner import ACTIONS, DEFAULT_CLONE_SUFFIX, DEFAULT_CLONE_VALIDATION_TYPES, run_batch, \
+    STATUS_COMPLETED
 from SurveyEntities.object_prediction_data import ValidationState
-from SurveyEntities.survey import Survey
-from Utilities.utilities import print_title
-
-quick_load = True
-save_files = [
-    # r"D:\Southeast\Waldo\2022\05_22\savefile.json",
-    # r"D:\Southeast\Waldo\2022\05_24\savefile.json",
-    # r"D:\Southeast\Waldo\2022\05_25\savefile.json",
-    # r"D:\Southeast\Waldo\2022\05_27\savefile.json",
-    # r"D:\Southeast\Waldo\2022\05_28\savefile.json",
-    # r"D:\Southeast\Waldo\2022\05_29\savefile.json",
-    # r"D:\Southeast\Waldo\2022\05_31\savefile.json",
-    # r"D:\Southeast\Waldo\2022\06_01\savefile.json",
-    # r"D:\Southeast\Waldo\2022\06_02\savefile.json",
-    # r"D:\Southeast\Waldo\2022\06_03\savefile.json",
-    # r"D:\Southeast\Waldo\2022\06_05\savefile.json",
-    # r"D:\Southeast\Waldo\2022\06_07\savefile.json",
-    # r"D:\Southeast\Waldo\2022\06_08\savefile.json",
-    # r"D:\Southeast\Waldo\2022\06_09\savefile.json",
-    # r"D:\Southeast\Waldo\2022\06_12\savefile.json",
-    # r"D:\Southeast\Waldo\2022\06_13\savefile.json",
-    # r"D:\Southeast\Waldo\2022\06_14\savefile.json",
-    # r"D:\Southeast\Waldo\2022\06_15\savefile.json",
-    # r"D:\Southeast\Waldo\2022\06_16\savefile.json",
-    # r"D:\Southeast\Waldo\2022\06_17\savefile.json"
-
-    r"E:\GLBA\Waldo\2022\08_03\savefile.json",
-    r"E:\GLBA\Waldo\2022\08_04\savefile.json",
-    r"E:\GLBA\Waldo\2022\08_12\savefile.json"
-
-]
-
-
-###################################################################
-# Edit this method
-###################################################################
-def actions_to_run(survey: Survey):
-    include_validation_types = [ValidationState.AMBIGUOUS, ValidationState.CORRECT]
-    new_dir_name = str(Path(survey.project_path)) + "(validation)"
-    clone_filtered_survey(survey, include_validation_types, out_dir_name=new_dir_name)
-
-
-###################################################################
-# Don't change stuff past here
-###################################################################
-exit_status = {save_file: "Unprocessed" for save_file in save_files}
-for idx, save_file in enumerate(save_files):
-    try:
-        print_title(f"Processing [{idx+1}/{len(save_files)}]: '{save_file}'")
-        survey = Survey.load(save_file, quick_load=quick_load)
-        actions_to_run(survey)
-        exit_status.update({save_file: "Ran to Completion"})
-    except Exception as ex:
-        exit_status.update({save_file: f"Error: {ex}"})
-
-print_title("Processing Completed.")
-for file, status in exit_status.items():
-    print(f"  - Save File: {file}. Status: {status}")
+from Utilities.file_operations import FILE_MODES
+
+"""
+Runs processing actions for many surveys in parallel worker processes.
+
+Example, reprocessing a season of surveys with 4 workers:
+    python HelperScripts/run_bulk_command.py "E:/GLBA/Waldo/2022/*/savefile.json" \
+        --actions pre_processing predictions post_processing results --workers 4 --report glba_2022_status.json
+
+Rerun with --resume to skip surveys the status report records as completed.
+"""
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run survey actions for a batch of surveys")
+    parser.add_argument("surveys", nargs="+",
+                        help="Survey save files, survey directories, survey names or glob patterns")
+    parser.add_argument("--actions", nargs="+", choices=list(ACTIONS), default=["clone"],
+                        help="Actions to run for each survey. Always run in the order: " + ", ".join(ACTIONS))
+    parser.add_argument("--workers", type=int, default=1, help="Number of surveys processed at the same time")
+    parser.add_argument("--report", required=True,
+                        help="Json status report path, e.g. next to the surveys. Logs are saved next to it by default")
+    parser.add_argument("--log-dir", default=None,
+                        help="Directory for per survey logs. Defaults to 'logs' next to the status report")
+    parser.add_argument("--resume", action="store_true", help="Skip surveys already completed in the status report")
+    parser.add_argument("--force", action="store_true", help="Force pre-processing and overwrite existing clones")
+    parser.add_argument("--clone-suffix", default=DEFAULT_CLONE_SUFFIX,
+                        help="Appended to the survey directory to create the clone directory")
+    parser.add_argument("--clone-validation-types", nargs="+", default=DEFAULT_CLONE_VALIDATION_TYPES,
+                        choices=[validation_state.name for validation_state in ValidationState],
+                        help="Validation types of predictions kept in clones")
+    parser.add_argument("--clone-file-mode", default=None, choices=FILE_MODES,
+                        help="How clone images are created. Defaults to the CLONE_SURVEY_FILE_MODE config")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    options = {
+        "force": args.force,
+        "clone_suffix": args.clone_suffix,
+        "clone_validation_types": args.clone_validation_types,
+        "clone_file_mode": args.clone_file_mode,
+    }
+    report = run_batch(args.surveys, args.actions, args.report, log_dir=args.log_dir, max_workers=args.workers,
+                       resume=args.resume, options=options)
+    for save_file, entry in report.surveys.items():
+        print(f"  - Save File: {save_file}. Status: {entry['status']}"
+              + (f". Error: {entry['error']}" if entry.get("error") else ""))
+    failed = [entry for entry in report.surveys.values() if entry["status"] != STATUS_COMPLETED]
+    exit(1 if failed else 0)
@@ -1,6 +1,9 @@
 
 class InclinometerRecord:
 
+    __slots__ = ("datetime", "angle_x", "angle_y", "angle_z", "acceleration_x", "acceleration_y", "acceleration_z",
+                 "angular_velocity_x", "angular_velocity_y", "angular_velocity_z", "hx", "hy", "hz", "temp")
+
     def __init__(self, datetime=None, angle_x=None, angle_y=None, angle_z=None, acceleration_x=None,
                  acceleration_y=None, acceleration_z=None, angular_velocity_x=None, angular_velocity_y=None,
                  angular_velocity_z=None, hx=None, hy=None, hz=None, temp=None):
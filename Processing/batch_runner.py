@@ -0,0 +1,273 @@
+import contextlib
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from os.path import join
+from pathlib import Path
+from typing import List
+
+from DataGenerators.kml_map_generator import KmlMapGenerator
+from DataGenerators.results_generator import ResultsGenerator
+from Processing.survey_processing import pre_processing, post_processing, clone_filtered_survey
+from SurveyEntities.object_prediction_data import ValidationState
+from SurveyEntities.survey import Survey
+from Config.see_otter_config import SeeOtterConfig
+from Utilities.exit_flag import ExitFlag
+from Utilities.profiler import profile_run
+from Utilities.utilities import print_title
+from config import PROFILES_DIR
+
+"""
+Runs processing actions for many surveys in a pool of worker processes, e.g. to reprocess a season of survey days
+overnight. Each survey gets its own log file and the outcome of every survey is recorded in a status report, so an
+interrupted batch can be resumed without rerunning completed surveys.
+"""
+
+STATUS_PENDING = "Pending"
+STATUS_RUNNING = "Running"
+STATUS_COMPLETED = "Completed"
+STATUS_FAILED = "Failed"
+
+DEFAULT_CLONE_SUFFIX = "(validation)"
+DEFAULT_CLONE_VALIDATION_TYPES = [ValidationState.AMBIGUOUS.name, ValidationState.CORRECT.name]
+
+
+def run_pre_processing(survey: Survey, options: dict):
+    pre_processing(survey, force=options.get("force", False))
+    survey.save()
+
+
+def run_predictions(survey: Survey, options: dict):
+    # Imported here so the detection model is only loaded by workers that run predictions
+    from Processing.predict import run_image_detection
+    run_image_detection(survey, exit_flag=ExitFlag())
+    survey.save()
+
+
+def run_post_processing(survey: Survey, options: dict):
+    post_processing(survey)
+    survey.save()
+
+
+def run_results(survey: Survey, options: dict):
+    KmlMapGenerator.survey_transect_map(survey, performance_mode=True).save(survey.transect_map_file_path_kml)
+    results = ResultsGenerator(survey)
+    results.save_reports(results.all_reports())
+
+
+def run_clone(survey: Survey, options: dict):
+    include_validation_types = [ValidationState[name] for name in
+                                options.get("clone_validation_types", DEFAULT_CLONE_VALIDATION_TYPES)]
+    out_dir_path = str(Path(survey.project_path)) + options.get("clone_suffix", DEFAULT_CLONE_SUFFIX)
+    clone_filtered_survey(survey, include_validation_types, out_dir_path=out_dir_path,
+                          force=options.get("force", False), file_mode=options.get("clone_file_mode"))
+
+
+# Actions in the order they run when several are requested for a survey
+ACTIONS = {
+    "pre_processing": run_pre_processing,
+    "predictions": run_predictions,
+    "post_processing": run_post_processing,
+    "results": run_results,
+    "clone": run_clone,
+}
+
+# Actions that only need survey metadata, so surveys running nothing else can be quick loaded
+QUICK_LOAD_ACTIONS = {"clone"}
+
+
+def sort_actions(actions: List[str]):
+    for action in actions:
+        if action not in ACTIONS:
+            raise Exception(f"Unknown batch action: '{action}'. Must be one of: {list(ACTIONS)}")
+    return [action for action in ACTIONS if action in actions]
+
+
+def find_save_files(surveys: List[str]):
+    """
+    Expands survey paths and glob patterns into survey save files.
+    :param surveys: Save file paths, survey directories, survey names or glob patterns matching any of them
+    :return: (save files in the given order without duplicates, surveys that could not be located)
+    """
+    save_files, missing = [], []
+    for survey in surveys:
+        matches = sorted(glob.glob(survey, recursive=True)) if glob.has_magic(survey) else [survey]
+        if len(matches) == 0:
+            missing.append(survey)
+        for match in matches:
+            try:
+                save_file, _ = Survey.locate_save_file_path(match)
+            except FileNotFoundError:
+                missing.append(match)
+                continue
+            save_file = os.path.abspath(save_file)
+            if save_file not in save_files:
+                save_files.append(save_file)
+    return save_files, missing
+
+
+def get_log_file_name(save_file):
+    survey_dir = Path(save_file).parent
+    path_hash = hashlib.md5(str(survey_dir).encode()).hexdigest()[:8]
+    return f"{survey_dir.name}_{path_hash}.log"
+
+
+def run_survey(save_file, actions: List[str], log_file_path, options: dict = None, completed_actions: List[str] = None):
+    """
+    Loads a survey and runs the given actions on it, logging all output to the log file. Runs in a worker process.
+    :param completed_actions: Actions a previous run already completed for the survey, which are skipped
+    :return: Status report entry for the survey
+    """
+    options = options or {}
+    completed_actions = list(completed_actions or [])
+    remaining_actions = [action for action in actions if action not in completed_actions]
+    result = {
+        "save_file": save_file,
+        "actions": actions,
+        "completed_actions": completed_actions,
+        "status": STATUS_RUNNING,
+        "error": None,
+        "log_file": log_file_path,
+        "started": datetime.now().isoformat(timespec="seconds"),
+        "pid": os.getpid(),
+    }
+    start_time = time.time()
+    os.makedirs(os.path.dirname(log_file_path), exist_ok=True)
+    with open(log_file_path, "w") as log_file, open(os.devnull) as no_input, \
+            contextlib.redirect_stdout(log_file), contextlib.redirect_stderr(log_file):
+        # Prompts (e.g. for a moved project path) fail instead of waiting for input that will never come
+        sys.stdin = no_input
+        try:
+            print_title(f"Batch run: '{save_file}'. Actions: {remaining_actions}"
+                        + (f". Already completed: {completed_actions}" if completed_actions else ""))
+            with profile_run(f"Batch {'+'.join(remaining_actions)}", lambda: join(Path(save_file).parent, PROFILES_DIR),
+                             sampler=SeeOtterConfig.instance().PROCESSING_PROFILER,
+                             enabled=SeeOtterConfig.instance().SAVE_PROCESSING_PROFILES):
+                quick_load = all(action in QUICK_LOAD_ACTIONS for action in remaining_actions)
+                survey = Survey.load(save_file, quick_load=quick_load)
+                for action in remaining_actions:
+                    print_title(f"Running action: {action}")
+                    ACTIONS[action](survey, options)
+                    result["completed_actions"].append(action)
+            result["status"] = STATUS_COMPLETED
+        except BaseException as ex:
+            traceback.print_exc()
+            result["status"] = STATUS_FAILED
+            result["error"] = f"{type(ex).__name__}: {ex}"
+        finally:
+            sys.stdin = sys.__stdin__
+    result["finished"] = datetime.now().isoformat(timespec="seconds")
+    result["duration_s"] = round(time.time() - start_time, 1)
+    return result
+
+
+class BatchStatusReport:
+    """
+    Machine readable status of each survey in a batch run, saved as json after every change
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.surveys = {}
+
+    def load(self):
+        if os.path.exists(self.file_path):
+            with open(self.file_path, "r") as f:
+                self.surveys = json.load(f).get("surveys", {})
+        return self
+
+    def save(self):
+        report = {
+            "updated": datetime.now().isoformat(timespec="seconds"),
+            "summary": self.summary(),
+            "surveys": self.surveys,
+        }
+        directory = os.path.dirname(os.path.abspath(self.file_path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_file_path = f"{self.file_path}.tmp"
+        with open(tmp_file_path, "w") as f:
+            json.dump(report, f, indent=2)
+        os.replace(tmp_file_path, self.file_path)
+
+    def summary(self):
+        summary = {}
+        for entry in self.surveys.values():
+            summary[entry["status"]] = summary.get(entry["status"], 0) + 1
+        return summary
+
+    def update(self, save_file, **kwargs):
+        self.surveys.setdefault(save_file, {"save_file": save_file}).update(kwargs)
+
+    def is_completed(self, save_file, actions: List[str]):
+        """
+        True if a previous run completed all the given actions for the survey
+        """
+        entry = self.surveys.get(save_file)
+        if entry is None:
+            return False
+        completed_actions = entry.get("completed_actions", [])
+        return all(action in completed_actions for action in actions)
+
+
+def run_batch(surveys: List[str], actions: List[str], report_file_path, log_dir=None, max_workers=1, resume=False,
+              options: dict = None):
+    """
+    Runs the actions for every survey in a process pool.
+    :param surveys: Survey paths or glob patterns (see find_save_files)
+    :param actions: Names of actions to run (see ACTIONS)
+    :param report_file_path: Json status report path
+    :param log_dir: Directory for per survey logs. Defaults to a 'logs' directory next to the report
+    :param max_workers: Number of surveys processed at the same time
+    :param resume: Skip surveys the existing report records as having completed all actions, and skip the actions
+        already completed for the other surveys
+    :param options: Action options (force, clone_suffix, clone_validation_types, clone_file_mode)
+    :return: Status report
+    """
+    actions = sort_actions(actions)
+    log_dir = log_dir or join(os.path.dirname(os.path.abspath(report_file_path)), "logs")
+    report = BatchStatusReport(report_file_path)
+    if resume:
+        report.load()
+
+    save_files, missing = find_save_files(surveys)
+    for survey in missing:
+        report.update(survey, actions=actions, completed_actions=[], status=STATUS_FAILED,
+                      error="Survey save file not found")
+    pending = []
+    for save_file in save_files:
+        if resume and report.is_completed(save_file, actions):
+            print(f"Skipping completed survey: '{save_file}'")
+            continue
+        pending.append(save_file)
+        completed_actions = report.surveys.get(save_file, {}).get("completed_actions", []) if resume else []
+        report.update(save_file, actions=actions, completed_actions=[action for action in actions
+                                                                     if action in completed_actions],
+                      status=STATUS_PENDING, error=None, log_file=join(log_dir, get_log_file_name(save_file)))
+    report.save()
+
+    print_title(f"Batch run: {len(pending)} surveys, actions: {actions}, workers: {max_workers}")
+    # Spawned workers don't inherit the parent's threads or GPU state
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        futures = {executor.submit(run_survey, save_file, actions, report.surveys[save_file]["log_file"], options,
+                                   report.surveys[save_file]["completed_actions"]): save_file for save_file in pending}
+        for idx, future in enumerate(as_completed(futures)):
+            save_file = futures[future]
+            try:
+                report.update(**future.result())
+            except Exception as ex:
+                report.update(save_file, status=STATUS_FAILED, error=f"{type(ex).__name__}: {ex}")
+            report.save()
+            entry = report.surveys[save_file]
+            print(f"[{idx + 1}/{len(pending)}] {entry['status']}: '{save_file}'"
+                  + (f". Error: {entry['error']}" if entry["error"] else ""))
+
+    print_title(f"Batch run completed. {report.summary()}. Status report: '{report_file_path}'")
+    return report
@@ -6,6 +6,7 @@ from tqdm import tqdm
 
 from Config.see_otter_config import SeeOtterConfig
 from Utilities.exit_flag import ExitFlag
+from Utilities.profiler import profile_stage
 from Utilities.tqdm_plus import TqdmPlus
 from config import *
 from Utilities.utilities import get_root_path
@@ -53,12 +54,12 @@ def run_image_detection(survey: Survey, progress_callback=None, exit_flag: ExitF
                 if image.has_been_processed:
                     continue
                 try:
-                    predict_image(image, slice_images=slice_images)
+                    predict_image(survey, image, slice_images=slice_images)
                 except MemoryError as me:
                     if slice_images is False:
                         slice_images = True
                         print("Setting 'SLICE_PREDICTED_IMAGES=True' and retrying...")
-                        predict_image(image,  slice_images=slice_images)
+                        predict_image(survey, image, slice_images=slice_images)
                     else:
                         raise me
                 except ValueError as ve:
@@ -101,7 +102,8 @@ def get_result(image: SurveyImage):
         verbose=0)
 
 
-def predict_image(image: SurveyImage, slice_images=config().SLICE_PREDICTED_IMAGES):
+@profile_stage("inference")
+def predict_image(survey: Survey, image: SurveyImage, slice_images=config().SLICE_PREDICTED_IMAGES):
     retries = 0
     while True:
         try:
@@ -109,7 +111,7 @@ def predict_image(image: SurveyImage, slice_images=config().SLICE_PREDICTED_IMAG
                 result = get_sliced_result(image)
             else:
                 result = get_result(image)
-            image.set_prediction_results(result)
+            survey.set_prediction_results(image, result)
             break
         except RuntimeError as re:
             retries += 1
@@ -1,11 +1,15 @@
 import shutil
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from time import perf_counter
 
 from SurveyEntities.survey import *
 from SurveyEntities.survey_image import *
+from Utilities.chip_store import ChipStore
 from Utilities.custom_exceptions import SeeOtterException
+from Utilities.file_operations import link_or_copy_files
 from Utilities.image_processing import ImageProcessing
+from Utilities.profiler import profile_stage, in_current_run
 from config import *
 from shapely.geometry import Polygon
 from Processing.survey_image_processing import *
@@ -25,6 +29,7 @@ def pre_processing(survey: Survey, force=False):
         calculate_bearing(survey)
         correct_image_orientation(survey, images_to_preprocess)
         set_preprocessed_flag(images_to_preprocess, True)
+        survey.statistics.invalidate()
 
 
 def post_processing(survey: Survey, skip_already_processed=False):
@@ -35,6 +40,39 @@ def post_processing(survey: Survey, skip_already_processed=False):
         flag_prediction_overlap(survey, include_predictions=not_processed_predictions)
     else:
         flag_prediction_overlap(survey)
+    if config().EXTRACT_PREDICTION_CHIPS:
+        extract_prediction_chips(survey)
+
+
+def get_chip_store(survey: Survey):
+    chip_store = ChipStore(survey.chip_dir, chip_size=config().PREDICTION_CHIP_SIZE,
+                           context_scale=config().PREDICTION_CHIP_CONTEXT_SCALE)
+    chip_store.load()
+    return chip_store
+
+
+@profile_stage("extract_prediction_chips")
+def extract_prediction_chips(survey: Survey, force=False):
+    """
+    Crops a chip around every prediction into the survey's chip store. Only predictions without a chip are
+    extracted unless forced, and each image is decoded once for all of its predictions.
+    """
+    chip_store = get_chip_store(survey)
+    if force or len(chip_store) == 0:
+        chip_store.clear()
+    images = [image for image in survey.images if chip_store.get_missing_predictions(image.predictions)]
+    if len(images) == 0:
+        print("All predictions already have chips. Skipping chip extraction.")
+        return chip_store
+    with tqdm(images) as images:
+        images.set_description(f"Extracting Prediction Chips".ljust(PROGRESS_BAR_LABEL_PADDING))
+        for image in images:
+            try:
+                chip_store.add_image_chips(image.file_path, image.predictions)
+            except Exception as ex:
+                print(f"Error extracting prediction chips for image: {image.file_path}. Error: {ex}")
+    chip_store.save()
+    return chip_store
 
 
 def get_images_to_preprocess(survey: Survey):
@@ -53,24 +91,37 @@ def can_start_pre_processing(survey: Survey, images_to_preprocess: List[SurveyIm
 
 
 def correct_image_orientation(survey: Survey, images: List[SurveyImage]):
-    with tqdm(images) as images:
-        images.set_description(f"Correcting Image Orientation".ljust(PROGRESS_BAR_LABEL_PADDING))
-        consecutive_errors = 0
-        for image in images:
-            try:
-                if image.camera.rotate_image:
-                    ImageProcessing.rotate_image_to_180(image.file_path)
+    images = [image for image in images if image.camera.rotate_image]
+    # Orientation tags are patched in place, so the work is file I/O bound and threads overlap well
+    with ThreadPoolExecutor(max_workers=config().IMAGE_ORIENTATION_THREADS) as executor:
+        rotate = in_current_run(rotate_image_to_180)
+        futures = [executor.submit(rotate, image) for image in images]
+        with tqdm(total=len(futures)) as progress:
+            progress.set_description(f"Correcting Image Orientation".ljust(PROGRESS_BAR_LABEL_PADDING))
+            consecutive_errors = 0
+            for image, future in zip(images, futures):
+                try:
+                    future.result()
                     consecutive_errors = 0
-            except OSError as ose:
-                consecutive_errors += 1
-                if consecutive_errors >= 3:
-                    print("Maximum consecutive errors hit while correcting image orientation.")
-                    raise ose
-                survey.exclude_image(image)
-                print(f"Excluding image ({image.file_name}) due to error during image rotation (file is likely "
-                      f"corrupted). Error Message: {ose}")
+                except OSError as ose:
+                    consecutive_errors += 1
+                    if consecutive_errors >= 3:
+                        print("Maximum consecutive errors hit while correcting image orientation.")
+                        for pending_future in futures:
+                            pending_future.cancel()
+                        raise ose
+                    survey.exclude_image(image)
+                    print(f"Excluding image ({image.file_name}) due to error during image rotation (file is likely "
+                          f"corrupted). Error Message: {ose}")
+                progress.update(1)
+
 
+@profile_stage("correct_image_orientation")
+def rotate_image_to_180(image: SurveyImage):
+    ImageProcessing.rotate_image_to_180(image.file_path)
 
+
+@profile_stage("calculate_bearing")
 def calculate_bearing(survey: Survey):
     if survey.has_no_images:
         print("No images in project. Skipping bearing calculation.")
@@ -150,18 +201,22 @@ def vote_ambiguous_validations(survey: Survey, force_save=False):
                 print(f"Warning: Cannot vote on prediction. Same number of correct and incorrect predictions "
                       f"({correct_count}).")
             print(f"Image: {prediction.image_name}, BoxMinX: {prediction.xmin}")
+    survey.statistics.invalidate()
     if force_save or prompt_user("Completed voting of ambiguous validations.\nSave changes? [Y/N]"):
         survey.backup()
         survey.save()
 
 
-def clone_survey(survey: Survey, new_survey_path, skip_excluded_images=False, force=False):
+def clone_survey(survey: Survey, new_survey_path, skip_excluded_images=False, force=False, file_mode=None):
     """
     Clone a survey and it's files to a new location
     :param survey: Survey to clone
     :param new_survey_path: Dir the cloned survey will be copied to
     :param skip_excluded_images: If true, excluded images will not be copied
     :param force: If true, user will not prompted to overwrite existing dir
+    :param file_mode: How images are cloned: 'copy', 'reflink' or 'hardlink' (see Utilities.file_operations). Defaults
+     to the CLONE_SURVEY_FILE_MODE config. Hardlinked images are shared with the original survey, so changing an image
+     file in place (e.g. correcting its orientation) changes it in both surveys.
     :return: None
     """
     if not paths_equal(Path(survey.images_dir).parent, survey.project_path):
@@ -172,15 +227,16 @@ def clone_survey(survey: Survey, new_survey_path, skip_excluded_images=False, fo
             shutil.rmtree(new_survey_path)
         else:
             raise Exception("Operation cancelled by user")
+    file_mode = file_mode or config().CLONE_SURVEY_FILE_MODE
     for file in os.listdir(survey.project_path):
         if file == "Images":
             img_dst = join(new_survey_path, "Images")
             os.makedirs(img_dst)
             images_to_copy = survey.images if skip_excluded_images else survey.images + survey.excluded_images
-            images_to_copy = tqdm(images_to_copy)
-            for image in images_to_copy:
-                images_to_copy.set_description("Copying Images")
-                shutil.copy2(src=image.file_path, dst=img_dst)
+            file_pairs = [(image.file_path, join(img_dst, image.file_name)) for image in images_to_copy]
+            mode_counts = link_or_copy_files(file_pairs, mode=file_mode, max_workers=config().FILE_COPY_THREADS,
+                                             description="Copying Images".ljust(PROGRESS_BAR_LABEL_PADDING))
+            print(f"Cloned {len(file_pairs)} images: {mode_counts}")
         else:
             src_path = join(survey.project_path, file)
             dst_path = join(new_survey_path, file)
@@ -194,7 +250,7 @@ def clone_survey(survey: Survey, new_survey_path, skip_excluded_images=False, fo
 
 
 def clone_filtered_survey(survey: Survey, include_validation_types: List[ValidationState], out_dir_path=None,
-                          out_dir_name=None, force=False):
+                          out_dir_name=None, force=False, file_mode=None):
     """
     Filters out images and predictions not matching the given types and creates a clone of the
     survey with unused images being excluded.
@@ -204,6 +260,7 @@ def clone_filtered_survey(survey: Survey, include_validation_types: List[Validat
     :param out_dir_path: Path for cloned survey (ignore if out_dir_name is specified)
     :param out_dir_name: If specified, will create a new directory with this name in the same parent dir as the given
      survey (ignore if out_dir_path is specified)
+    :param file_mode: How images are cloned (see clone_survey)
     """
     if out_dir_path is None:
         if out_dir_name is None:
@@ -211,24 +268,19 @@ def clone_filtered_survey(survey: Survey, include_validation_types: List[Validat
         parent_path = Path(survey.project_path).parent
         out_dir_path = os.path.join(parent_path, out_dir_name)
 
-    survey_copy = copy.deepcopy(survey)
-    survey_copy.excluded_images.clear()
-
-    keep_images = get_images_with_validation_type(survey_copy, include_validation_types)
-    remove_images = [image for image in survey_copy.images if image not in keep_images]
-
-    for image in remove_images:
-        survey_copy.images.remove(image)
-
-    for image in keep_images:
+    # Only the kept images are copied, the rest of the survey data is shared with the original survey
+    survey_copy = survey.create_subset(get_images_with_validation_type(survey, include_validation_types))
+    survey_copy.assign_cameras_to_images()
+    for image in survey_copy.images:
         image.predictions = [pred for pred in image.predictions if pred.validation_state in include_validation_types]
 
-    clone_survey(survey_copy, out_dir_path, skip_excluded_images=True, force=force)
+    clone_survey(survey_copy, out_dir_path, skip_excluded_images=True, force=force, file_mode=file_mode)
     survey_copy.update_paths(project_path=out_dir_path, images_dir=join(out_dir_path, "Images"))
     survey_copy.save()
     return Survey.get_survey_save_file_path(out_dir_path)
 
 
+@profile_stage("flag_prediction_overlap")
 def flag_prediction_overlap(survey: Survey, include_predictions=None):
     print("Flagging prediction overlap...")
     clear_transect_overlap_flags(survey)
@@ -376,6 +428,7 @@ def set_preprocessed_flag(images: List[SurveyImage], flag=True):
         image.has_been_preprocessed = flag
 
 
+@profile_stage("georeference_predictions")
 def calculate_all_predicted_object_coordinates(survey: Survey):
     print("Calculating predicted object coordinates...")
     with tqdm(survey.images) as images:
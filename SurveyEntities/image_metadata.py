@@ -1,9 +1,18 @@
+import sys
 from Utilities.image_processing import ImageProcessing
+from Utilities.profiler import profile_stage
 from config import *
 
 
 class ImageMetadata:
 
+    __slots__ = ("image_path", "camera_make", "camera_model", "image_orientation", "datetime", "resolution_x",
+                 "resolution_y", "iso", "fstop", "exposure", "focal_length")
+
+    # Fields with few distinct values across a survey, interned so images share one copy of each value
+    shared_fields = ["camera_make", "camera_model", "image_orientation", "iso", "fstop", "exposure", "focal_length"]
+
+    @profile_stage("parse_exif")
     def __init__(self, path):
         exif = ImageProcessing.load_exif_tags(path)
         self.image_path = path
@@ -17,6 +26,13 @@ class ImageMetadata:
         self.fstop = self.get_exif_tag(exif, EXIF_FSTOP)
         self.exposure = self.get_exif_tag(exif, EXIF_EXPOSURE)
         self.focal_length = self.get_exif_tag(exif, EXIF_FOCAL_LENGTH)
+        self.intern_shared_fields()
+
+    def intern_shared_fields(self):
+        for field in ImageMetadata.shared_fields:
+            value = getattr(self, field, None)
+            if isinstance(value, str):
+                setattr(self, field, sys.intern(value))
 
     def get_exif_tag(self, exif_tags, key):
         try:
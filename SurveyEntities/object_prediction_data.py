@@ -1,4 +1,3 @@
-import copy
 import json
 import time
 from enum import Enum
@@ -15,37 +14,50 @@ class ValidationState(int, Enum):
     AMBIGUOUS = 3
 
 
+class OriginalPredictionData:
+    """
+    Prediction values of an ObjectPredictionData when it was created, used to tell if a prediction was modified.
+    """
+    __slots__ = ("score", "xmin", "xmax", "ymin", "ymax", "category_id", "category_name")
+
+    def __init__(self, **kwargs):
+        for attr in OriginalPredictionData.__slots__:
+            setattr(self, attr, kwargs.get(attr))
+
+
 @JsonConvert.register
 class ObjectPredictionData:
     """
-    Represents a single prediction in an image and user validation data
+    Represents a single prediction in an image and user validation data. Surveys can hold hundreds of thousands of
+    predictions, so attributes are stored in slots rather than a per instance dict.
     """
 
-    # Image Info
-    latitude = 0
-    longitude = 0
-
-    # Prediction Info
-    score = 0.0
-    xmin = 0
-    xmax = 0
-    ymin = 0
-    ymax = 0
-    category_id = -1
-    category_name = ""
-
-    # User Input
-    validation_state = ValidationState.UNVALIDATED
-    validated_dttm = None
-    validated_by = ""
-    validation_confidence = ""
-    notes = ""
-    original_prediction_data = None
+    __slots__ = (
+        # Image Info
+        "image_name", "latitude", "longitude",
+        # Prediction Info
+        "score", "xmin", "xmax", "ymin", "ymax", "category_id", "category_name", "created_by", "is_user_generated",
+        # Calculated
+        "overlaps_image", "almost_overlaps_image", "transect_overlap_images",
+        # User Input
+        "validation_state", "validated_dttm", "validated_by", "validation_confidence", "notes",
+        "original_prediction_data",
+    )
 
     prediction_data_attributes = ["score", "xmin", "xmax", "ymin", "ymax", "category_id", "category_name"]
 
+    # Values of attributes missing from predictions saved by older versions, which only saved attributes set on the
+    # instance and used class attributes as defaults
+    default_values = {
+        "latitude": 0, "longitude": 0, "score": 0.0, "xmin": 0, "xmax": 0, "ymin": 0, "ymax": 0, "category_id": -1,
+        "category_name": "", "validation_state": ValidationState.UNVALIDATED, "validated_dttm": None,
+        "validated_by": "", "validation_confidence": "", "notes": "", "original_prediction_data": None,
+    }
+
     def __init__(self, prediction: ObjectPrediction = None, image_name=None, is_user_generated=False,
                  created_by=f"SeeOtter (V{version})", **kwargs):
+        for attr, value in self.default_values.items():
+            setattr(self, attr, value)
         self.image_name = image_name
         self.created_by = created_by
 
@@ -56,9 +68,16 @@ class ObjectPredictionData:
 
         self.is_user_generated = is_user_generated
         self.load_values_from_object_prediction(object_prediction=prediction)
-        self.__dict__.update(kwargs)
+        for attr, value in kwargs.items():
+            setattr(self, attr, value)
         self.backup_initial_state()
 
+    def __getattr__(self, name):
+        # Only called for slots that were never set
+        if name in self.default_values:
+            return self.default_values[name]
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
     @property
     def is_validated(self):
         return self.validation_state != ValidationState.UNVALIDATED
@@ -110,20 +129,25 @@ class ObjectPredictionData:
     def from_json_string(data):
         prediction_dict = json.loads(data)
         prediction = ObjectPredictionData()
+        if isinstance(prediction_dict.get("original_prediction_data"), dict):
+            prediction_dict["original_prediction_data"] = \
+                OriginalPredictionData(**prediction_dict["original_prediction_data"])
         set_attributes(prediction, prediction_dict)
         return prediction
 
     def backup_initial_state(self):
         if self.original_prediction_data:
             raise Exception("Cannot backup initial prediction data. Field is not empty.")
-        self.original_prediction_data = copy.deepcopy(self)
+        self.original_prediction_data = OriginalPredictionData(
+            **{attr: getattr(self, attr) for attr in self.prediction_data_attributes})
 
     def update(self, **kwargs):
         allowed_attributes = ObjectPredictionData.prediction_data_attributes
         for key in kwargs.keys():
             if not allowed_attributes.__contains__(key):
                 raise Exception(f"Invalid field '{key}'. Allowed fields: {allowed_attributes}")
-        self.__dict__.update(kwargs)
+        for attr, value in kwargs.items():
+            setattr(self, attr, value)
 
     def validate(self, validation_state: ValidationState, validated_by="N/A"):
         self.validation_state = validation_state
@@ -1,16 +1,22 @@
+import copy
 import json
 import jsonpickle
 import os.path
+import threading
 import pandas as pd
 import numpy as np
 from os.path import isdir
 from shapely import geometry
 from Inclinometer.inclinometer import Inclinometer
 from SurveyEntities.survey_image import *
+from SurveyEntities.survey_statistics import SurveyStatistics
 from os import walk
 from tqdm import tqdm
 from Camera.camera_system import CameraSystem
-from SurveyEntities.transect import Transect, ManualTransectAssignment
+from SurveyEntities.transect import Transect, ManualTransectAssignment, TransectIndex, get_transect_id_array, \
+    apply_transect_id_array, fill_transect_id_gaps
+from Utilities.backup_store import BackupStore
+from Utilities.profiler import profile_stage
 from Utilities.custom_exceptions import SurveyVersionException, ImageDirNotFoundException, SurveyDirNotFoundException
 from config import *
 from Utilities.utilities import *
@@ -53,6 +59,12 @@ class Survey(object):
     def __repr__(self):
         return f"{self.survey_name} (V{self.version})"
 
+    def __getstate__(self):
+        # Statistics are recounted after loading rather than saved with the survey
+        state = self.__dict__.copy()
+        state.pop("_statistics", None)
+        return state
+
     @staticmethod
     def surveys_dir():
         return realpath(join(get_root_path(), SURVEYS_DIR))
@@ -85,6 +97,10 @@ class Survey(object):
     def backup_dir(self):
         return self.get_relative_path(BACKUP_DIR)
 
+    @property
+    def backup_store(self):
+        return BackupStore(self.backup_dir)
+
     @property
     def transect_dir(self):
         return self.get_relative_path(TRANSECT_DIR)
@@ -93,6 +109,14 @@ class Survey(object):
     def results_dir(self):
         return self.get_relative_path(RESULTS_DIR)
 
+    @property
+    def profiles_dir(self):
+        return self.get_relative_path(PROFILES_DIR)
+
+    @property
+    def chip_dir(self):
+        return self.get_relative_path(CHIP_DIR)
+
     @property
     def default_images_dir(self):
         return self.get_relative_path(IMAGE_DIR)
@@ -121,6 +145,12 @@ class Survey(object):
     def camera_system_path(self):
         return self.get_relative_path(CAMERA_SYSTEM_FILE)
 
+    @property
+    def statistics(self) -> SurveyStatistics:
+        if getattr(self, "_statistics", None) is None:
+            self._statistics = SurveyStatistics(self)
+        return self._statistics
+
     @property
     def num_images(self):
         return len(self.images)
@@ -133,6 +163,10 @@ class Survey(object):
     def has_no_images(self):
         return not self.has_images
 
+    @property
+    def images_sorted_by_file_name(self):
+        return sorted(self.images, key=lambda img: img.file_name)
+
     @property
     def on_transect_images(self):
         return [image for image in self.images if image.transect_id is not None]
@@ -185,6 +219,7 @@ class Survey(object):
     def description(self):
         camera_system = str(self.camera_system.name) if self.camera_system else "None"
         inclinometer = str(self.inclinometer) if hasattr(self, "inclinometer") and self.inclinometer else "None"
+        statistics = self.statistics
         return "====================================================\n" + \
                "Survey: ".ljust(30) + self.survey_name + "\n" + \
                "Version: ".ljust(30) + str(self.version) + "\n" + \
@@ -193,14 +228,14 @@ class Survey(object):
                "Project Path: ".ljust(31) + str(self.project_path) + "\n" \
                "Images Dir: ".ljust(31) + self.images_dir + "\n" + \
                "Images: ".ljust(30) + str(self.num_images) + "\n" + \
-               "Processed: ".ljust(30) + str(len(self.processed_images)) + "\n" + \
-               "Unprocessed: ".ljust(30) + str(len(self.unprocessed_images)) + "\n" + \
-               "Excluded: ".ljust(30) + str(len(self.excluded_images)) + "\n" + \
-               "Predictions: ".ljust(30) + f"{len(self.predictions)}" + "\n" + \
-               "  - Validated: ".ljust(30) + f"{len(self.validated_predictions)}" + "\n" + \
-               "  - Validated Correct: ".ljust(30) + f"{len(self.validated_correct_predictions)}" + "\n" + \
-               "  - Validated Incorrect: ".ljust(30) + f"{len(self.validated_incorrect_predictions)}" + "\n" + \
-               "  - Validated Ambiguous: ".ljust(30) + f"{len(self.validated_ambiguous_predictions)}" + "\n" + \
+               "Processed: ".ljust(30) + str(statistics.num_processed_images) + "\n" + \
+               "Unprocessed: ".ljust(30) + str(statistics.num_unprocessed_images) + "\n" + \
+               "Excluded: ".ljust(30) + str(statistics.num_excluded_images) + "\n" + \
+               "Predictions: ".ljust(30) + f"{statistics.num_predictions}" + "\n" + \
+               "  - Validated: ".ljust(30) + f"{statistics.num_validated_predictions}" + "\n" + \
+               "  - Validated Correct: ".ljust(30) + f"{statistics.num_correct_predictions}" + "\n" + \
+               "  - Validated Incorrect: ".ljust(30) + f"{statistics.num_incorrect_predictions}" + "\n" + \
+               "  - Validated Ambiguous: ".ljust(30) + f"{statistics.num_ambiguous_predictions}" + "\n" + \
                "===================================================="
 
     @staticmethod
@@ -298,6 +333,7 @@ class Survey(object):
                                 f"   - Path to folder that contains save file")
 
     @classmethod
+    @profile_stage("load_survey")
     def load(cls, survey, images_dir=None, reload_images=False, skip_upgrade=False, quick_load=False):
         save_file_path, survey_dir = Survey.locate_save_file_path(survey)
         print(f"Loading Survey From: {save_file_path}")
@@ -309,6 +345,7 @@ class Survey(object):
             raise SurveyVersionException(f"Survey version upgrade required. Run helper script "
                                          f"'upgrade_survey_version.py'")
         if quick_load:
+            survey.assign_cameras_to_images()
             return survey
         survey.update_survey_attributes()
         if reload_images:
@@ -325,22 +362,46 @@ class Survey(object):
         print(survey.description)
         return survey
 
+    @profile_stage("save_survey")
     def save(self):
         self.create_survey_directories()
         self.save_camera_system()
         self.write_survey_to_json()
         self.has_unsaved_changes = True
 
+    def create_snapshot(self):
+        """
+        Copy of the survey that can be saved from another thread while the survey keeps being edited. Images,
+        predictions and tags are copied, all other data is shared.
+        """
+        snapshot = copy.copy(self)
+        snapshot.images = [image.create_snapshot() for image in self.images]
+        snapshot.excluded_images = list(self.excluded_images)
+        return snapshot
+
+    def create_subset(self, images: List[SurveyImage]):
+        """
+        Copy of the survey with copies of the given images only and no excluded images. Other data is shared.
+        """
+        subset = copy.copy(self)
+        subset.__dict__.pop("_statistics", None)
+        subset.images = [image.create_snapshot() for image in images]
+        subset.excluded_images = []
+        return subset
+
     def save_camera_system(self):
         if self.camera_system:
             self.camera_system.save(self.camera_system_path)
 
     def write_survey_to_json(self):
         save_file_path = self.save_file_path()
-        with open(save_file_path, 'w') as save_file:
-            data = jsonpickle.encode(self)
+        data = jsonpickle.encode(self)
+        # Write to a temp file first so an interrupted save can't corrupt the existing save file
+        temp_file_path = f"{save_file_path}.{threading.get_ident()}.tmp"
+        with open(temp_file_path, 'w') as save_file:
             json.dump(data, save_file)
-            print(f"Saved project to {save_file_path}")
+        os.replace(temp_file_path, save_file_path)
+        print(f"Saved project to {save_file_path}")
 
     @staticmethod
     def load_images(image_dir):
@@ -363,8 +424,11 @@ class Survey(object):
                     print(f"   - {error}")
             return images
 
+    @profile_stage("load_image")
     def load_image(self, path):
-        self.images.append(SurveyImage(path))
+        image = SurveyImage(path)
+        self.images.append(image)
+        self.statistics.add_image(image)
 
     def load_new_images(self):
         image_paths_in_dir = [os.path.realpath(join(self.images_dir, path)) for path in os.listdir(self.images_dir)]
@@ -388,6 +452,7 @@ class Survey(object):
         add_attr_if_not_exists(self, "has_unsaved_changes", False)
         for image in self.images:
             add_attr_if_not_exists(image, "transect_id")
+            image.metadata.intern_shared_fields()
         for prediction in self.predictions:
             add_attr_if_not_exists(prediction, "overlaps_image")
             add_attr_if_not_exists(prediction, "almost_overlaps_image")
@@ -397,20 +462,46 @@ class Survey(object):
         image.excluded = True
         self.images.remove(image)
         self.excluded_images.append(image)
+        self.statistics.remove_image(image)
+        self.has_unsaved_changes = True
+
+    def add_prediction(self, image: SurveyImage, prediction: ObjectPredictionData):
+        image.predictions.append(prediction)
+        self.statistics.add_prediction(image, prediction)
+        self.has_unsaved_changes = True
+
+    def remove_prediction(self, image: SurveyImage, prediction: ObjectPredictionData):
+        image.predictions.remove(prediction)
+        self.statistics.remove_prediction(image, prediction)
+        self.has_unsaved_changes = True
+
+    def set_prediction_results(self, image: SurveyImage, prediction_result):
+        self.statistics.remove_image(image)
+        image.set_prediction_results(prediction_result)
+        self.statistics.add_image(image)
+        self.has_unsaved_changes = True
+
+    def validate_prediction(self, prediction: ObjectPredictionData, validation_state: ValidationState,
+                            validated_by="N/A"):
+        previous_validation_state = prediction.validation_state
+        prediction.validate(validation_state=validation_state, validated_by=validated_by)
+        self.statistics.update_validation_state(previous_validation_state, validation_state)
         self.has_unsaved_changes = True
 
     def clear_all_validations(self):
         print("Clearing all prediction validations")
-        if len(self.validated_predictions) > 0:
+        if self.statistics.num_validated_predictions > 0:
             [image.reset_validations() for image in self.images]
+            self.statistics.invalidate()
             self.has_unsaved_changes = True
 
     def clear_all_predictions(self, *args, **kwargs):
         print("Clearing all predictions")
-        if len(self.predictions) > 0:
+        if self.statistics.num_predictions > 0:
             for image in self.images:
                 image.predictions.clear()
                 image.has_been_processed = False
+            self.statistics.invalidate()
             self.has_unsaved_changes = True
 
     def rename_image(self, image: SurveyImage, file_name):
@@ -483,22 +574,48 @@ class Survey(object):
                 image.update_file_path(image_path)
 
     def backup(self, backup_name=None):
+        """
+        Creates an incremental backup of the project files (excluding images). Unchanged files are stored once and
+        shared between backups. Backups older than the MAX_SURVEY_BACKUPS most recent are pruned. Backups made before
+        restoring are kept, and don't count towards the limit.
+        :return: Path of the backup manifest
+        """
         self.backup_predictions()
         if not backup_name:
             backup_name = f"backup_({get_datetime_str()})"
-        backup_dir = join(self.backup_dir, backup_name)
-        os.mkdir(backup_dir)
-        files = [self.get_relative_path(file) for file in os.listdir(self.project_path)
-                 if file not in EXCLUDE_FROM_BACKUP]
-        for file in files:
-            if os.path.isdir(file):
-                dir_name = os.path.basename(file)
-                dest = os.path.join(backup_dir, dir_name)
-                shutil.copytree(file, dest)
-            else:
-                shutil.copy2(file, backup_dir)
-        print(f"Completed backup at '{backup_dir}'")
-        return backup_dir
+        manifest_path = self.backup_store.create_backup(self.project_path, backup_name, exclude=EXCLUDE_FROM_BACKUP)
+        print(f"Completed backup at '{manifest_path}'")
+        if self.config.MAX_SURVEY_BACKUPS >= 0:
+            pruned = self.backup_store.prune(keep_last=self.config.MAX_SURVEY_BACKUPS,
+                                             exclude_prefix=RESTORE_BACKUP_PREFIX)
+            if len(pruned) > 0:
+                print(f"Pruned {len(pruned)} old backups")
+        return manifest_path
+
+    def list_backups(self):
+        """
+        :return: Names of the survey's backups, oldest first
+        """
+        return [manifest["name"] for manifest in self.backup_store.list_backups()]
+
+    def restore_backup(self, backup_name=None, backup_current=True):
+        """
+        Restores the project files of a backup. The survey must be reloaded afterwards for restored data to apply.
+        Files created after the backup are kept.
+        :param backup_name: Backup to restore. Defaults to the latest backup
+        :param backup_current: Back up the current project files first, so the restore can be undone
+        :return: Relative paths of the restored files
+        """
+        backups = self.list_backups()
+        if len(backups) == 0:
+            raise Exception(f"No backups found in '{self.backup_dir}'")
+        backup_name = backup_name or backups[-1]
+        if backup_current:
+            self.backup_store.create_backup(self.project_path, f"{RESTORE_BACKUP_PREFIX}({get_datetime_str()})",
+                                            exclude=EXCLUDE_FROM_BACKUP)
+        restored_files = self.backup_store.restore(backup_name, self.project_path)
+        print(f"Restored {len(restored_files)} files from backup '{backup_name}'. Reload the survey to apply changes.")
+        return restored_files
 
     def backup_predictions(self):
         if not self.predictions:
@@ -527,6 +644,7 @@ class Survey(object):
         for prediction in predictions:
             image = self.get_image(prediction.image_name)
             image.predictions.append(prediction)
+        self.statistics.invalidate()
 
     def version_upgrade_required(self, ignore_version_error=False):
         return self.version.major < version.major
@@ -575,6 +693,7 @@ class Survey(object):
         self.loaded_kml_modified_dttm = None
         for image in self.images:
             image.transect_id = None
+        self.statistics.invalidate()
 
     def load_transects(self, force=False):
         files = [file for file in os.listdir(self.transect_dir) if file.endswith(".kml")]
@@ -601,6 +720,7 @@ class Survey(object):
         if force or loaded_kml_transects:
             self.assign_transect_ids_to_images()
         loaded_manual_transects = self.apply_manual_transect_assignments()
+        self.statistics.invalidate()
         if loaded_manual_transects or loaded_manual_transects:
             self.has_unsaved_changes = True
         return self.transects
@@ -612,13 +732,12 @@ class Survey(object):
             print("No loaded transects to apply.")
         else:
             print("Assigning transect id's to images.")
-            survey_bounds = self.get_coordinate_bounds()
-            nearby_transects = [transect for transect in self.transects if transect.intersects_polygon(survey_bounds)]
-            for image in tqdm(self.images):
-                for transect in nearby_transects:
-                    if transect.is_on_transect(coordinates=image.coordinates, bearing=image.direction):
-                        image.transect_id = transect.transect_id
-                        break
+            transect_index = TransectIndex(self.transects)
+            transect_ids = transect_index.get_transect_ids(coordinates=[image.coordinates for image in self.images],
+                                                           bearings=[image.direction for image in self.images])
+            for image, transect_id in zip(self.images, transect_ids):
+                if transect_id is not None:
+                    image.transect_id = transect_id
 
     def apply_manual_transect_assignments(self):
         transect_assignments = ManualTransectAssignment.load(self.transect_assignment_file_path)
@@ -627,48 +746,38 @@ class Survey(object):
             return False
         print(f"Applying {len(transect_assignments)} manual transect assignments from "
               f"'{self.transect_assignment_file_path}'")
-        modified = False
-        images = sorted(self.images, key=lambda img: img.file_name)
+        images = self.images_sorted_by_file_name
+        image_indexes = {}
+        for idx, image in enumerate(images):
+            image_indexes.setdefault(image.file_name, idx)
+            image_indexes.setdefault(get_file_name_without_extension(image.file_name), idx)
+
+        def get_sorted_image_index(image_name):
+            if image_name in image_indexes:
+                return image_indexes[image_name]
+            for image_idx, sorted_image in enumerate(images):
+                if image_name in sorted_image.file_name:
+                    return image_idx
+            raise Exception(f"Could not find image '{image_name}' for manual transect assignment.")
+
+        transect_ids = get_transect_id_array(images)
         for assignment in transect_assignments:
-            start_img, end_img = self.get_image(assignment.start_img), self.get_image(assignment.end_img)
-            start_idx, end_idx = images.index(start_img), images.index(end_img)
-            for image in images[start_idx:end_idx+1]:
-                if image.transect_id != assignment.transect_id:
-                    image.transect_id = assignment.transect_id
-                    modified = True
-        return modified
+            start_idx, end_idx = get_sorted_image_index(assignment.start_img), get_sorted_image_index(assignment.end_img)
+            transect_ids[start_idx:end_idx+1] = np.nan if assignment.transect_id is None else assignment.transect_id
+        return apply_transect_id_array(images, transect_ids)
 
     def fill_off_transect_gaps(self, max_gap=None):
         max_gap = max_gap or self.config.MAX_OFF_TRANSECT_IMAGE_GAP
-        if len([image for image in self.images if image.transect_id is not None]) == 0:
-            return
-        last_on_transect_idx = None
-        off_transect_gap_count = 0
-        images = [image for image in sorted(self.images, key=lambda img: img.file_name) if image.coordinates_valid]
-        for current_idx, image in enumerate(images):
-            # Off-Transect
-            if image.transect_id is None:
-                if last_on_transect_idx is not None:
-                    off_transect_gap_count += 1
-                    if off_transect_gap_count > max_gap:
-                        last_on_transect_idx = None
-                        off_transect_gap_count = 0
-            # On-Transect
-            else:
-                # Image moved from off->on transect
-                if off_transect_gap_count > 0:
-                    last_transect_id = images[last_on_transect_idx].transect_id
-                    if image.transect_id == last_transect_id:
-                        for gap_image in images[last_on_transect_idx:current_idx]:
-                            gap_image.transect_id = last_transect_id
-                off_transect_gap_count = 0
-                last_on_transect_idx = current_idx
+        images = [image for image in self.images_sorted_by_file_name if image.coordinates_valid]
+        transect_ids = get_transect_id_array(images)
+        apply_transect_id_array(images, fill_transect_id_gaps(transect_ids, max_gap))
 
     def validate_transect_altitude_range(self):
-        for image in self.images:
-            if image.altitude_ft < self.config.MIN_ON_TRANSECT_ALTITUDE_FT \
-                    or image.altitude_ft > self.config.MAX_ON_TRANSECT_ALTITUDE_FT:
-                image.transect_id = None
+        altitudes_ft = np.trunc(np.array([image.altitude for image in self.images], dtype=float) * FEET_PER_METER)
+        out_of_range = (altitudes_ft < self.config.MIN_ON_TRANSECT_ALTITUDE_FT) | \
+                       (altitudes_ft > self.config.MAX_ON_TRANSECT_ALTITUDE_FT)
+        for idx in np.flatnonzero(out_of_range):
+            self.images[idx].transect_id = None
 
     def load_inclinometer_data(self, force=False):
         inclinometer_data = []
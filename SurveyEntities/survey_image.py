@@ -15,6 +15,9 @@ from sahi.prediction import PredictionResult
 from GPSPhoto import gpsphoto
 from SurveyEntities.object_prediction_data import ObjectPredictionData, ValidationState
 
+DATETIME_FORMAT = "%Y:%m:%d %H:%M:%S"
+EPOCH = datetime.datetime(1970, 1, 1)
+
 
 class SurveyImage(object):
     """
@@ -24,6 +27,11 @@ class SurveyImage(object):
       - Prediction data
     """
 
+    # __dict__ only holds unknown attributes of images saved by older versions, which aren't saved again
+    __slots__ = ("id", "file_path", "file_name", "latitude", "longitude", "altitude", "metadata", "timestamp",
+                 "direction", "num_otters", "predictions", "camera", "inclinometer_data", "transect_id", "excluded",
+                 "has_been_preprocessed", "has_been_processed", "flags", "notes", "tags", "__dict__")
+
     def __init__(self, file_path, file_name=None, latitude=None, longitude=None, altitude=None, exif_tags=None,
                  datetime=None, direction=0, num_otters=0, predictions=None, has_been_processed=False,
                  has_been_preprocessed=False):
@@ -35,6 +43,7 @@ class SurveyImage(object):
         self.file_name = file_name or os.path.basename(file_path)
         self.latitude, self.longitude, self.altitude = self.load_gps_data()
         self.metadata = ImageMetadata(self.file_path)
+        self.timestamp = self.parse_timestamp()
 
         # Calculated Fields
         self.direction = direction
@@ -59,6 +68,23 @@ class SurveyImage(object):
     def __repr__(self):
         return self.file_name
 
+    def __getstate__(self):
+        # The camera is reassigned from the survey's camera system on load, so it isn't saved with every image
+        return {attr: getattr(self, attr) for attr in SurveyImage.__slots__
+                if attr not in ("camera", "__dict__") and hasattr(self, attr)}
+
+    def __setstate__(self, state):
+        self.camera = None
+        for attr, value in state.items():
+            setattr(self, attr, value)
+
+    def __getattr__(self, name):
+        # Images saved by older versions don't have a parsed timestamp
+        if name == "timestamp":
+            self.timestamp = self.parse_timestamp()
+            return self.timestamp
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
     @classmethod
     @property
     def config(cls) -> SeeOtterConfig:
@@ -74,8 +100,16 @@ class SurveyImage(object):
 
     @property
     def datetime_obj(self):
+        if self.timestamp is None:
+            return None
+        return EPOCH + datetime.timedelta(seconds=self.timestamp)
+
+    def parse_timestamp(self):
+        """
+        :return: Seconds since the epoch of the image datetime, without a time zone like the EXIF datetime
+        """
         try:
-            return datetime.datetime.strptime(self.datetime, "%Y:%m:%d %H:%M:%S")
+            return (datetime.datetime.strptime(self.datetime, DATETIME_FORMAT) - EPOCH).total_seconds()
         except Exception as ex:
             print(f"Error converting datetime string to object: {ex}")
             return None
@@ -126,7 +160,7 @@ class SurveyImage(object):
         if self.camera is None:
             return None
         elif ignore_calibration:
-            return self.camera.orientation
+            return self.camera.orientation.to_orientation()
         elif ignore_inclinometer:
             return self.camera.get_calibrated_orientation(inclinometer_data=None)
         else:
@@ -134,6 +168,7 @@ class SurveyImage(object):
 
     def reload_metadata(self):
         self.metadata = ImageMetadata(self.file_path)
+        self.timestamp = self.parse_timestamp()
 
     def rename_image(self, file_name):
         new_file_path = os.path.normpath(os.path.join(self.parent_dir, file_name))
@@ -147,6 +182,16 @@ class SurveyImage(object):
         self.file_path = file_path
         self.file_name = os.path.basename(file_path)
 
+    def create_snapshot(self):
+        """
+        Copy of the image with its own predictions and tags, which are edited while validating. Other data is shared.
+        """
+        snapshot = copy.copy(self)
+        snapshot.predictions = [copy.copy(prediction) for prediction in self.predictions]
+        snapshot.tags = TagManager(list(self.tags.tags))
+        snapshot.flags = list(self.flags)
+        return snapshot
+
     def reset_validations(self):
         for prediction in self.predictions:
             prediction.reset_validation()
@@ -0,0 +1,134 @@
+from collections import Counter
+from SurveyEntities.object_prediction_data import ObjectPredictionData, ValidationState
+
+
+class SurveyStatistics:
+    """
+    Image and prediction counts of a survey. Counted once, then kept up to date as predictions are validated, added
+    or removed and images are excluded, so info cards don't recount every prediction on refresh. Changes made outside
+    of these updates (e.g. processing commands) require the statistics to be invalidated.
+    """
+
+    def __init__(self, survey):
+        self.survey = survey
+        self.is_stale = True
+        self.processed_image_count = 0
+        self.pre_processed_image_count = 0
+        self.validation_state_counts = Counter()
+        self.transect_image_counts = Counter()
+        self.transect_prediction_counts = Counter()
+
+    def __repr__(self):
+        return f"Survey Statistics: {self.num_images} images, {self.num_predictions} predictions"
+
+    def invalidate(self):
+        self.is_stale = True
+
+    def refresh(self):
+        self.processed_image_count = 0
+        self.pre_processed_image_count = 0
+        self.validation_state_counts = Counter({validation_state: 0 for validation_state in ValidationState})
+        self.transect_image_counts = Counter()
+        self.transect_prediction_counts = Counter()
+        self.is_stale = False
+        for image in self.survey.images:
+            self.add_image(image)
+
+    def refresh_if_stale(self):
+        if self.is_stale:
+            self.refresh()
+
+    @property
+    def num_images(self):
+        return len(self.survey.images)
+
+    @property
+    def num_excluded_images(self):
+        return len(self.survey.excluded_images)
+
+    @property
+    def num_processed_images(self):
+        self.refresh_if_stale()
+        return self.processed_image_count
+
+    @property
+    def num_unprocessed_images(self):
+        return self.num_images - self.num_processed_images
+
+    @property
+    def num_pre_processed_images(self):
+        self.refresh_if_stale()
+        return self.pre_processed_image_count
+
+    @property
+    def num_predictions(self):
+        self.refresh_if_stale()
+        return sum(self.validation_state_counts.values())
+
+    @property
+    def num_unvalidated_predictions(self):
+        return self.get_validation_state_count(ValidationState.UNVALIDATED)
+
+    @property
+    def num_validated_predictions(self):
+        return self.num_predictions - self.num_unvalidated_predictions
+
+    @property
+    def num_correct_predictions(self):
+        return self.get_validation_state_count(ValidationState.CORRECT)
+
+    @property
+    def num_incorrect_predictions(self):
+        return self.get_validation_state_count(ValidationState.INCORRECT)
+
+    @property
+    def num_ambiguous_predictions(self):
+        return self.get_validation_state_count(ValidationState.AMBIGUOUS)
+
+    def get_validation_state_count(self, validation_state: ValidationState):
+        self.refresh_if_stale()
+        return self.validation_state_counts[validation_state]
+
+    def get_transect_image_count(self, transect_id):
+        """
+        :param transect_id: Transect id, or None for off transect images
+        """
+        self.refresh_if_stale()
+        return self.transect_image_counts[transect_id]
+
+    def get_transect_prediction_count(self, transect_id):
+        """
+        :param transect_id: Transect id, or None for predictions in off transect images
+        """
+        self.refresh_if_stale()
+        return self.transect_prediction_counts[transect_id]
+
+    def add_image(self, image, sign=1):
+        """
+        Counts an image and its predictions. A sign of -1 removes them from the counts instead.
+        """
+        if self.is_stale:
+            return
+        self.processed_image_count += sign * bool(image.has_been_processed)
+        self.pre_processed_image_count += sign * bool(image.has_been_preprocessed)
+        self.transect_image_counts[image.transect_id] += sign
+        for prediction in image.predictions:
+            self.add_prediction(image, prediction, sign=sign)
+
+    def remove_image(self, image):
+        self.add_image(image, sign=-1)
+
+    def add_prediction(self, image, prediction: ObjectPredictionData, sign=1):
+        if self.is_stale:
+            return
+        self.validation_state_counts[prediction.validation_state] += sign
+        self.transect_prediction_counts[image.transect_id] += sign
+
+    def remove_prediction(self, image, prediction: ObjectPredictionData):
+        self.add_prediction(image, prediction, sign=-1)
+
+    def update_validation_state(self, previous_validation_state: ValidationState, validation_state: ValidationState):
+        if self.is_stale:
+            return
+        self.validation_state_counts[previous_validation_state] -= 1
+        self.validation_state_counts[validation_state] += 1
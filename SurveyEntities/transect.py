@@ -1,13 +1,15 @@
 from typing import List
 import geopy
 import re
+import numpy as np
+import shapely
 from geopy.distance import geodesic
-from xml.dom.minidom import parse, Node
+from xml.etree import ElementTree
 from shapely.geometry import Polygon, Point
+from shapely.strtree import STRtree
 from Config.see_otter_config import SeeOtterConfig
 from Utilities.utilities import *
 from config import *
-from pykml import parser
 
 
 class TransectLine:
@@ -19,6 +21,19 @@ class TransectLine:
         self.bearing, self.bearing_rev = self.get_transect_line_bearings()
         self.transect_bounds: Polygon = self.get_transect_line_polygon()
 
+    @classmethod
+    def from_geometry(cls, point1, point2, bearing, bearing_rev, transect_bounds):
+        """
+        Creates a transect line from previously calculated bearings and bounds, skipping geodesic calculations.
+        """
+        line = cls.__new__(cls)
+        line.config = SeeOtterConfig.instance()
+        line.point1 = point1
+        line.point2 = point2
+        line.bearing, line.bearing_rev = bearing, bearing_rev
+        line.transect_bounds = Polygon(transect_bounds)
+        return line
+
     def get_transect_line_bearings(self):
         return get_bearing(self.point1, self.point2), get_bearing(self.point2, self.point1)
 
@@ -48,7 +63,7 @@ class Transect:
         self.transect_id = transect_id
         self.length = length
         if isinstance(lines, TransectLine):
-            self.lines = [TransectLine]
+            self.lines = [lines]
         elif isinstance(lines, List):
             self.lines = lines
         else:
@@ -87,141 +102,217 @@ class Transect:
         return False
 
     @staticmethod
-    def parse_coordinates(placemark):
-        coord_elements = placemark.getElementsByTagName("coordinates")
-        coordinates = coord_elements[0].firstChild.nodeValue
-        coordinates = coordinates.split(' ')[0:2]
-        coords1 = coordinates[0].split(',')
-        coords2 = coordinates[1].split(',')
-        lat1 = float(coords1[1])
-        lon1 = float(coords1[0])
-        lat2 = float(coords2[1])
-        lon2 = float(coords2[0])
-        return (lat1, lon1), (lat2, lon2)
-
-    @staticmethod
-    def parse_transect_id(placemark_element):
-        transect_id = -1
-        simple_data = placemark_element.getElementsByTagName("SimpleData")
-        for data in simple_data:
-            if data.getAttribute("name") == "TRANSECT":
-                transect_id = int(data.firstChild.nodeValue)
-        if transect_id == -1:
-            raise Exception("Invalid transect id")
-        return transect_id
-
-    @staticmethod
-    def load_transects_from_kml(path):
-        try:
-            return Transect.load_transects_with_pykml(path)
-        except Exception as ex:
-            print(f"Error loading transects with pykml. Error: {ex}. Attempting manual parsing of kml file.")
-        try:
-            return Transect.load_transects_manual_parsing(path)
-        except Exception as ex:
-            print(f"Error loading transects from kml file. Error Message: {ex}. Attempting load linnea kml.")
+    def load_transects_from_kml(path, use_cache=True, cache_dir=None):
+        """
+        Loads transects from a kml file. Parsed geometry is cached in a shared cache directory keyed by the kml file
+        hash, so loading the same kml file again (or a copy of it for another survey day) skips parsing and geodesic
+        buffering.
+        :param path: Path to kml file
+        :param use_cache: Load/save parsed geometry from/to the transect cache
+        :param cache_dir: Transect cache directory. Defaults to TRANSECT_CACHE_DIR in the root directory
+        :return: List of transects, or None if the kml file could not be loaded
+        """
         try:
-            return Transect.load_linnea_kml(path)
+            file_hash = get_file_hash(path) if use_cache else None
+            if use_cache:
+                transects = TransectGeometryCache.load(file_hash, cache_dir=cache_dir)
+                if transects is not None:
+                    print(f"Loaded {len(transects)} transects from cache "
+                          f"'{TransectGeometryCache.get_cache_path(file_hash, cache_dir=cache_dir)}'")
+                    return transects
+            transects = Transect.parse_kml(path)
+            if use_cache:
+                TransectGeometryCache.save(file_hash, transects, cache_dir=cache_dir)
+            return transects
         except Exception as ex:
-            print(f"Error loading linnea kml: {ex}")
+            print(f"Error loading transects from kml file '{path}'. Error: {ex}")
 
     @staticmethod
-    def load_transects_manual_parsing(path):
-        tree = parse(path)
-        placemarks = tree.getElementsByTagName("Placemark")
+    def parse_kml(path):
+        """
+        Streaming kml parser. Each placemark is parsed and discarded as soon as it has been read. Transect id's are
+        read from a 'trans_id' or 'TRANSECT' SimpleData field, or from the 'trans_id' row of the placemark's html
+        description table.
+        """
         transects = []
-        for placemark in placemarks:
-            coordinates = Transect.parse_coordinates(placemark)
-            transect_id = Transect.parse_transect_id(placemark)
-            transects.append(Transect(transect_id, TransectLine(coordinates[0], coordinates[1])))
+        for _, element in ElementTree.iterparse(path, events=("end",)):
+            if get_xml_tag(element) != "Placemark":
+                continue
+            transect = Transect.parse_kml_placemark(element)
+            if transect is not None:
+                transects.append(transect)
+            element.clear()
         return transects
 
     @staticmethod
-    def load_transects_with_pykml(path):
-        transects = []
-        with open(path) as file:
-            doc = parser.parse(file)
-            root = doc.getroot()
-            placemarks = root.findall('.//{http://www.opengis.net/kml/2.2}Placemark')
-            for p in placemarks:
-                info = p.ExtendedData.SchemaData.findall('.//{http://www.opengis.net/kml/2.2}SimpleData')
-                info = {field.attrib["name"]: field.pyval for field in info}
-                try:
-                    transect_id = int(info["trans_id"])
-                except Exception as ex:
-                    raise Exception(f"Error parsing kml file. Could not find required field matching 'trans_id'. "
-                                    f"Message: {ex}")
-                length_km = float(info["length_km"])
-                line_coords_re = "\s+(-*\d{2,}.\d{2,}),(-*\d{2,}.\d{2,}),0\s+(-*\d{2,}.\d{2,}),(-*\d{2,}.\d{2,}),0\s+"
-                line_strings = p.findall('.//{http://www.opengis.net/kml/2.2}LineString')
-                if len(line_strings) == 0:
-                    print(f"Warning, could not find any lines for transect: {transect_id}")
-                    continue
-                transect_lines = []
-                for line in line_strings:
-                    matches = re.findall(line_coords_re, str(line.coordinates))
-                    points = []
-                    for match in matches:
-                        points.append([(float(match[1])), float(match[0])])
-                        points.append([(float(match[3])), float(match[2])])
-                    for idx in range(0, len(points) - 1):
-                        transect_lines.append(TransectLine(points[idx], points[idx+1]))
-                transects.append(Transect(transect_id=transect_id, lines=transect_lines, length=length_km))
-
-        return transects
+    def parse_kml_placemark(placemark):
+        fields = {}
+        description = ""
+        coordinate_strings = []
+        for element in placemark.iter():
+            tag = get_xml_tag(element)
+            if tag == "SimpleData":
+                fields[element.get("name")] = (element.text or "").strip()
+            elif tag == "description":
+                description = element.text or ""
+            elif tag == "coordinates":
+                coordinate_strings.append(element.text or "")
+
+        transect_id = fields.get("trans_id") or fields.get("TRANSECT") or \
+            Transect.parse_description_transect_id(description)
+        if transect_id is None:
+            print("Warning, skipping placemark with no transect id.")
+            return None
+        transect_id = int(float(transect_id))
+        length_km = fields.get("length_km")
+
+        transect_lines = []
+        for coordinate_string in coordinate_strings:
+            points = Transect.parse_kml_coordinates(coordinate_string)
+            transect_lines += [TransectLine(point1, point2) for point1, point2 in zip(points, points[1:])]
+        if len(transect_lines) == 0:
+            print(f"Warning, could not find any lines for transect: {transect_id}")
+            return None
+        return Transect(transect_id=transect_id, lines=transect_lines, length=float(length_km) if length_km else None)
 
     @staticmethod
-    def load_linnea_kml(path):
+    def parse_kml_coordinates(coordinate_string):
         """
-        This is terrible, I'm sorry
+        Parses a kml coordinates string ("lon,lat[,alt] lon,lat[,alt] ...") into a list of (lat, lon)
         """
+        points = []
+        for coordinate in coordinate_string.split():
+            values = coordinate.split(',')
+            points.append((float(values[1]), float(values[0])))
+        return points
+
+    @staticmethod
+    def parse_description_transect_id(description):
+        match = re.search(r"<td>\s*trans_id\s*</td>\s*<td>\s*(-?\d+)\s*</td>", description)
+        return match.group(1) if match else None
 
-        def parse_coordinates(coordinate_str):
-            coord_re = r"\s+(-\d{3}\.\d+,\d{2}\.\d+,0)"
-            matches = re.findall(coord_re, coordinate_str)
-            if matches:
-                coords = [match.split(",") for match in matches]
-                return coords
 
-        mode = 0
-        coords = ""
-        transects = []
+class TransectGeometryCache:
+    """
+    Binary (npz) files containing the parsed transect geometry (line endpoints, buffered bounds and bearings) of kml
+    files. Files are shared by all surveys and named by the kml file hash and lateral tolerance, so copies of the same
+    kml file in different surveys use the same cache file.
+    """
+
+    VERSION = 1
 
-        with open(path) as file:
-            for line in file.readlines():
-                if line.__contains__(r"<td>trans_id</td>") and mode == 0:
-                    mode = 1
-                    continue
-                if mode == 1:
-                    if line.__contains__(r"<td>"):
-                        trans_id = line.replace(r"<td>", "").replace(r"</td>", "")
-                        mode = 2
-                if line.__contains__(r"<coordinates>") and mode == 2:
-                    mode = 3
-                    continue
-                if mode == 3:
-                    if line.__contains__(r"</coordinates>"):
-                        mode = 4
-                    else:
-                        coords += line
-                if mode == 4:
-                    coords = parse_coordinates(coords)
-                    lines = []
-                    if coords is not None:
-                        for idx, point in enumerate(coords):
-                            if idx == len(coords) - 1:
-                                break
-                            point1 = float(coords[idx][1]), float(coords[idx][0])
-                            point2 = float(coords[idx+1][1]), float(coords[idx+1][0])
-                            lines.append(TransectLine(point1, point2))
-
-                        transect = Transect(int(trans_id), lines=lines)
-                        transects.append(transect)
-                    mode = 0
-                    coords = ""
+    @staticmethod
+    def get_cache_dir(cache_dir=None):
+        return cache_dir or join(get_root_path(), TRANSECT_CACHE_DIR)
+
+    @classmethod
+    def get_cache_path(cls, file_hash, lateral_tolerance=None, cache_dir=None):
+        lateral_tolerance = lateral_tolerance or SeeOtterConfig.instance().TRANSECT_LATERAL_TOLERANCE
+        return join(cls.get_cache_dir(cache_dir), f"{file_hash}_{lateral_tolerance:g}.npz")
+
+    @classmethod
+    def load(cls, file_hash, lateral_tolerance=None, cache_dir=None):
+        lateral_tolerance = lateral_tolerance or SeeOtterConfig.instance().TRANSECT_LATERAL_TOLERANCE
+        path = cls.get_cache_path(file_hash, lateral_tolerance, cache_dir)
+        if not exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data["version"]) != cls.VERSION or str(data["file_hash"]) != file_hash or \
+                        float(data["lateral_tolerance"]) != lateral_tolerance:
+                    return None
+                transect_ids, lengths, line_offsets = data["transect_ids"], data["lengths"], data["line_offsets"]
+                points, bearings, bounds = data["points"], data["bearings"], data["bounds"]
+        except Exception as ex:
+            print(f"Error loading transect cache '{path}'. Error: {ex}")
+            return None
 
+        transects = []
+        for idx, transect_id in enumerate(transect_ids):
+            lines = [TransectLine.from_geometry(tuple(points[line_idx][0]), tuple(points[line_idx][1]),
+                                                *bearings[line_idx], bounds[line_idx])
+                     for line_idx in range(line_offsets[idx], line_offsets[idx + 1])]
+            length = None if np.isnan(lengths[idx]) else float(lengths[idx])
+            transects.append(Transect(int(transect_id), lines=lines, length=length))
         return transects
 
+    @classmethod
+    def save(cls, file_hash, transects: List[Transect], lateral_tolerance=None, cache_dir=None):
+        lateral_tolerance = lateral_tolerance or SeeOtterConfig.instance().TRANSECT_LATERAL_TOLERANCE
+        path = cls.get_cache_path(file_hash, lateral_tolerance, cache_dir)
+        lines = [line for transect in transects for line in transect.lines]
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Surveys processed in parallel can save the same cache file
+            temp_file_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_file_path, 'wb') as file:
+                np.savez(file,
+                         version=cls.VERSION,
+                         file_hash=file_hash,
+                         lateral_tolerance=lateral_tolerance,
+                         transect_ids=np.array([transect.transect_id for transect in transects], dtype=int),
+                         lengths=np.array([np.nan if transect.length is None else transect.length
+                                           for transect in transects], dtype=float),
+                         line_offsets=np.cumsum([0] + [len(transect.lines) for transect in transects]),
+                         points=np.array([[line.point1, line.point2] for line in lines], dtype=float).reshape(-1, 2, 2),
+                         bearings=np.array([[line.bearing, line.bearing_rev] for line in lines],
+                                           dtype=float).reshape(-1, 2),
+                         bounds=np.array([line.get_transect_line_coordinate_bounds() for line in lines],
+                                         dtype=float).reshape(-1, 4, 2))
+            os.replace(temp_file_path, path)
+        except Exception as ex:
+            print(f"Warning, could not save transect cache '{path}'. Error: {ex}")
+
+
+class TransectIndex:
+    """
+    Spatial index (STRtree) over the bounds of every line in a list of transects. Used to find the transect
+    for many locations at once instead of testing each location against every transect line.
+    """
+
+    def __init__(self, transects: List[Transect]):
+        self.transects = transects or []
+        lines = [(transect_idx, line) for transect_idx, transect in enumerate(self.transects)
+                 for line in transect.lines]
+        self.line_transect_idx = np.array([transect_idx for transect_idx, _ in lines], dtype=int)
+        self.line_bearings = np.array([line.bearing for _, line in lines], dtype=float)
+        self.line_bearings_rev = np.array([line.bearing_rev for _, line in lines], dtype=float)
+        self.tree = STRtree([line.transect_bounds for _, line in lines])
+
+    @property
+    def num_lines(self):
+        return len(self.line_transect_idx)
+
+    def get_transect_ids(self, coordinates, bearings, bearing_tolerance=None):
+        """
+        Finds the transect each location is on. Matches Transect.is_on_transect, and when a location is on
+        multiple transects the first one (in transect list order) is used.
+        :param coordinates: List of (latitude, longitude)
+        :param bearings: Direction of travel at each location
+        :param bearing_tolerance: Max difference between direction of travel and transect line bearing
+        :return: List of transect id's (None if location is not on a transect)
+        """
+        bearing_tolerance = bearing_tolerance or SeeOtterConfig.instance().TRANSECT_BEARING_TOLERANCE
+        num_locations = len(coordinates)
+        transect_ids = [None] * num_locations
+        if num_locations == 0 or self.num_lines == 0:
+            return transect_ids
+
+        points = shapely.points(np.asarray(coordinates, dtype=float).reshape(-1, 2))
+        location_idx, line_idx = self.tree.query(points, predicate="within")
+        bearings = np.array([np.nan if bearing is None else bearing for bearing in bearings], dtype=float)
+        location_bearings = bearings[location_idx]
+        on_transect = bearings_within_target_threshold(location_bearings, self.line_bearings[line_idx],
+                                                       bearing_tolerance) | \
+            bearings_within_target_threshold(location_bearings, self.line_bearings_rev[line_idx], bearing_tolerance)
+
+        no_match = len(self.transects)
+        first_transect_idx = np.full(num_locations, no_match)
+        np.minimum.at(first_transect_idx, location_idx[on_transect], self.line_transect_idx[line_idx[on_transect]])
+        for idx in np.flatnonzero(first_transect_idx != no_match):
+            transect_ids[idx] = self.transects[first_transect_idx[idx]].transect_id
+        return transect_ids
+
 
 class TransectRangeAssignment:
 
@@ -231,6 +322,46 @@ class TransectRangeAssignment:
         self.transect_id = None if transect_id == '' else int(transect_id)
 
 
+def get_transect_id_array(images):
+    """
+    Transect id's of images as a float array (NaN for off-transect images)
+    """
+    return np.array([np.nan if image.transect_id is None else image.transect_id for image in images], dtype=float)
+
+
+def apply_transect_id_array(images, transect_ids):
+    """
+    Updates the transect id of each image whose id differs from the given array.
+    :return: Whether any image was modified
+    """
+    current_ids = get_transect_id_array(images)
+    unchanged = (current_ids == transect_ids) | (np.isnan(current_ids) & np.isnan(transect_ids))
+    for idx in np.flatnonzero(~unchanged):
+        images[idx].transect_id = None if np.isnan(transect_ids[idx]) else int(transect_ids[idx])
+    return not unchanged.all()
+
+
+def fill_transect_id_gaps(transect_ids, max_gap):
+    """
+    Fills runs of off-transect (NaN) id's of at most max_gap length that are surrounded by the same transect id.
+    :param transect_ids: Transect id's in image order
+    :param max_gap: Max length of an off-transect run that will be filled
+    :return: Copy of transect id's with gaps filled
+    """
+    transect_ids = np.array(transect_ids, dtype=float)
+    on_transect_idx = np.flatnonzero(~np.isnan(transect_ids))
+    run_start, run_end = on_transect_idx[:-1], on_transect_idx[1:]
+    gap_lengths = run_end - run_start - 1
+    fill = (gap_lengths > 0) & (gap_lengths <= max_gap) & (transect_ids[run_start] == transect_ids[run_end])
+    run_start, gap_lengths = run_start[fill], gap_lengths[fill]
+    if len(run_start) == 0:
+        return transect_ids
+    gap_offsets = np.arange(gap_lengths.sum()) - np.repeat(np.cumsum(gap_lengths) - gap_lengths, gap_lengths)
+    gap_idx = np.repeat(run_start + 1, gap_lengths) + gap_offsets
+    transect_ids[gap_idx] = np.repeat(transect_ids[run_start], gap_lengths)
+    return transect_ids
+
+
 class ManualTransectAssignment:
 
     @staticmethod
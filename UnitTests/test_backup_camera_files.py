@@ -0,0 +1,78 @@
+import json
+import os
+import tempfile
+from os.path import join
+from unittest import TestCase
+
+from backup_camera_files import MultiDestinationCopier, MANIFEST_FILE, CHECKSUM_FILE, hash_file
+
+
+class TestMultiDestinationCopier(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.source = join(self.temp_dir.name, "Camera")
+        os.makedirs(join(self.source, "100MSDCF"))
+        os.makedirs(join(self.source, "Empty"))
+        self.files = {"100MSDCF/DSC0001.JPG": os.urandom(3000), "100MSDCF/DSC0002.JPG": os.urandom(10),
+                      "log.txt": b""}
+        for path, data in self.files.items():
+            with open(join(self.source, path), "wb") as f:
+                f.write(data)
+        self.backup_paths = [join(self.temp_dir.name, f"Drive{idx}", "Camera_backup") for idx in range(2)]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def read(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_run(self):
+        progress = []
+        copier = MultiDestinationCopier(self.source, self.backup_paths, buffer_size=1024,
+                                        progress_callback=lambda *args: progress.append(args))
+        self.assertEqual({}, copier.run())
+        for backup_path in self.backup_paths:
+            for path, data in self.files.items():
+                self.assertEqual(data, self.read(join(backup_path, path)))
+            self.assertTrue(os.path.isdir(join(backup_path, "Empty")))
+            manifest = MultiDestinationCopier.load_manifest(backup_path)
+            self.assertEqual(set(self.files), set(manifest))
+            self.assertEqual(hash_file(join(self.source, "log.txt")), manifest["log.txt"]["sha256"])
+            with open(join(backup_path, CHECKSUM_FILE)) as f:
+                self.assertEqual(3, len(f.readlines()))
+        self.assertEqual(("Copying", 3, 3, 3010, 3010, "log.txt"), progress[2])
+        self.assertEqual("Verifying", progress[-1][0])
+
+    def test_resume(self):
+        MultiDestinationCopier(self.source, self.backup_paths[:1]).run()
+        # Interrupted while copying the last file
+        with open(join(self.backup_paths[0], MANIFEST_FILE), "r") as f:
+            lines = f.readlines()
+        with open(join(self.backup_paths[0], MANIFEST_FILE), "w") as f:
+            f.writelines(lines[:2] + [lines[2][:10]])
+
+        progress = []
+        copier = MultiDestinationCopier(self.source, self.backup_paths, progress_callback=lambda *args: progress.append(args))
+        self.assertEqual({}, copier.run())
+        self.assertEqual(3, len(MultiDestinationCopier.load_manifest(self.backup_paths[0])))
+        with open(join(self.backup_paths[0], MANIFEST_FILE), "r") as f:
+            entries = [json.loads(line) for line in f.readlines()[3:]]
+        self.assertEqual(["log.txt"], [entry["path"] for entry in entries])
+
+    def test_verify_detects_corruption(self):
+        MultiDestinationCopier(self.source, self.backup_paths).run()
+        with open(join(self.backup_paths[1], "100MSDCF", "DSC0002.JPG"), "r+b") as f:
+            f.write(b"x" * 10)
+        failed = MultiDestinationCopier(self.source, self.backup_paths).run()
+        self.assertEqual([self.backup_paths[1]], list(failed))
+        self.assertEqual(["Checksum mismatch: '100MSDCF/DSC0002.JPG'"], failed[self.backup_paths[1]])
+
+    def test_failed_destination(self):
+        with open(join(self.temp_dir.name, "NotADir"), "w") as f:
+            f.write("")
+        backup_paths = [join(self.temp_dir.name, "NotADir", "Camera_backup"), self.backup_paths[0]]
+        failed = MultiDestinationCopier(self.source, backup_paths).run()
+        self.assertEqual([backup_paths[0]], list(failed))
+        self.assertEqual(self.files["log.txt"], self.read(join(self.backup_paths[0], "log.txt")))
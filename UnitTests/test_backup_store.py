@@ -0,0 +1,88 @@
+import os
+import tempfile
+from os.path import join, exists
+from unittest import TestCase
+
+from Utilities.backup_store import BackupStore
+
+
+class TestBackupStore(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.source_dir = join(self.temp_dir.name, "Survey")
+        self.store = BackupStore(join(self.source_dir, "Backup"))
+        os.makedirs(join(self.source_dir, "Results"))
+        os.makedirs(join(self.source_dir, "Annotations"))
+        os.makedirs(join(self.source_dir, "Images"))
+        self.write("savefile.json", "{}")
+        self.write("Results/report.csv", "a,b")
+        self.write("Results/report_copy.csv", "a,b")
+        self.write("Images/0_000_00_000.jpg", "image")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, path, text):
+        with open(join(self.source_dir, path), "w") as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(join(self.source_dir, path), "r") as f:
+            return f.read()
+
+    def count_blobs(self):
+        return sum(len(files) for _, _, files in os.walk(self.store.blobs_dir))
+
+    def backup(self, name):
+        return self.store.create_backup(self.source_dir, name, exclude=["Images", "Backup"])
+
+    def test_create_backup(self):
+        self.backup("backup1")
+        manifest = self.store.load_manifest("backup1")
+        self.assertEqual({"savefile.json", "Results/report.csv", "Results/report_copy.csv"}, set(manifest["files"]))
+        self.assertEqual(["Annotations", "Results"], manifest["dirs"])
+        self.assertEqual(2, self.count_blobs())
+
+    def test_incremental_backup(self):
+        self.backup("backup1")
+        self.write("savefile.json", "{\"images\": []}")
+        self.backup("backup1")
+        self.assertEqual(["backup1", "backup1_2"], [manifest["name"] for manifest in self.store.list_backups()])
+        self.assertEqual(3, self.count_blobs())
+        manifest1, manifest2 = self.store.list_backups()
+        self.assertEqual(manifest1["files"]["Results/report.csv"], manifest2["files"]["Results/report.csv"])
+        self.assertNotEqual(manifest1["files"]["savefile.json"], manifest2["files"]["savefile.json"])
+
+    def test_restore(self):
+        self.backup("backup1")
+        self.write("savefile.json", "changed")
+        os.remove(join(self.source_dir, "Results", "report.csv"))
+        self.write("Results/new_report.csv", "c,d")
+        restored = self.store.restore("backup1", self.source_dir)
+        self.assertEqual(3, len(restored))
+        self.assertEqual("{}", self.read("savefile.json"))
+        self.assertEqual("a,b", self.read("Results/report.csv"))
+        self.assertTrue(exists(join(self.source_dir, "Results", "new_report.csv")))
+        with self.assertRaises(FileNotFoundError):
+            self.store.restore("missing", self.source_dir)
+
+    def test_prune(self):
+        for idx in range(4):
+            self.write("savefile.json", f"version {idx}")
+            self.backup(f"backup{idx}")
+        self.assertEqual(5, self.count_blobs())
+        self.assertEqual(["backup0", "backup1"], self.store.prune(keep_last=2))
+        self.assertEqual(["backup2", "backup3"], [manifest["name"] for manifest in self.store.list_backups()])
+        self.assertEqual(3, self.count_blobs())
+        self.assertEqual(["backup2"], self.store.prune(keep_last=0))
+        self.store.restore("backup3", self.source_dir)
+        self.assertEqual("version 3", self.read("savefile.json"))
+
+    def test_prune_excluded_prefix(self):
+        for name in ["backup0", "before_restore_0", "backup1", "backup2", "before_restore_1"]:
+            self.write("savefile.json", name)
+            self.backup(name)
+        self.assertEqual(["backup0"], self.store.prune(keep_last=2, exclude_prefix="before_restore_"))
+        self.assertEqual(["before_restore_0", "backup1", "backup2", "before_restore_1"],
+                         [manifest["name"] for manifest in self.store.list_backups()])
@@ -0,0 +1,90 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from os.path import join
+from unittest import TestCase
+
+from Processing.batch_runner import find_save_files, run_batch, sort_actions, BatchStatusReport, STATUS_FAILED, \
+    STATUS_COMPLETED
+from config import SURVEY_SAVE_FILE
+
+
+class TestBatchRunner(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.save_files = []
+        for day in ["08_03", "08_04"]:
+            survey_dir = join(self.temp_dir.name, "2022", day)
+            os.makedirs(survey_dir)
+            save_file = join(survey_dir, SURVEY_SAVE_FILE)
+            with open(save_file, "w") as f:
+                f.write("not a survey")
+            self.save_files.append(save_file)
+        self.report_file_path = join(self.temp_dir.name, "batch_status.json")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_find_save_files(self):
+        surveys = [join(self.temp_dir.name, "2022", "*"), self.save_files[0], join(self.temp_dir.name, "missing")]
+        save_files, missing = find_save_files(surveys)
+        self.assertEqual(self.save_files, save_files)
+        self.assertEqual([join(self.temp_dir.name, "missing")], missing)
+
+    def test_sort_actions(self):
+        self.assertEqual(["pre_processing", "results", "clone"], sort_actions(["clone", "pre_processing", "results"]))
+        with self.assertRaises(Exception):
+            sort_actions(["unknown"])
+
+    def test_resume(self):
+        report = BatchStatusReport(self.report_file_path)
+        report.update(self.save_files[0], status=STATUS_COMPLETED, completed_actions=["post_processing", "results"])
+        report.update(self.save_files[1], status=STATUS_FAILED, completed_actions=["post_processing"])
+        report.save()
+
+        report = BatchStatusReport(self.report_file_path).load()
+        self.assertTrue(report.is_completed(self.save_files[0], ["results"]))
+        self.assertFalse(report.is_completed(self.save_files[1], ["post_processing", "results"]))
+        self.assertEqual({STATUS_COMPLETED: 1, STATUS_FAILED: 1}, report.summary())
+
+    def test_run_batch_failed_survey(self):
+        report = run_batch([join(self.temp_dir.name, "2022", "*")], ["results"], self.report_file_path,
+                           max_workers=2)
+        saved_report = BatchStatusReport(self.report_file_path).load()
+        self.assertEqual(report.surveys, saved_report.surveys)
+        for save_file in self.save_files:
+            entry = saved_report.surveys[save_file]
+            self.assertEqual(STATUS_FAILED, entry["status"])
+            self.assertEqual([], entry["completed_actions"])
+            self.assertTrue(entry["error"].startswith("JSONDecodeError"))
+            self.assertTrue(os.path.exists(entry["log_file"]))
+
+    def test_run_batch_resume_keeps_completed_actions(self):
+        report = BatchStatusReport(self.report_file_path)
+        report.update(self.save_files[0], status=STATUS_FAILED, completed_actions=["post_processing"])
+        report.save()
+
+        report = run_batch([self.save_files[0]], ["post_processing", "results"], self.report_file_path, resume=True)
+
+        entry = report.surveys[self.save_files[0]]
+        self.assertEqual(STATUS_FAILED, entry["status"])
+        self.assertEqual(["post_processing"], entry["completed_actions"])
+        with open(entry["log_file"], "r") as f:
+            self.assertIn("Actions: ['results']", f.read())
+
+    def test_command_line(self):
+        # Kivy would reject the batch options if the script didn't disable Kivy's argument parsing
+        repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = {key: value for key, value in os.environ.items() if key not in ("KIVY_NO_ARGS", "KIVY_UNITTEST")}
+        env["PYTHONPATH"] = repo_dir
+
+        process = subprocess.run([sys.executable, join(repo_dir, "HelperScripts", "run_bulk_command.py"),
+                                  "--workers", "2", "--report", self.report_file_path,
+                                  join(self.temp_dir.name, "2022", "*")], env=env, capture_output=True, text=True)
+
+        self.assertNotIn("Kivy Usage", process.stdout)
+        with open(self.report_file_path, "r") as f:
+            self.assertEqual(sorted(json.load(f)["surveys"]), sorted(self.save_files))
@@ -0,0 +1,58 @@
+from unittest import TestCase
+
+from Camera.camera import Camera
+from Camera.camera_calibration import CameraCalibration
+from Camera.camera_orientation import CameraOrientation
+from Inclinometer.inclinometer_record import InclinometerRecord
+
+
+def get_test_camera():
+    return Camera("Test Camera", orientation=CameraCalibration(angle_y=10, hfov=40),
+                  default_calibration=CameraCalibration(angle_x=1, angle_y=2, angle_z=3),
+                  inclinometer_calibration=CameraCalibration(angle_x=-1, angle_y=-2, angle_z=-3))
+
+
+class TestCamera(TestCase):
+
+    def test_get_calibrated_orientation_default_calibration(self):
+        camera = get_test_camera()
+        orientation = camera.get_calibrated_orientation()
+        self.assertEqual(CameraOrientation(angle_x=1, angle_y=12, angle_z=3, hfov=40), orientation)
+
+    def test_get_calibrated_orientation_inclinometer_calibration(self):
+        camera = get_test_camera()
+        inclinometer_data = InclinometerRecord(angle_x=5, angle_y=6, angle_z=7)
+        orientation = camera.get_calibrated_orientation(inclinometer_data)
+        self.assertEqual(CameraOrientation(angle_x=4, angle_y=14, angle_z=-3, hfov=40), orientation)
+
+    def test_get_calibrated_orientation_does_not_modify_camera(self):
+        camera = Camera("Test Camera", orientation=CameraCalibration(angle_y=10, hfov=40))
+        inclinometer_data = InclinometerRecord(angle_x=5, angle_y=6, angle_z=7)
+        for _ in range(3):
+            self.assertEqual([0, 10, 0], camera.get_calibrated_rotation(inclinometer_data))
+        self.assertEqual([0, 10, 0], camera.orientation.get_rotation())
+
+    def test_get_calibrated_orientation_is_memoized(self):
+        camera = get_test_camera()
+        inclinometer_data = InclinometerRecord(angle_x=5, angle_y=6, angle_z=7)
+        self.assertIs(camera.get_calibrated_orientation(inclinometer_data),
+                      camera.get_calibrated_orientation(inclinometer_data))
+
+    def test_get_calibrated_orientation_picks_up_calibration_changes(self):
+        camera = get_test_camera()
+        self.assertEqual(1, camera.get_calibrated_orientation().angle_x)
+        camera.default_calibration.angle_x = 5
+        self.assertEqual(5, camera.get_calibrated_orientation().angle_x)
+        camera.default_calibration = CameraCalibration(angle_x=7)
+        self.assertEqual(7, camera.get_calibrated_orientation().angle_x)
+
+    def test_default_orientation_not_shared(self):
+        camera1 = Camera("Camera 1")
+        camera2 = Camera("Camera 2")
+        camera1.orientation.angle_x = 10
+        self.assertEqual(0, camera2.orientation.angle_x)
+
+    def test_camera_orientation_hashable(self):
+        orientation = CameraOrientation(angle_x=1, angle_y=2, angle_z=3, hfov=40)
+        self.assertEqual(hash(orientation), hash(CameraCalibration(angle_x=1, angle_y=2, angle_z=3, hfov=40)
+                                                 .to_orientation()))
@@ -0,0 +1,83 @@
+import os
+import tempfile
+from unittest import TestCase
+from os.path import join
+
+from PIL import Image, ImageDraw
+
+from SurveyEntities.object_prediction_data import ObjectPredictionData
+from Utilities.chip_store import ChipStore
+
+IMAGE_NAME = "0_000_00_000.jpg"
+
+
+def create_prediction(xmin, ymin, xmax, ymax, image_name=IMAGE_NAME):
+    return ObjectPredictionData(image_name=image_name, xmin=xmin, ymin=ymin, xmax=xmax, ymax=ymax)
+
+
+class TestChipStore(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.chip_dir = join(self.temp_dir.name, "Chips")
+        self.image_path = join(self.temp_dir.name, IMAGE_NAME)
+        image = Image.new("RGB", (1000, 800))
+        ImageDraw.Draw(image).rectangle((100, 100, 139, 139), fill=(255, 0, 0))
+        ImageDraw.Draw(image).rectangle((600, 400, 619, 419), fill=(0, 0, 255))
+        image.save(self.image_path, quality=100)
+        self.predictions = [create_prediction(100, 100, 140, 140), create_prediction(600, 400, 620, 420)]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_get_chip_region(self):
+        chip_store = ChipStore(self.chip_dir, chip_size=64, context_scale=3)
+        self.assertEqual((60, 60, 120), chip_store.get_chip_region(self.predictions[0]))
+        self.assertEqual((578, 378, 64), chip_store.get_chip_region(self.predictions[1]))
+
+    def test_add_image_chips(self):
+        chip_store = ChipStore(self.chip_dir, chip_size=64, context_scale=3)
+        chip_store.add_image_chips(self.image_path, self.predictions)
+        self.assertEqual(2, len(chip_store))
+        self.assertEqual(2 * 64 * 64 * 3, os.path.getsize(chip_store.data_path))
+        red_chip = chip_store.get_chip(self.predictions[0])
+        blue_chip = chip_store.get_chip(self.predictions[1])
+        self.assertEqual((64, 64, 3), red_chip.shape)
+        self.assertGreater(red_chip[32, 32, 0], 200)
+        self.assertLess(red_chip[2, 2, 0], 50)
+        self.assertGreater(blue_chip[32, 32, 2], 200)
+
+    def test_get_chip_box(self):
+        chip_store = ChipStore(self.chip_dir, chip_size=60, context_scale=3)
+        chip_store.add_image_chips(self.image_path, self.predictions)
+        self.assertEqual((20, 20, 40, 40), chip_store.get_chip_box(self.predictions[0]))
+
+    def test_save_and_load(self):
+        chip_store = ChipStore(self.chip_dir, chip_size=64)
+        chip_store.add_image_chips(self.image_path, self.predictions[:1])
+        chip_store.save()
+        loaded_chip_store = ChipStore(self.chip_dir, chip_size=64)
+        self.assertTrue(loaded_chip_store.load())
+        self.assertIn(self.predictions[0], loaded_chip_store)
+        self.assertEqual([self.predictions[1]], loaded_chip_store.get_missing_predictions(self.predictions))
+        self.assertTrue((chip_store.get_chip(self.predictions[0]) ==
+                         loaded_chip_store.get_chip(self.predictions[0])).all())
+        self.assertFalse(ChipStore(self.chip_dir, chip_size=32).load())
+
+    def test_add_image_chips_skips_existing_chips(self):
+        chip_store = ChipStore(self.chip_dir, chip_size=64)
+        chip_store.add_image_chips(self.image_path, self.predictions[:1])
+        chip_store.add_image_chips(self.image_path, self.predictions + [create_prediction(100, 100, 140, 140)])
+        self.assertEqual(2, len(chip_store))
+        self.assertEqual(2 * 64 * 64 * 3, os.path.getsize(chip_store.data_path))
+
+    def test_add_image_chips_drops_unsaved_chips(self):
+        chip_store = ChipStore(self.chip_dir, chip_size=64)
+        chip_store.add_image_chips(self.image_path, self.predictions[:1])
+        chip_store.save()
+        chip_store.add_image_chips(self.image_path, self.predictions[1:])
+        loaded_chip_store = ChipStore(self.chip_dir, chip_size=64)
+        loaded_chip_store.load()
+        loaded_chip_store.add_image_chips(self.image_path, self.predictions[1:])
+        self.assertEqual(2 * 64 * 64 * 3, os.path.getsize(chip_store.data_path))
+        self.assertGreater(loaded_chip_store.get_chip(self.predictions[1])[32, 32, 2], 200)
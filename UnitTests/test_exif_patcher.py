@@ -0,0 +1,76 @@
+import io
+import os
+import struct
+import tempfile
+from unittest import TestCase
+
+import exifread
+import piexif
+from PIL import Image
+
+from Utilities.exif_patcher import ExifTagPatcher, EXIF_TAG_ORIENTATION, EXIF_TAG_DATETIME_ORIGINAL
+from Utilities.image_processing import ImageProcessing
+
+
+class TestExifTagPatcher(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.img_path = os.path.join(self.temp_dir.name, "0_000_00_000.jpg")
+        image = io.BytesIO()
+        Image.new("RGB", (32, 24)).save(image, format="jpeg")
+        exif_bytes = piexif.dump({
+            "0th": {piexif.ImageIFD.Make: "SONY", piexif.ImageIFD.Orientation: 1},
+            "Exif": {piexif.ExifIFD.DateTimeOriginal: "2022:06:05 10:52:10"},
+        })
+        piexif.insert(exif_bytes, image.getvalue(), self.img_path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def get_tags(self):
+        with open(self.img_path, "rb") as f:
+            return exifread.process_file(f, details=False)
+
+    def test_get(self):
+        with ExifTagPatcher(self.img_path) as patcher:
+            self.assertEqual(1, patcher.get(EXIF_TAG_ORIENTATION))
+            self.assertEqual("2022:06:05 10:52:10", patcher.get(EXIF_TAG_DATETIME_ORIGINAL))
+            self.assertIsNone(patcher.get(0x0110))
+
+    def test_set_in_place(self):
+        size = os.path.getsize(self.img_path)
+        with ExifTagPatcher(self.img_path) as patcher:
+            self.assertTrue(patcher.set(EXIF_TAG_ORIENTATION, 3))
+            self.assertTrue(patcher.set(EXIF_TAG_DATETIME_ORIGINAL, "2022:06:05 02:52:10"))
+            self.assertFalse(patcher.set(EXIF_TAG_DATETIME_ORIGINAL, "2022:06:05"))
+            self.assertFalse(patcher.set(0x0110, "ILCE-7RM4"))
+        self.assertEqual(size, os.path.getsize(self.img_path))
+        tags = self.get_tags()
+        self.assertEqual("Rotated 180", tags["Image Orientation"].printable)
+        self.assertEqual("2022:06:05 02:52:10", tags["EXIF DateTimeOriginal"].printable)
+
+    def test_little_endian(self):
+        # TIFF header and an IFD0 with a single orientation entry
+        exif_bytes = b"Exif\x00\x00II" + struct.pack("<HIHHHIHHI", 42, 8, 1, EXIF_TAG_ORIENTATION, 3, 1, 1, 0, 0)
+        Image.new("RGB", (32, 24)).save(self.img_path, exif=exif_bytes)
+        with open(self.img_path, "rb") as f:
+            self.assertIn(b"Exif\x00\x00II", f.read(64))
+        ImageProcessing.rotate_image_to_180(self.img_path)
+        self.assertEqual("Rotated 180", self.get_tags()["Image Orientation"].printable)
+
+    def test_rotate_image(self):
+        size = os.path.getsize(self.img_path)
+        ImageProcessing.rotate_image_to_180(self.img_path)
+        self.assertEqual("Rotated 180", self.get_tags()["Image Orientation"].printable)
+        ImageProcessing.rotate_image_to_180(self.img_path)
+        self.assertEqual("Rotated 180", self.get_tags()["Image Orientation"].printable)
+        ImageProcessing.rotate_image_to_normal(self.img_path)
+        self.assertEqual("Horizontal (normal)", self.get_tags()["Image Orientation"].printable)
+        self.assertEqual(size, os.path.getsize(self.img_path))
+
+    def test_update_utc_image_time(self):
+        ImageProcessing.update_utc_image_time(self.img_path, force=True)
+        self.assertEqual("2022:06:05 02:52:10", self.get_tags()["EXIF DateTimeOriginal"].printable)
+        ImageProcessing.update_utc_image_time(self.img_path, force=True, reverse=True)
+        self.assertEqual("2022:06:05 10:52:10", self.get_tags()["EXIF DateTimeOriginal"].printable)
@@ -0,0 +1,140 @@
+import os
+import shutil
+import tempfile
+from os.path import join
+from unittest import TestCase
+
+from Utilities.file_operations import link_or_copy_file, link_or_copy_files, FILE_MODE_COPY, FILE_MODE_HARDLINK, \
+    FILE_MODE_REFLINK, FileMover
+from Utilities.path_mapping import PathMapping
+
+
+class TestFileOperations(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.src_paths = []
+        for idx in range(5):
+            path = join(self.temp_dir.name, f"src_{idx}.jpg")
+            with open(path, "wb") as f:
+                f.write(os.urandom(1024))
+            self.src_paths.append(path)
+        self.dst_dir = join(self.temp_dir.name, "dst")
+        os.mkdir(self.dst_dir)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def read(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_copy(self):
+        dst = join(self.dst_dir, "copy.jpg")
+        self.assertEqual(FILE_MODE_COPY, link_or_copy_file(self.src_paths[0], dst))
+        self.assertEqual(self.read(self.src_paths[0]), self.read(dst))
+        self.assertFalse(os.path.samefile(self.src_paths[0], dst))
+
+    def test_hardlink(self):
+        self.assertEqual(FILE_MODE_HARDLINK, link_or_copy_file(self.src_paths[0], self.dst_dir, FILE_MODE_HARDLINK))
+        self.assertTrue(os.path.samefile(self.src_paths[0], join(self.dst_dir, "src_0.jpg")))
+
+    def test_reflink_falls_back_to_copy(self):
+        dst = join(self.dst_dir, "reflink.jpg")
+        mode = link_or_copy_file(self.src_paths[0], dst, FILE_MODE_REFLINK)
+        self.assertIn(mode, [FILE_MODE_REFLINK, FILE_MODE_COPY])
+        self.assertEqual(self.read(self.src_paths[0]), self.read(dst))
+        self.assertFalse(os.path.samefile(self.src_paths[0], dst))
+
+    def test_unknown_mode(self):
+        with self.assertRaises(Exception):
+            link_or_copy_file(self.src_paths[0], self.dst_dir, "symlink")
+
+    def test_link_or_copy_files(self):
+        file_pairs = [(path, join(self.dst_dir, os.path.basename(path))) for path in self.src_paths]
+        self.assertEqual({FILE_MODE_HARDLINK: 5}, link_or_copy_files(file_pairs, FILE_MODE_HARDLINK, max_workers=2))
+        self.assertEqual(5, len(os.listdir(self.dst_dir)))
+        with self.assertRaises(FileExistsError):
+            link_or_copy_files(file_pairs, FILE_MODE_HARDLINK)
+
+
+class TestFileMover(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.src_dir = join(self.temp_dir.name, "src")
+        os.mkdir(self.src_dir)
+        self.data = {}
+        for idx in range(5):
+            path = join(self.src_dir, f"DSC{idx}.jpg")
+            self.data[path] = os.urandom(1024)
+            with open(path, "wb") as f:
+                f.write(self.data[path])
+        self.manifest_path = join(self.temp_dir.name, "manifest.csv")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def get_path_mapping(self, dst_dir):
+        return PathMapping({path: join(dst_dir, "Images", f"1_000_00_00{idx}.jpg")
+                            for idx, path in enumerate(self.data)})
+
+    def assert_moved(self, path_mapping):
+        for src, dst in path_mapping.items():
+            self.assertFalse(os.path.exists(src))
+            with open(dst, "rb") as f:
+                self.assertEqual(self.data[src], f.read())
+
+    def test_run_and_rollback(self):
+        path_mapping = self.get_path_mapping(self.temp_dir.name)
+        FileMover(path_mapping, manifest_path=self.manifest_path, max_workers=2).run()
+        self.assert_moved(path_mapping)
+        self.assertEqual(path_mapping, PathMapping.load(self.manifest_path))
+
+        FileMover.load(self.manifest_path).rollback()
+        for src, dst in path_mapping.items():
+            self.assertFalse(os.path.exists(dst))
+            self.assertTrue(os.path.exists(src))
+
+    def test_resume(self):
+        path_mapping = self.get_path_mapping(self.temp_dir.name)
+        path_mapping.save(self.manifest_path)
+        # Interrupted after moving one file and copying another
+        src1, src2 = list(path_mapping)[:2]
+        os.makedirs(join(self.temp_dir.name, "Images"))
+        os.rename(src1, path_mapping[src1])
+        shutil.copy2(src2, path_mapping[src2])
+        FileMover.load(self.manifest_path).run()
+        self.assert_moved(path_mapping)
+
+    def test_manifest_of_another_move(self):
+        path_mapping = self.get_path_mapping(self.temp_dir.name)
+        PathMapping(list(path_mapping.items())[:2]).save(self.manifest_path)
+        with self.assertRaises(FileExistsError):
+            FileMover(path_mapping, manifest_path=self.manifest_path).run()
+        self.assertTrue(all(os.path.exists(path) for path in self.data))
+        self.assertEqual(2, len(PathMapping.load(self.manifest_path)))
+
+    def test_destination_conflict(self):
+        path_mapping = self.get_path_mapping(self.temp_dir.name)
+        os.makedirs(join(self.temp_dir.name, "Images"))
+        with open(list(path_mapping.values())[0], "wb") as f:
+            f.write(b"other image")
+        with self.assertRaises(FileExistsError):
+            FileMover(path_mapping).run()
+
+    def test_duplicate_destination(self):
+        path_mapping = PathMapping({path: join(self.temp_dir.name, "image.jpg") for path in self.data})
+        with self.assertRaises(Exception):
+            FileMover(path_mapping).run()
+        self.assertTrue(all(os.path.exists(path) for path in self.data))
+
+    def test_move_across_devices(self):
+        other_device_dir = "/dev/shm"
+        if not os.path.isdir(other_device_dir) or os.stat(other_device_dir).st_dev == os.stat(self.src_dir).st_dev:
+            self.skipTest("No directory on another device")
+        with tempfile.TemporaryDirectory(dir=other_device_dir) as dst_dir:
+            path_mapping = self.get_path_mapping(dst_dir)
+            FileMover(path_mapping).run()
+            self.assert_moved(path_mapping)
+            self.assertEqual([], [file for file in os.listdir(join(dst_dir, "Images")) if file.endswith(".partial")])
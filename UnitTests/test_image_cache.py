@@ -0,0 +1,95 @@
+import tempfile
+import threading
+from unittest import TestCase
+from os.path import join
+
+from Utilities.image_cache import ImageCache, CachedImage, ImagePrefetcher, BYTES_PER_MB
+from Utilities.image_pyramid import ImagePyramid
+from UnitTests.unit_test_helpers import create_test_image
+
+
+def create_cached_image(path, num_mb=1):
+    return CachedImage(path, (1, 1), bytes(int(num_mb * BYTES_PER_MB)))
+
+
+class TestImageCache(TestCase):
+
+    def test_put_evicts_least_recently_used(self):
+        image_cache = ImageCache(max_memory_mb=3)
+        for path in ["a", "b", "c"]:
+            image_cache.put(create_cached_image(path))
+        image_cache.get("a")
+        image_cache.put(create_cached_image("d"))
+        self.assertEqual(["c", "a", "d"], list(image_cache.images))
+        self.assertEqual(3 * BYTES_PER_MB, image_cache.memory_usage)
+
+    def test_put_replaces_existing(self):
+        image_cache = ImageCache(max_memory_mb=3)
+        image_cache.put(create_cached_image("a"))
+        image_cache.put(create_cached_image("a", num_mb=2))
+        self.assertEqual(1, len(image_cache))
+        self.assertEqual(2 * BYTES_PER_MB, image_cache.memory_usage)
+
+    def test_put_larger_than_budget(self):
+        image_cache = ImageCache(max_memory_mb=1)
+        image_cache.put(create_cached_image("a", num_mb=.5))
+        self.assertFalse(image_cache.put(create_cached_image("b", num_mb=2)))
+        self.assertIn("a", image_cache)
+        self.assertNotIn("b", image_cache)
+
+    def test_set_max_memory_mb(self):
+        image_cache = ImageCache(max_memory_mb=3)
+        for path in ["a", "b", "c"]:
+            image_cache.put(create_cached_image(path))
+        image_cache.set_max_memory_mb(1)
+        self.assertEqual(["c"], list(image_cache.images))
+
+
+class TestImagePrefetcher(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.image_paths = [create_test_image(self.temp_dir.name, resolution=(300, 200), file_name=f"{i}.jpg")
+                            for i in range(3)]
+        self.prefetcher = ImagePrefetcher(ImageCache(max_memory_mb=10))
+
+    def tearDown(self):
+        self.prefetcher.executor.shutdown()
+        self.temp_dir.cleanup()
+
+    def test_prefetch_decodes_images(self):
+        self.prefetcher.prefetch(self.image_paths)
+        self.prefetcher.wait()
+        for path in self.image_paths:
+            cached_image = self.prefetcher.image_cache.get(path)
+            self.assertEqual((300, 200), cached_image.size)
+            self.assertEqual(300 * 200 * 3, cached_image.nbytes)
+
+    def test_prefetch_generates_image_pyramids(self):
+        cache_dir = join(self.temp_dir.name, "ImageCache")
+        self.prefetcher.prefetch(self.image_paths, cache_dir=cache_dir, tile_size=128)
+        self.prefetcher.wait()
+        self.assertEqual(0, len(self.prefetcher.image_cache))
+        for path in self.image_paths:
+            self.assertTrue(ImagePyramid(path, cache_dir, tile_size=128).load())
+
+    def test_prefetch_cancels_queued_prefetches(self):
+        worker_blocked = threading.Event()
+        self.prefetcher.submit("blocking task", worker_blocked.wait, cancelable=False)
+        self.prefetcher.prefetch(self.image_paths[:2])
+        self.prefetcher.prefetch(self.image_paths[1:])
+        worker_blocked.set()
+        self.prefetcher.wait()
+        self.assertNotIn(self.image_paths[0], self.prefetcher.image_cache)
+        self.assertIn(self.image_paths[1], self.prefetcher.image_cache)
+        self.assertIn(self.image_paths[2], self.prefetcher.image_cache)
+
+    def test_load_is_not_cancelled(self):
+        worker_blocked = threading.Event()
+        loaded_images = []
+        self.prefetcher.submit("blocking task", worker_blocked.wait, cancelable=False)
+        self.prefetcher.load(self.image_paths[0], callback=loaded_images.append)
+        self.prefetcher.prefetch(self.image_paths[1:])
+        worker_blocked.set()
+        self.prefetcher.wait()
+        self.assertEqual([self.image_paths[0]], [image.path for image in loaded_images])
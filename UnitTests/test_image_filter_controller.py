@@ -0,0 +1,105 @@
+import random
+from unittest import TestCase
+
+from Controller.image_filter_controller import ImageFilterController
+from SurveyEntities.object_prediction_data import ObjectPredictionData, ValidationState
+from SurveyEntities.survey import Survey
+from SurveyEntities.survey_image import SurveyImage
+
+
+def create_image(file_name, predictions):
+    image = SurveyImage.__new__(SurveyImage)
+    image.file_name = file_name
+    image.predictions = predictions
+    return image
+
+
+def create_survey(num_images=200, seed=0):
+    rand = random.Random(seed)
+    survey = Survey.__new__(Survey)
+    survey.images = []
+    for i in range(num_images):
+        predictions = [ObjectPredictionData(image_name=f"{i}.jpg", score=round(rand.random(), 2),
+                                            validation_state=rand.choice(list(ValidationState)))
+                       for _ in range(rand.choice([0, 0, 1, 2, 5]))]
+        survey.images.append(create_image(f"{i}.jpg", predictions))
+    return survey
+
+
+class TestImageFilterController(TestCase):
+
+    def setUp(self):
+        self.survey = create_survey()
+        self.filter_controller = ImageFilterController(apply_filter_callback=None)
+        self.filter_controller.confidence_cutoff = .4
+        self.filter_controller.show_images_with_no_predictions = False
+
+    def get_expected_filtered_images(self):
+        return [image for image in self.survey.images
+                if self.filter_controller.get_filtered_predictions(image)
+                or self.filter_controller.show_images_with_no_predictions]
+
+    def get_expected_next_image(self, images, image, direction):
+        image_idx = images.index(image)
+        for i in range(1, len(images) + 1):
+            next_image = images[(image_idx + i * direction) % len(images)]
+            if self.filter_controller.get_filtered_predictions(next_image):
+                return next_image
+
+    def test_get_filtered_images(self):
+        for cutoff, show_correct, show_unvalidated, show_no_predictions in \
+                [(.4, True, True, False), (.9, True, True, False), (0, False, True, False), (.5, True, False, True)]:
+            self.filter_controller.confidence_cutoff = cutoff
+            self.filter_controller.show_correct_validations = show_correct
+            self.filter_controller.show_unvalidated_validations = show_unvalidated
+            self.filter_controller.show_images_with_no_predictions = show_no_predictions
+            images = self.filter_controller.get_filtered_images(self.survey)
+            self.assertEqual(self.get_expected_filtered_images(), images)
+            self.assertEqual([prediction for image in images
+                              for prediction in self.filter_controller.get_filtered_predictions(image)],
+                             self.filter_controller.get_all_filtered_predictions())
+
+    def test_get_next_image_with_predictions(self):
+        self.filter_controller.show_images_with_no_predictions = True
+        self.filter_controller.show_correct_validations = False
+        images = self.filter_controller.get_filtered_images(self.survey)
+        for image in images:
+            for direction in [1, -1]:
+                self.assertIs(self.get_expected_next_image(images, image, direction),
+                              self.filter_controller.get_next_image_with_predictions(image, direction=direction))
+
+    def test_get_next_images_with_predictions(self):
+        images = self.filter_controller.get_filtered_images(self.survey)
+        next_images = self.filter_controller.get_next_images_with_predictions(images[-1], count=3)
+        self.assertEqual(images[:3], next_images)
+        previous_images = self.filter_controller.get_next_images_with_predictions(images[0], direction=-1, count=2)
+        self.assertEqual([images[-1], images[-2]], previous_images)
+
+    def test_update_prediction(self):
+        self.filter_controller.show_correct_validations = False
+        images = self.filter_controller.get_filtered_images(self.survey)
+        for prediction in self.filter_controller.get_filtered_predictions(images[1]):
+            prediction.validate(ValidationState.CORRECT)
+            self.filter_controller.update_prediction(prediction)
+        self.assertIs(self.get_expected_next_image(images, images[0], 1),
+                      self.filter_controller.get_next_image_with_predictions(images[0]))
+        self.assertIsNot(images[1], self.filter_controller.get_next_image_with_predictions(images[0]))
+
+    def test_invalidate_filter_index(self):
+        images = self.filter_controller.get_filtered_images(self.survey)
+        empty_image = next(image for image in self.survey.images if not image.predictions)
+        empty_image.predictions.append(ObjectPredictionData(image_name=empty_image.file_name, score=1))
+        self.filter_controller.invalidate_filter_index()
+        self.assertEqual(self.get_expected_filtered_images(), self.filter_controller.get_filtered_images(self.survey))
+        self.assertNotIn(empty_image, images)
+
+    def test_get_closest_filtered_image_index(self):
+        images = self.filter_controller.get_filtered_images(self.survey)
+        for image in self.survey.images:
+            survey_idx = self.survey.images.index(image)
+            expected_idx = max([i for i, filtered_image in enumerate(images)
+                                if self.survey.images.index(filtered_image) <= survey_idx], default=0)
+            self.assertEqual(expected_idx, self.filter_controller.get_closest_filtered_image_index(image))
+        self.assertIsNone(self.filter_controller.get_filtered_image_index(
+            next(image for image in self.survey.images if image not in images)))
+        self.assertEqual(5, self.filter_controller.get_filtered_image_index(images[5]))
@@ -0,0 +1,71 @@
+import os
+import tempfile
+from unittest import TestCase
+from os.path import exists, join
+
+from PIL import Image
+
+from Utilities.image_pyramid import ImagePyramid
+from UnitTests.unit_test_helpers import create_test_image
+
+
+class TestImagePyramid(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = join(self.temp_dir.name, "ImageCache")
+        self.image_path = create_test_image(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_get_num_levels(self):
+        self.assertEqual(1, ImagePyramid.get_num_levels((512, 300), 512))
+        self.assertEqual(2, ImagePyramid.get_num_levels((513, 300), 512))
+        self.assertEqual(6, ImagePyramid.get_num_levels((8688, 5792), 512))
+
+    def test_generate(self):
+        pyramid = ImagePyramid(self.image_path, self.cache_dir, tile_size=256).generate()
+        self.assertEqual((1100, 700), pyramid.resolution)
+        self.assertEqual(4, pyramid.num_levels)
+        self.assertTrue(exists(pyramid.overview_tile_path))
+        self.assertEqual((138, 88), Image.open(pyramid.overview_tile_path).size)
+        for level in range(pyramid.num_levels):
+            for tile in pyramid.get_tiles(level):
+                self.assertTrue(exists(tile.path), msg=f"Missing tile: {tile}")
+        self.assertEqual((256, 256), Image.open(pyramid.get_tile_path(0, 0, 0)).size)
+        self.assertEqual((76, 188), Image.open(pyramid.get_tile_path(0, 4, 2)).size)
+
+    def test_load(self):
+        self.assertFalse(ImagePyramid(self.image_path, self.cache_dir).load())
+        ImagePyramid(self.image_path, self.cache_dir).generate()
+        pyramid = ImagePyramid(self.image_path, self.cache_dir)
+        self.assertTrue(pyramid.load())
+        self.assertEqual((1100, 700), pyramid.resolution)
+        self.assertFalse(ImagePyramid(self.image_path, self.cache_dir, tile_size=128).load())
+
+    def test_load_source_image_changed(self):
+        ImagePyramid(self.image_path, self.cache_dir).generate()
+        create_test_image(self.temp_dir.name, resolution=(600, 400))
+        os.utime(self.image_path, (0, 0))
+        self.assertFalse(ImagePyramid(self.image_path, self.cache_dir).load())
+
+    def test_get_level_for_zoom(self):
+        pyramid = ImagePyramid(self.image_path, self.cache_dir, tile_size=256).generate()
+        self.assertEqual(0, pyramid.get_level_for_zoom(5))
+        self.assertEqual(0, pyramid.get_level_for_zoom(1))
+        self.assertEqual(0, pyramid.get_level_for_zoom(.6))
+        self.assertEqual(1, pyramid.get_level_for_zoom(.5))
+        self.assertEqual(2, pyramid.get_level_for_zoom(.2))
+        self.assertEqual(3, pyramid.get_level_for_zoom(.01))
+
+    def test_get_tiles(self):
+        pyramid = ImagePyramid(self.image_path, self.cache_dir, tile_size=256).generate()
+        self.assertEqual(15, len(pyramid.get_tiles(0)))
+        self.assertEqual(6, len(pyramid.get_tiles(1)))
+        tiles = pyramid.get_tiles(0, region=(300, 100, 600, 200))
+        self.assertEqual([(0, 1, 0), (0, 2, 0)], [tile.key for tile in tiles])
+        tiles = pyramid.get_tiles(1, region=(-100, 600, 5000, 5000))
+        self.assertEqual([(1, 0, 1), (1, 1, 1), (1, 2, 1)], [tile.key for tile in tiles])
+        self.assertEqual((1024, 512, 76, 188), (tiles[2].x, tiles[2].y, tiles[2].width, tiles[2].height))
+        self.assertEqual([], pyramid.get_tiles(0, region=(2000, 0, 3000, 100)))
@@ -0,0 +1,57 @@
+import tempfile
+from os.path import join
+from unittest import TestCase, skipUnless
+
+import piexif
+from PIL import Image
+
+from Utilities.jpeg_cropper import crop_image_border, is_mcu_aligned, get_mcu_size, get_jpegtran_path, \
+    get_lossless_border, CROP_METHOD_LOSSLESS, CROP_METHOD_REENCODE
+
+GPS_IFD = {piexif.GPSIFD.GPSLatitudeRef: "N", piexif.GPSIFD.GPSLatitude: ((37, 1), (30, 1), (0, 1000))}
+
+
+class TestJpegCropper(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.image_path = join(self.temp_dir.name, "image.jpg")
+        self.output_path = join(self.temp_dir.name, "cropped.jpg")
+        exif = piexif.dump({"Exif": {piexif.ExifIFD.DateTimeOriginal: "2023:06:01 10:00:00"}})
+        Image.new("RGB", (400, 300), (200, 100, 0)).save(self.image_path, exif=exif, subsampling=2)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def assert_cropped(self, size):
+        with Image.open(self.output_path) as img:
+            self.assertEqual(img.size, size)
+            exif = piexif.load(img.info["exif"])
+        self.assertEqual(exif["Exif"][piexif.ExifIFD.DateTimeOriginal], b"2023:06:01 10:00:00")
+        self.assertEqual(exif["GPS"][piexif.GPSIFD.GPSLatitude], ((37, 1), (30, 1), (0, 1000)))
+
+    def test_mcu_alignment(self):
+        with Image.open(self.image_path) as img:
+            self.assertEqual(get_mcu_size(img), (16, 16))
+            self.assertTrue(is_mcu_aligned(img, (32, 16, 390, 299)))
+            self.assertFalse(is_mcu_aligned(img, (8, 16, 390, 299)))
+
+    def test_get_lossless_border(self):
+        self.assertEqual(get_lossless_border(125), 128)
+        self.assertEqual(get_lossless_border(100), 96)
+        self.assertEqual(get_lossless_border(0), 0)
+        with Image.open(self.image_path) as img:
+            border = get_lossless_border(125)
+            self.assertTrue(is_mcu_aligned(img, (border, border, 400 - border, 300 - border)))
+
+    def test_crop_reencode(self):
+        # 125 isn't a multiple of the MCU size, so the crop can't be lossless
+        method = crop_image_border(self.image_path, self.output_path, 125, GPS_IFD)
+
+        self.assertEqual(method, CROP_METHOD_REENCODE)
+        self.assert_cropped((150, 50))
+
+    @skipUnless(get_jpegtran_path(), "jpegtran is not installed")
+    def test_crop_lossless(self):
+        self.assertEqual(crop_image_border(self.image_path, self.output_path, 128, GPS_IFD), CROP_METHOD_LOSSLESS)
+        self.assert_cropped((144, 44))
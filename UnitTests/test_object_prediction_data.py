@@ -1,7 +1,11 @@
 import json
+import tracemalloc
 from unittest import TestCase
 
+import jsonpickle
+
 from SurveyEntities.object_prediction_data import ObjectPredictionData, ValidationState
+from Utilities.json_convert import JsonConvert
 
 
 def get_test_object_prediction_data_json_v2():
@@ -40,7 +44,7 @@ class TestObjectPredictionData(TestCase):
         prediction = get_test_object_prediction_data()
         prediction_json = prediction.to_json_string()
         prediction_dict = json.loads(prediction_json)
-        for attr in vars(prediction):
+        for attr in JsonConvert.get_attributes(prediction):
             if attr == "original_prediction_data":
                 continue
             original_val = prediction.__getattribute__(attr)
@@ -53,7 +57,7 @@ class TestObjectPredictionData(TestCase):
         prediction = get_test_object_prediction_data()
         json_string = get_test_object_prediction_data_json_v2()
         loaded_prediction = ObjectPredictionData.from_json_string(json_string)
-        for attr in vars(prediction):
+        for attr in JsonConvert.get_attributes(prediction):
             if attr == "original_prediction_data":
                 continue
             original_val = prediction.__getattribute__(attr)
@@ -89,3 +93,29 @@ class TestObjectPredictionData(TestCase):
             prediction.update(validated_by="Mark")
         with self.assertRaises(Exception) as context:
             prediction.update(image_name="hello.jpeg")
+
+    def test_load_legacy_prediction(self):
+        # Older versions saved only attributes set on the instance, with a deep copy as original prediction data
+        prediction_type = "SurveyEntities.object_prediction_data.ObjectPredictionData"
+        original = {"py/object": prediction_type, "image_name": "test_img", "score": 1, "xmin": 2, "xmax": 3,
+                    "original_prediction_data": None}
+        prediction = jsonpickle.decode(json.dumps({**original, "xmin": 1, "original_prediction_data": original}))
+        self.assertEqual(ValidationState.UNVALIDATED, prediction.validation_state)
+        self.assertEqual("", prediction.validated_by)
+        self.assertEqual(0, prediction.latitude)
+        self.assertTrue(prediction.has_been_modified)
+        with self.assertRaises(AttributeError):
+            _ = prediction.transect_overlap_images
+
+    def test_prediction_memory(self):
+        num_predictions = 10000
+        tracemalloc.start()
+        try:
+            start_memory = tracemalloc.get_traced_memory()[0]
+            predictions = [ObjectPredictionData(image_name="test_img", score=i / num_predictions, xmin=i, xmax=i + 10,
+                                                ymin=i, ymax=i + 10) for i in range(num_predictions)]
+            bytes_per_prediction = (tracemalloc.get_traced_memory()[0] - start_memory) / len(predictions)
+        finally:
+            tracemalloc.stop()
+        self.assertFalse(hasattr(predictions[0], "__dict__"))
+        self.assertLess(bytes_per_prediction, 600)
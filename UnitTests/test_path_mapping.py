@@ -41,6 +41,18 @@ class TestPathMapping(TestCase):
         m.update_path(current_path="Path2", new_path="Path69")
         self.assertEqual("Path69", m["Path1"])
 
+    def test_original_path_index(self):
+        m = PathMapping({"Path1": "Path2"})
+        m["Path1"] = "Path3"
+        m.update({"Path4": "Path5"})
+        self.assertIsNone(m.get_original_path("Path2"))
+        self.assertEqual("Path1", m.get_original_path("Path3"))
+        self.assertEqual("Path4", m.get_original_path("Path5"))
+        del m["Path4"]
+        self.assertIsNone(m.get_original_path("Path5"))
+        with self.assertRaises(Exception):
+            m.update_path(current_path="Path5", new_path="Path6")
+
     def test_save(self):
         csv_path = os.path.join(testing_output_dir, "test_path_mapping_save.csv")
         m = PathMapping()
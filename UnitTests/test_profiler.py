@@ -0,0 +1,88 @@
+import csv
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from Utilities.profiler import Profiler, profile_stage, profile_run, in_current_run
+
+
+@profile_stage("test_stage")
+def profiled_function(value):
+    return value * 2
+
+
+class TestProfiler(TestCase):
+
+    def setUp(self):
+        self.profiler = Profiler.instance()
+        self.profiler.reset()
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_stage(self):
+        with profile_run("Test Run", lambda: None):
+            for _ in range(3):
+                self.assertEqual(4, profiled_function(2))
+            with self.profiler.stage("test_items", items=10):
+                pass
+        stage = self.profiler.stages["test_stage"]
+        self.assertEqual(3, stage.calls)
+        self.assertLessEqual(stage.min, stage.mean)
+        self.assertLessEqual(stage.mean, stage.max)
+        self.assertEqual(10, self.profiler.stages["test_items"].items)
+
+    def test_stage_records_failed_calls(self):
+        with self.assertRaises(ValueError), profile_run("Test Run", lambda: None):
+            with self.profiler.stage("test_error"):
+                raise ValueError()
+        self.assertEqual(1, self.profiler.stages["test_error"].calls)
+
+    def test_profile_run(self):
+        with profile_run("Test Run", lambda: self.temp_dir.name) as profiler:
+            profiled_function(1)
+            profiler.count("images", 5)
+            with profile_run("Inner Run", lambda: self.temp_dir.name):
+                profiled_function(1)
+        self.assertFalse(self.profiler.is_running)
+        files = sorted(os.listdir(self.temp_dir.name))
+        self.assertEqual(2, len(files))
+        self.assertTrue(all(file.startswith("Profile(Test Run)") for file in files))
+
+        with open(os.path.join(self.temp_dir.name, files[1])) as f:
+            report = json.load(f)
+        self.assertEqual("Test Run", report["run"])
+        self.assertEqual({"images": 5}, report["counters"])
+        self.assertEqual(2, report["stages"][0]["calls"])
+        with open(os.path.join(self.temp_dir.name, files[0])) as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(["test_stage"], [row["stage"] for row in rows])
+
+    def test_stages_outside_of_run_are_ignored(self):
+        profiled_function(1)
+        self.profiler.count("images")
+        self.assertEqual({}, self.profiler.stages)
+        self.assertEqual({}, self.profiler.counters)
+
+    def test_stages_on_other_threads(self):
+        with profile_run("Test Run", lambda: None), ThreadPoolExecutor(max_workers=2) as executor:
+            other_thread = threading.Thread(target=profiled_function, args=(1,))
+            other_thread.start()
+            other_thread.join()
+            self.assertNotIn("test_stage", self.profiler.stages)
+            list(executor.map(in_current_run(profiled_function), range(4)))
+            self.assertEqual(4, self.profiler.stages["test_stage"].calls)
+
+    def test_profile_run_with_cprofile(self):
+        with profile_run("Test Run", lambda: self.temp_dir.name, sampler="cprofile"):
+            profiled_function(1)
+        self.assertEqual(1, len([file for file in os.listdir(self.temp_dir.name) if file.endswith(".prof")]))
+
+    def test_profile_run_disabled(self):
+        with profile_run("Test Run", lambda: self.temp_dir.name, enabled=False):
+            profiled_function(1)
+        self.assertEqual([], os.listdir(self.temp_dir.name))
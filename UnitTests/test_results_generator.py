@@ -0,0 +1,135 @@
+import csv
+import os
+import tempfile
+from os.path import join
+from unittest import TestCase
+
+from benchmarks.synthetic_survey import SyntheticSurveyGenerator
+from config import NA, RESULTS_DIR
+from DataGenerators.results_generator import ResultsGenerator
+from Processing.survey_processing import calculate_bearing
+from SurveyEntities.object_prediction_data import ObjectPredictionData, ValidationState
+from SurveyEntities.waldo_survey import WaldoSurvey
+
+
+def create_prediction(image, score, validation_state=ValidationState.CORRECT):
+    return ObjectPredictionData(image_name=image.file_name, score=score, xmin=100, xmax=150, ymin=200, ymax=260,
+                                category_id=0, category_name="o", validation_state=validation_state)
+
+
+def csv_value(value):
+    return '' if value is None else str(value)
+
+
+class TestResultsGenerator(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        generator = SyntheticSurveyGenerator(join(cls.temp_dir.name, "SyntheticSurvey"), num_images=12)
+        generator.generate()
+        cls.survey = WaldoSurvey.new("SyntheticSurvey", survey_path=generator.survey_path, overwrite=True, force=True)
+        calculate_bearing(cls.survey)
+        cls.survey.assign_transect_ids_to_images()
+        cls.results_dir = cls.survey.get_relative_path(RESULTS_DIR)
+
+        # Images with: two predictions (one incorrect), an otter that is also in a newer image, the newer image's
+        # otter, only an incorrect prediction. The remaining images have no predictions.
+        images = sorted(cls.survey.images, key=lambda image: image.datetime)
+        cls.image_two_predictions, cls.image_overlapped, cls.image_newer, cls.image_incorrect = \
+            images[0], images[2], images[6], images[8]
+        cls.image_two_predictions.predictions = [
+            create_prediction(cls.image_two_predictions, .9),
+            create_prediction(cls.image_two_predictions, .8, ValidationState.INCORRECT)]
+        overlapped_prediction = create_prediction(cls.image_overlapped, .7)
+        overlapped_prediction.overlaps_image = cls.image_newer.file_name
+        cls.image_overlapped.predictions = [overlapped_prediction]
+        cls.image_newer.predictions = [create_prediction(cls.image_newer, .6)]
+        cls.image_incorrect.predictions = [create_prediction(cls.image_incorrect, .5, ValidationState.INCORRECT)]
+        for image in cls.survey.images:
+            image.has_been_processed = True
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.temp_dir.cleanup()
+
+    def read_report(self, file_name):
+        with open(join(self.results_dir, file_name), newline='') as csv_file:
+            rows = list(csv.reader(csv_file))
+        return rows[0], [dict(zip(rows[0], row)) for row in rows[1:]]
+
+    def get_expected_rows(self, predictions_by_image):
+        """
+        :return: (ImageID, Confidence) of each expected row, in survey image order
+        """
+        expected = []
+        for image in self.survey.images:
+            if len(image.predictions) == 0:
+                expected.append((str(image.id), NA))
+            else:
+                expected += [(str(image.id), str(score)) for score in predictions_by_image.get(image, [])]
+        return expected
+
+    def assert_prediction_report(self, file_name, predictions_by_image):
+        headers, rows = self.read_report(file_name)
+        self.assertEqual(ResultsGenerator.prediction_report_headers(), headers)
+        self.assertEqual(self.get_expected_rows(predictions_by_image),
+                         [(row['ImageID'], row['Confidence']) for row in rows])
+        for row in rows:
+            image = self.survey.get_image(os.path.basename(row['FilePath']))
+            self.assertEqual(csv_value(image.transect_id), row['TransectID'])
+            self.assertTrue(all(row[header] != NA for header in ResultsGenerator.image_bounds_headers()))
+            if row['Confidence'] == NA:
+                self.assertTrue(all(row[header] == NA for header in ResultsGenerator.prediction_data_headers()))
+            else:
+                self.assertEqual('o', row['PredictionCategoryName'])
+                self.assertEqual(ValidationState.CORRECT.name, row['ValidationState'])
+
+    def assert_all_otters(self, file_name):
+        self.assert_prediction_report(file_name, {self.image_two_predictions: [.9], self.image_overlapped: [.7],
+                                                  self.image_newer: [.6]})
+
+    def assert_distinct_otters(self, file_name):
+        self.assert_prediction_report(file_name, {self.image_two_predictions: [.9], self.image_newer: [.6]})
+
+    def assert_distinct_otter_count_by_image(self, file_name):
+        headers, rows = self.read_report(file_name)
+        self.assertEqual(ResultsGenerator.image_info_headers() + ["OtterCount"] +
+                         ResultsGenerator.image_bounds_headers(), headers)
+        expected_counts = {self.image_two_predictions: 1, self.image_newer: 1}
+        self.assertEqual([(str(image.id), str(expected_counts.get(image, 0))) for image in self.survey.images],
+                         [(row['ImageID'], row['OtterCount']) for row in rows])
+
+    def test_save_single_reports(self):
+        ResultsGenerator(self.survey).all_otters().save('single_all_otters.csv')
+        ResultsGenerator(self.survey).distinct_otters().save('single_distinct_otters.csv')
+        ResultsGenerator(self.survey).distinct_otter_count_by_image().save('single_distinct_otter_count_by_image.csv')
+
+        self.assert_all_otters('single_all_otters.csv')
+        self.assert_distinct_otters('single_distinct_otters.csv')
+        self.assert_distinct_otter_count_by_image('single_distinct_otter_count_by_image.csv')
+
+    def test_save_all_reports(self):
+        results = ResultsGenerator(self.survey)
+        reports = results.all_reports()
+
+        results.save_reports(reports)
+
+        for file_name in reports:
+            self.assertTrue(os.path.exists(join(self.results_dir, file_name)))
+        self.assert_all_otters('results_all_otters.csv')
+        self.assert_distinct_otters('results_distinct_otters.csv')
+        self.assert_distinct_otter_count_by_image('results_distinct_otter_count_by_image.csv')
+        _, overview = self.read_report('survey_overview.csv')
+        self.assertEqual({"Images": "12", "Otters Identified": "3", "Distinct Otter Count": "2"},
+                         {row['Survey Name']: row[self.survey.survey_name] for row in overview
+                          if row['Survey Name'] in ("Images", "Otters Identified", "Distinct Otter Count")})
+
+    def test_single_and_all_reports_match(self):
+        results = ResultsGenerator(self.survey)
+        results.save_reports(results.all_reports())
+        ResultsGenerator(self.survey).all_otters().save('single_all_otters.csv')
+
+        with open(join(self.results_dir, 'results_all_otters.csv'), 'rb') as all_reports_file, \
+                open(join(self.results_dir, 'single_all_otters.csv'), 'rb') as single_report_file:
+            self.assertEqual(all_reports_file.read(), single_report_file.read())
@@ -0,0 +1,54 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from os.path import join
+from unittest import TestCase
+
+from benchmarks.run_benchmarks import BenchmarkRunner, parse_args, compare_results, save_report
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestRunBenchmarks(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_parse_args(self):
+        args = parse_args(["--scales", "100", "1000", "10000", "--repeat", "3"])
+
+        self.assertEqual(args.scales, [100, 1000, 10000])
+        self.assertEqual(args.repeat, 3)
+        self.assertIsNone(args.compare)
+
+    def test_run(self):
+        args = parse_args(["--scales", "8", "--repeat", "1", "--results-dir", join(self.temp_dir.name, "results")])
+        runner = BenchmarkRunner(join(self.temp_dir.name, "work"), repeat=args.repeat, seed=args.seed)
+
+        report = runner.run(args.scales)
+        report_path = save_report(report, args.results_dir)
+
+        benchmarks = {result["benchmark"] for result in report["results"]}
+        self.assertIn("survey_new", benchmarks)
+        self.assertIn("results_reports", benchmarks)
+        self.assertTrue(all(result["scale"] == 8 for result in report["results"]))
+        with open(report_path, "r") as f:
+            self.assertEqual(compare_results(json.load(f), report), [])
+
+    def test_command_line(self):
+        # Kivy would reject the benchmark arguments if the script didn't disable Kivy's argument parsing
+        env = {key: value for key, value in os.environ.items() if key not in ("KIVY_NO_ARGS", "KIVY_UNITTEST")}
+        results_dir = join(self.temp_dir.name, "results")
+
+        process = subprocess.run([sys.executable, "-m", "benchmarks.run_benchmarks", "--scales", "8", "--repeat", "1",
+                                  "--results-dir", results_dir, "--work-dir", join(self.temp_dir.name, "work")],
+                                 cwd=REPO_DIR, env=env, capture_output=True, text=True)
+
+        self.assertEqual(process.returncode, 0, process.stdout + process.stderr)
+        self.assertNotIn("Kivy Usage", process.stdout)
+        self.assertEqual(len(os.listdir(results_dir)), 1)
@@ -0,0 +1,119 @@
+import tempfile
+from os.path import join
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+import piexif
+from PIL import Image
+
+from run_preprocessing import ImageMetadataGUI
+
+KML = """<?xml version="1.0" encoding="UTF-8"?>
+<kml xmlns="http://www.opengis.net/kml/2.2" xmlns:gx="http://www.google.com/kml/ext/2.2">
+<Document>
+<TimeStamp><when>2023-06-01T00:00:00Z</when></TimeStamp>
+<Placemark>
+<name>Track</name>
+<gx:Track>
+<when>2023-06-01T10:00:00.000Z</when>
+<when>2023-06-01T10:00:10.000Z</when>
+<gx:coord>-122.0 37.0 100.0</gx:coord>
+<gx:coord>-122.1 37.1 200.0</gx:coord>
+</gx:Track>
+</Placemark>
+</Document>
+</kml>
+"""
+
+
+class TestGpsTrack(TestCase):
+
+    def setUp(self):
+        self.track = pd.DataFrame({
+            "Longitude": [-122.0, -122.1, -122.2],
+            "Latitude": [37.0, 37.1, 37.2],
+            "Altitude": [100.0, 200.0, 300.0],
+            "Datetime": ["2023-06-01T10:00:10.000Z", "2023-06-01T10:00:00.000Z", "2023-06-01T10:00:20.000Z"],
+        })
+
+    def test_match_gps_track(self):
+        metadata = pd.DataFrame({"DatetimeOriginal": [
+            "2023:06:01 10:00:12", "2023:06:01 10:00:01", "2023:06:01 10:00:05", "bad", "2023:06:01 10:00:23"]})
+
+        matched = ImageMetadataGUI.match_gps_track(metadata, self.track)
+
+        self.assertEqual(list(matched.index), list(metadata.index))
+        np.testing.assert_array_equal(matched["Latitude"].to_numpy(), [37.0, 37.1, np.nan, np.nan, 37.2])
+        np.testing.assert_array_equal(matched["Altitude"].to_numpy(), [100.0, 200.0, np.nan, np.nan, 300.0])
+
+    def test_match_gps_track_interpolate(self):
+        metadata = pd.DataFrame({"DatetimeOriginal": ["2023:06:01 10:00:12", "2023:06:01 10:00:05"]})
+
+        matched = ImageMetadataGUI.match_gps_track(metadata, self.track, interpolate=True)
+
+        np.testing.assert_allclose(matched["Latitude"].to_numpy(), [37.04, np.nan])
+        np.testing.assert_allclose(matched["Altitude"].to_numpy(), [140.0, np.nan])
+
+    def test_kml_to_csv(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            kml_path, csv_path = join(temp_dir, "track.kml"), join(temp_dir, "track.csv")
+            with open(kml_path, "w") as f:
+                f.write(KML)
+
+            ImageMetadataGUI.kml_to_csv(kml_path, csv_path)
+
+            track = pd.read_csv(csv_path)
+            self.assertEqual(list(track.columns), ["Longitude", "Latitude", "Altitude", "Datetime"])
+            self.assertEqual(list(track["Altitude"]), [100.0, 200.0])
+            self.assertEqual(list(track["Datetime"]), ["2023-06-01T10:00:00.000Z", "2023-06-01T10:00:10.000Z"])
+
+
+class TestTransectAssignment(TestCase):
+
+    def setUp(self):
+        self.metadata = pd.DataFrame({
+            "Filepath": [f"D:/Survey/img_{idx}.jpg" for idx in range(6)],
+            "DatetimeOriginal": ["2023:06:01 10:00:05", "2023:06:01 10:00:00", "NA", "2023:06:01 10:00:10",
+                                 "2023:06:01 10:00:20", "2023:06:01 10:00:15"],
+        })
+
+    def test_assign_transects_by_image(self):
+        transect_assignment = pd.DataFrame({
+            "transect_id": ["T1", "T2"],
+            "start_img": ["D:\\Survey\\img_1.jpg", "D:/Survey/img_3.jpg"],
+            "end_img": ["D:/Survey/img_0.jpg", "D:/Survey/img_5.jpg"],
+        })
+
+        transects = ImageMetadataGUI.assign_transects(self.metadata, transect_assignment)
+
+        self.assertEqual(list(transects), ["T1", "T1", "NA", "T2", "NA", "T2"])
+
+    def test_assign_transects_by_time(self):
+        transect_assignment = pd.DataFrame({
+            "transect_id": ["T1", "T2", "T3"],
+            "start_img": ["D:/Survey/missing.jpg", np.nan, np.nan],
+            "end_img": ["D:/Survey/img_0.jpg", np.nan, np.nan],
+            "start_time": ["2023:06:01 10:00:00", "2023:06:01 10:00:05", np.nan],
+            "end_time": ["2023:06:01 10:00:20", "2023-06-01 10:00:10", np.nan],
+        })
+
+        transects = ImageMetadataGUI.assign_transects(self.metadata, transect_assignment)
+
+        # Overlapping transects are assigned in order
+        self.assertEqual(list(transects), ["T2", "T1", "NA", "T2", "T1", "T1"])
+
+    def test_extract_and_assign_transects(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for idx, image_time in enumerate(["2023:06:01 10:00:10", "2023:06:01 10:00:00"]):
+                exif = piexif.dump({"Exif": {piexif.ExifIFD.DateTimeOriginal: image_time}})
+                Image.new("RGB", (8, 8)).save(join(temp_dir, f"img_{idx}.jpg"), exif=exif)
+            transect_file, output_csv = join(temp_dir, "transect_assignment.csv"), join(temp_dir, "final.csv")
+            pd.DataFrame({"transect_id": ["T1"], "start_img": [join(temp_dir, "img_1.jpg")],
+                          "end_img": [join(temp_dir, "img_1.jpg")]}).to_csv(transect_file, index=False)
+
+            ImageMetadataGUI.extract_and_assign_transects(temp_dir, transect_file, output_csv)
+
+            metadata = pd.read_csv(output_csv, keep_default_na=False).set_index("Filepath")
+            self.assertEqual(metadata.loc[join(temp_dir, "img_1.jpg"), "Transect"], "T1")
+            self.assertEqual(metadata.loc[join(temp_dir, "img_0.jpg"), "Transect"], "NA")
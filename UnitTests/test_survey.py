@@ -237,15 +237,19 @@ class TestSurvey(TestCase):
         new_survey.images[0].predictions.append(ObjectPredictionData())
         self.assertEqual(1, len(new_survey.predictions))
         self.assertTrue(exists(new_survey.backup_dir))
-        self.assertEqual(0, len(os.listdir(new_survey.backup_dir)))
-        backup_dir = new_survey.backup()
-        self.assertEqual(1, len(os.listdir(new_survey.backup_dir)))
-        self.assertTrue(exists(join(backup_dir, ANNOTATIONS_DIR)))
-        self.assertTrue(exists(join(backup_dir, TRANSECT_DIR)))
-        self.assertTrue(exists(join(backup_dir, SURVEY_SAVE_FILE)))
-        self.assertTrue(exists(join(backup_dir, PREDICTIONS_BACKUP_FILE)))
+        self.assertEqual(0, len(new_survey.list_backups()))
+        new_survey.backup()
+        self.assertEqual(1, len(new_survey.list_backups()))
+        backed_up_files = new_survey.backup_store.load_manifest(new_survey.list_backups()[0])["files"]
+        self.assertIn(SURVEY_SAVE_FILE, backed_up_files)
+        self.assertIn(PREDICTIONS_BACKUP_FILE, backed_up_files)
         for path in EXCLUDE_FROM_BACKUP:
-            self.assertFalse(exists(join(backup_dir, path)))
+            self.assertFalse(any(file.startswith(path) for file in backed_up_files))
+        with open(new_survey.save_file_path(), "w") as f:
+            f.write("{}")
+        new_survey.restore_backup()
+        self.assertIsNotNone(Survey.load(new_survey.project_path))
+        self.assertEqual(2, len(new_survey.list_backups()))
 
     def test_backup_predictions(self):
         new_survey_name = "_TestSurveyBackupPredictions"
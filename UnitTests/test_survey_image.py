@@ -1,7 +1,11 @@
+import json
 import shutil
 from unittest import TestCase
 from os.path import *
+import jsonpickle
+from SurveyEntities.image_metadata import ImageMetadata
 from SurveyEntities.survey_image import SurveyImage
+from SurveyEntities.tag_manager import TagManager
 from UnitTests.unit_test_helpers import *
 
 
@@ -38,3 +42,42 @@ class TestSurveyImage(TestCase):
         self.assertEqual(survey_image.file_name, new_image_name)
         self.assertTrue(exists(new_image_path))
         self.assertFalse(exists(original_image_path))
+
+    def test_datetime_obj(self):
+        survey_image = create_image_without_file()
+        self.assertEqual("2022-05-03 10:11:12", str(survey_image.datetime_obj))
+        survey_image.metadata.datetime = "Invalid"
+        survey_image.timestamp = survey_image.parse_timestamp()
+        self.assertIsNone(survey_image.datetime_obj)
+
+    def test_camera_is_not_saved(self):
+        survey_image = create_image_without_file()
+        survey_image.camera = "Camera"
+        loaded_image = jsonpickle.decode(jsonpickle.encode(survey_image))
+        self.assertIsNone(loaded_image.camera)
+        self.assertEqual(survey_image.timestamp, loaded_image.timestamp)
+        self.assertEqual(survey_image.file_name, loaded_image.file_name)
+
+    def test_load_legacy_image(self):
+        # Older versions saved images as plain attributes, without a parsed timestamp
+        state = jsonpickle.Pickler().flatten(create_image_without_file())["py/state"]
+        state.pop("timestamp")
+        state["removed_attribute"] = True
+        legacy_image = jsonpickle.decode(json.dumps({"py/object": "SurveyEntities.survey_image.SurveyImage", **state}))
+        self.assertEqual("2022-05-03 10:11:12", str(legacy_image.datetime_obj))
+        self.assertNotIn("removed_attribute", jsonpickle.encode(legacy_image))
+
+
+def create_image_without_file(file_name="0_000_00_000.jpg"):
+    metadata = ImageMetadata.__new__(ImageMetadata)
+    metadata.image_path = file_name
+    metadata.datetime = "2022:05:03 10:11:12"
+    survey_image = SurveyImage.__new__(SurveyImage)
+    survey_image.file_path = file_name
+    survey_image.file_name = file_name
+    survey_image.metadata = metadata
+    survey_image.timestamp = survey_image.parse_timestamp()
+    survey_image.camera = None
+    survey_image.predictions = []
+    survey_image.tags = TagManager()
+    return survey_image
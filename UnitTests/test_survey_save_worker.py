@@ -0,0 +1,97 @@
+import threading
+from unittest import TestCase
+
+from SurveyEntities.image_tag import ImageTag
+from SurveyEntities.object_prediction_data import ObjectPredictionData, ValidationState
+from SurveyEntities.survey import Survey
+from SurveyEntities.survey_image import SurveyImage
+from SurveyEntities.tag_manager import TagManager
+from Utilities.survey_save_worker import SurveySaveWorker
+
+
+class FakeSurvey:
+
+    def __init__(self, fail=False):
+        self.version = 0
+        self.saved_versions = []
+        self.fail = fail
+        self.save_started = threading.Event()
+        self.release_save = threading.Event()
+        self.release_save.set()
+
+    def create_snapshot(self):
+        return FakeSnapshot(self, self.version)
+
+
+class FakeSnapshot:
+
+    def __init__(self, survey, version):
+        self.survey = survey
+        self.version = version
+
+    def save(self):
+        self.survey.save_started.set()
+        self.survey.release_save.wait(5)
+        if self.survey.fail:
+            raise IOError("Disk full")
+        self.survey.saved_versions.append(self.version)
+
+
+class TestSurveySaveWorker(TestCase):
+
+    def setUp(self):
+        self.save_worker = SurveySaveWorker()
+        self.results = []
+
+    def on_save_complete(self, survey, error):
+        self.results.append(error)
+
+    def test_save(self):
+        survey = FakeSurvey()
+        self.assertTrue(self.save_worker.save(survey, callback=self.on_save_complete))
+        self.assertTrue(self.save_worker.wait(5))
+        self.assertEqual([0], survey.saved_versions)
+        self.assertEqual([None], self.results)
+
+    def test_save_requests_are_coalesced(self):
+        survey = FakeSurvey()
+        survey.release_save.clear()
+        self.save_worker.save(survey)
+        survey.save_started.wait(5)
+        for version in range(1, 4):
+            survey.version = version
+            self.assertFalse(self.save_worker.save(survey, callback=self.on_save_complete))
+        survey.release_save.set()
+        self.assertTrue(self.save_worker.wait(5))
+        self.assertEqual([0, 3], survey.saved_versions)
+        # Every coalesced request's callback is called once the latest state is saved
+        self.assertEqual([None, None, None], self.results)
+
+    def test_save_error(self):
+        self.save_worker.save(FakeSurvey(fail=True), callback=self.on_save_complete)
+        self.assertTrue(self.save_worker.wait(5))
+        self.assertIsInstance(self.results[0], IOError)
+
+
+class TestSurveySnapshot(TestCase):
+
+    def test_create_snapshot(self):
+        image = SurveyImage.__new__(SurveyImage)
+        image.file_name = "0_000_00_000.jpg"
+        image.predictions = [ObjectPredictionData(image_name=image.file_name, score=.5)]
+        image.tags = TagManager([ImageTag("Glare")])
+        image.flags = []
+        survey = Survey.__new__(Survey)
+        survey.images = [image]
+        survey.excluded_images = []
+
+        snapshot = survey.create_snapshot()
+        survey.validate_prediction(image.predictions[0], ValidationState.CORRECT)
+        survey.add_prediction(image, ObjectPredictionData(image_name=image.file_name))
+        image.tags.add_tag(ImageTag("Clouds"))
+
+        snapshot_image = snapshot.images[0]
+        self.assertEqual(ValidationState.UNVALIDATED, snapshot_image.predictions[0].validation_state)
+        self.assertEqual(1, len(snapshot_image.predictions))
+        self.assertEqual(["Glare"], [tag.name for tag in snapshot_image.tags.tags])
+        self.assertNotIn("_statistics", snapshot.__dict__)
@@ -0,0 +1,109 @@
+import random
+from types import SimpleNamespace
+from unittest import TestCase
+
+import jsonpickle
+from sahi.prediction import ObjectPrediction
+
+from SurveyEntities.object_prediction_data import ObjectPredictionData, ValidationState
+from SurveyEntities.survey import Survey
+from SurveyEntities.survey_image import SurveyImage
+
+
+def create_image(file_name, predictions, transect_id=None, has_been_processed=True):
+    image = SurveyImage.__new__(SurveyImage)
+    image.file_name = file_name
+    image.predictions = predictions
+    image.transect_id = transect_id
+    image.has_been_processed = has_been_processed
+    image.has_been_preprocessed = True
+    return image
+
+
+def create_survey(num_images=100, seed=0):
+    rand = random.Random(seed)
+    survey = Survey.__new__(Survey)
+    survey.images = []
+    survey.excluded_images = []
+    for i in range(num_images):
+        predictions = [ObjectPredictionData(image_name=f"{i}.jpg", score=rand.random(),
+                                            validation_state=rand.choice(list(ValidationState)))
+                       for _ in range(rand.choice([0, 0, 1, 3]))]
+        survey.images.append(create_image(f"{i}.jpg", predictions, transect_id=rand.choice([None, 1, 2]),
+                                          has_been_processed=rand.random() > .2))
+    return survey
+
+
+class TestSurveyStatistics(TestCase):
+
+    def setUp(self):
+        self.survey = create_survey()
+        self.statistics = self.survey.statistics
+
+    def assert_statistics_match_survey(self):
+        survey, statistics = self.survey, self.statistics
+        self.assertEqual(len(survey.predictions), statistics.num_predictions)
+        self.assertEqual(len(survey.validated_predictions), statistics.num_validated_predictions)
+        self.assertEqual(len(survey.validated_correct_predictions), statistics.num_correct_predictions)
+        self.assertEqual(len(survey.validated_incorrect_predictions), statistics.num_incorrect_predictions)
+        self.assertEqual(len(survey.validated_ambiguous_predictions), statistics.num_ambiguous_predictions)
+        self.assertEqual(len(survey.processed_images), statistics.num_processed_images)
+        self.assertEqual(len(survey.unprocessed_images), statistics.num_unprocessed_images)
+        self.assertEqual(len(survey.excluded_images), statistics.num_excluded_images)
+        for transect_id in [None, 1, 2]:
+            images = [image for image in survey.images if image.transect_id == transect_id]
+            self.assertEqual(len(images), statistics.get_transect_image_count(transect_id))
+            self.assertEqual(sum(len(image.predictions) for image in images),
+                             statistics.get_transect_prediction_count(transect_id))
+
+    def test_statistics(self):
+        self.assert_statistics_match_survey()
+
+    def test_validate_prediction(self):
+        self.statistics.refresh()
+        for prediction in self.survey.predictions[:20]:
+            self.survey.validate_prediction(prediction, ValidationState.CORRECT)
+        self.assertFalse(self.statistics.is_stale)
+        self.assert_statistics_match_survey()
+
+    def test_add_and_remove_prediction(self):
+        self.statistics.refresh()
+        image = self.survey.images[0]
+        prediction = ObjectPredictionData(image_name=image.file_name, score=1)
+        self.survey.add_prediction(image, prediction)
+        self.assert_statistics_match_survey()
+        self.survey.remove_prediction(image, prediction)
+        image = next(image for image in self.survey.images if image.predictions)
+        self.survey.remove_prediction(image, image.predictions[0])
+        self.assertFalse(self.statistics.is_stale)
+        self.assert_statistics_match_survey()
+
+    def test_set_prediction_results(self):
+        self.statistics.refresh()
+        image = self.survey.images[0]
+        object_predictions = [ObjectPrediction(bbox=[0, 0, 10, 10], category_id=0, category_name="o", score=.9)
+                              for _ in range(2)]
+        self.survey.set_prediction_results(image, SimpleNamespace(object_prediction_list=object_predictions))
+        self.assertFalse(self.statistics.is_stale)
+        self.assertEqual(2, len(image.predictions))
+        self.assert_statistics_match_survey()
+
+    def test_exclude_image(self):
+        self.statistics.refresh()
+        for image in [image for image in self.survey.images if image.predictions][:5]:
+            self.survey.exclude_image(image)
+        self.assertFalse(self.statistics.is_stale)
+        self.assert_statistics_match_survey()
+
+    def test_clear_all_validations(self):
+        self.statistics.refresh()
+        self.survey.clear_all_validations()
+        self.assertEqual(0, self.statistics.num_validated_predictions)
+        self.assert_statistics_match_survey()
+
+    def test_statistics_are_not_pickled(self):
+        self.statistics.refresh()
+        survey = jsonpickle.decode(jsonpickle.encode(self.survey))
+        self.assertNotIn("_statistics", survey.__dict__)
+        self.assertIs(survey, survey.statistics.survey)
+        self.assertEqual(self.statistics.num_predictions, survey.statistics.num_predictions)
@@ -0,0 +1,60 @@
+import os
+import tempfile
+from os.path import join
+from unittest import TestCase
+
+from benchmarks.synthetic_survey import SyntheticSurveyGenerator
+from Processing.survey_processing import calculate_bearing, clone_filtered_survey
+from SurveyEntities.object_prediction_data import ValidationState
+from SurveyEntities.survey import Survey
+from SurveyEntities.waldo_survey import WaldoSurvey
+from Utilities.file_operations import FILE_MODE_HARDLINK
+
+
+class TestSyntheticSurveyGenerator(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.generator = SyntheticSurveyGenerator(join(self.temp_dir.name, "SyntheticSurvey"), num_images=40)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_generate(self):
+        track = self.generator.generate()
+        survey = WaldoSurvey.new("SyntheticSurvey", survey_path=self.generator.survey_path, overwrite=True, force=True)
+        self.assertEqual(20, len(track))
+        self.assertEqual(40, survey.num_images)
+        self.assertEqual(20, len(survey.get_images_of_camera_type(survey.camera_system.cameras[0])))
+        for image in survey.images:
+            self.assertAlmostEqual(track[0][1], image.latitude, places=1)
+            self.assertIsNotNone(image.timestamp)
+            self.assertIsNotNone(image.inclinometer_data)
+            self.assertEqual((8688, 5792), image.resolution)
+
+        calculate_bearing(survey)
+        survey.assign_transect_ids_to_images()
+        self.assertGreater(sum(1 for image in survey.images if image.transect_id == 1), 30)
+
+        self.generator.add_predictions(survey, predictions_per_image=2)
+        self.assertGreater(len(survey.predictions), 0)
+        self.assertEqual(len(survey.predictions), survey.statistics.num_predictions)
+
+    def test_clone_filtered_survey_with_hardlinks(self):
+        self.generator.generate()
+        survey = WaldoSurvey.new("SyntheticSurvey", survey_path=self.generator.survey_path, overwrite=True, force=True)
+        self.generator.add_predictions(survey, predictions_per_image=2, validated_ratio=1)
+        num_predictions = len(survey.predictions)
+        clone_path = join(self.temp_dir.name, "SyntheticSurveyClone")
+
+        save_file = clone_filtered_survey(survey, [ValidationState.CORRECT], out_dir_path=clone_path, force=True,
+                                          file_mode=FILE_MODE_HARDLINK)
+        clone = Survey.load(save_file)
+        self.assertGreater(clone.num_images, 0)
+        self.assertTrue(all(prediction.validation_state == ValidationState.CORRECT
+                            for prediction in clone.predictions))
+        self.assertEqual(len(survey.validated_correct_predictions), len(clone.predictions))
+        self.assertTrue(os.path.samefile(survey.get_image(clone.images[0].file_name).file_path,
+                                         clone.images[0].file_path))
+        self.assertEqual(num_predictions, len(survey.predictions))
+        self.assertEqual(40, survey.num_images)
@@ -1,11 +1,49 @@
 from unittest import TestCase
 from os import path
 
-from SurveyEntities.transect import Transect
+import os
+import random
+import shutil
+import tempfile
+from os.path import join
+from xml.etree import ElementTree
+
+import numpy as np
+
+from Config.see_otter_config import SeeOtterConfig
+from SurveyEntities.transect import Transect, TransectIndex, TransectGeometryCache, fill_transect_id_gaps, \
+    apply_transect_id_array, get_transect_id_array
+from Utilities.utilities import get_file_hash
+from config import TRANSECT_DIR
 
 southeast_kml_path = path.abspath("TestingResources/TransectKml/SoutheastTransects2022.kml")
 
 
+class TransectImage:
+    def __init__(self, transect_id=None):
+        self.transect_id = transect_id
+
+
+def fill_transect_id_gaps_reference(transect_ids, max_gap):
+    transect_ids = list(transect_ids)
+    last_on_transect_idx = None
+    off_transect_gap_count = 0
+    for current_idx, transect_id in enumerate(transect_ids):
+        if transect_id is None:
+            if last_on_transect_idx is not None:
+                off_transect_gap_count += 1
+                if off_transect_gap_count > max_gap:
+                    last_on_transect_idx = None
+                    off_transect_gap_count = 0
+        else:
+            if off_transect_gap_count > 0 and transect_id == transect_ids[last_on_transect_idx]:
+                for gap_idx in range(last_on_transect_idx, current_idx):
+                    transect_ids[gap_idx] = transect_id
+            off_transect_gap_count = 0
+            last_on_transect_idx = current_idx
+    return transect_ids
+
+
 class TestTransect(TestCase):
 
     def test_load_transects_from_kml(self):
@@ -14,6 +52,74 @@ class TestTransect(TestCase):
         self.assertEqual(21, transects[21].transect_id)
         self.assertEqual(0.8, transects[25].length)
 
+    def test_load_transects_from_kml_cache(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_dir = join(temp_dir, "TransectCache")
+            kml_path = shutil.copy(southeast_kml_path, temp_dir)
+            transects = Transect.load_transects_from_kml(kml_path, cache_dir=cache_dir)
+            self.assertTrue(os.path.exists(TransectGeometryCache.get_cache_path(get_file_hash(kml_path),
+                                                                                cache_dir=cache_dir)))
+            cached_transects = Transect.load_transects_from_kml(kml_path, cache_dir=cache_dir)
+            self.assertEqual(len(transects), len(cached_transects))
+            for transect, cached_transect in zip(transects, cached_transects):
+                self.assertEqual(transect.transect_id, cached_transect.transect_id)
+                self.assertEqual(transect.length, cached_transect.length)
+                self.assertEqual(len(transect.lines), len(cached_transect.lines))
+                for line, cached_line in zip(transect.lines, cached_transect.lines):
+                    self.assertEqual(line.point1, cached_line.point1)
+                    self.assertEqual(line.point2, cached_line.point2)
+                    self.assertAlmostEqual(line.bearing, cached_line.bearing)
+                    self.assertTrue(line.transect_bounds.equals(cached_line.transect_bounds))
+
+    def test_load_transects_from_kml_cache_shared_by_copies(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_dir = join(temp_dir, "TransectCache")
+            kml_paths = []
+            for day in ["08_03", "08_04"]:
+                transect_dir = join(temp_dir, day, TRANSECT_DIR)
+                os.makedirs(transect_dir)
+                kml_paths.append(shutil.copy(southeast_kml_path, transect_dir))
+            Transect.load_transects_from_kml(kml_paths[0], cache_dir=cache_dir)
+            cache_files = os.listdir(cache_dir)
+            cache_mtime = os.path.getmtime(join(cache_dir, cache_files[0]))
+
+            # Parsing the copy would save the cache file again
+            transects = Transect.load_transects_from_kml(kml_paths[1], cache_dir=cache_dir)
+            self.assertEqual(789, len(transects))
+            self.assertEqual(cache_files, os.listdir(cache_dir))
+            self.assertEqual(f"{get_file_hash(southeast_kml_path)}_"
+                             f"{SeeOtterConfig.instance().TRANSECT_LATERAL_TOLERANCE:g}.npz", cache_files[0])
+            self.assertEqual(cache_mtime, os.path.getmtime(join(cache_dir, cache_files[0])))
+            self.assertFalse(any(file.endswith(".npz") for file in os.listdir(os.path.dirname(kml_paths[1]))))
+
+    def test_load_transects_from_kml_cache_keyed_by_lateral_tolerance(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_dir = join(temp_dir, "TransectCache")
+            Transect.load_transects_from_kml(southeast_kml_path, cache_dir=cache_dir)
+            file_hash = get_file_hash(southeast_kml_path)
+            self.assertIsNotNone(TransectGeometryCache.load(file_hash, cache_dir=cache_dir))
+            self.assertIsNone(TransectGeometryCache.load(file_hash, lateral_tolerance=50, cache_dir=cache_dir))
+
+    def test_load_transects_from_kml_cache_invalidated_on_change(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_dir = join(temp_dir, "TransectCache")
+            kml_path = shutil.copy(southeast_kml_path, temp_dir)
+            Transect.load_transects_from_kml(kml_path, cache_dir=cache_dir)
+            with open(kml_path, 'a') as kml_file:
+                kml_file.write("\n")
+            self.assertIsNone(TransectGeometryCache.load(get_file_hash(kml_path), cache_dir=cache_dir))
+            self.assertEqual(789, len(Transect.load_transects_from_kml(kml_path, cache_dir=cache_dir)))
+
+    def test_parse_kml_placemark_description_transect_id(self):
+        placemark = ElementTree.fromstring(
+            "<Placemark><description><![CDATA[<table><tr><td>trans_id</td>\n<td>42</td></tr></table>]]>"
+            "</description><LineString><coordinates>\n -136.1,58.1,0 -136.2,58.2,0 -136.3,58.3,0\n"
+            "</coordinates></LineString></Placemark>")
+        transect = Transect.parse_kml_placemark(placemark)
+        self.assertEqual(42, transect.transect_id)
+        self.assertEqual(2, len(transect.lines))
+        self.assertEqual((58.2, -136.2), transect.lines[1].point1)
+
     def test_is_point_within_transect_bounds(self):
         transects = Transect.load_transects_from_kml(southeast_kml_path)
         transect11 = transects[11]
@@ -41,3 +147,68 @@ class TestTransect(TestCase):
         self.assertTrue(transect680.is_on_transect((59.031242, -138.231701), 130))
         self.assertFalse(transect680.is_on_transect((59.031242, -138.231701), -10))
         self.assertFalse(transect680.is_on_transect((59.031242, -138.231701), 70))
+
+    def test_transect_index_get_transect_ids(self):
+        transects = Transect.load_transects_from_kml(southeast_kml_path)
+        transect_index = TransectIndex(transects)
+        coordinates = [(58.355001, -136.498924), (58.355001, -136.498924), (58.29128, -135.91668),
+                       (59.031242, -138.231701), (59.031242, -138.231701), (59.031242, -137.231701)]
+        bearings = [52.16946455555716, -30.16946455555716, None, 130, 70, -50]
+        transect_ids = transect_index.get_transect_ids(coordinates, bearings)
+        self.assertEqual(transects[11].transect_id, transect_ids[0])
+        self.assertIsNone(transect_ids[1])
+        self.assertIsNone(transect_ids[2])
+        self.assertEqual(transects[680].transect_id, transect_ids[3])
+        self.assertIsNone(transect_ids[4])
+        self.assertIsNone(transect_ids[5])
+
+    def test_transect_index_matches_is_on_transect(self):
+        transects = Transect.load_transects_from_kml(southeast_kml_path)
+        transect_index = TransectIndex(transects)
+        random.seed(0)
+        coordinates, bearings = [], []
+        for transect in transects[::20]:
+            for line in transect.lines[:3]:
+                lat = (line.point1[0] + line.point2[0]) / 2 + random.uniform(-.002, .002)
+                lon = (line.point1[1] + line.point2[1]) / 2 + random.uniform(-.004, .004)
+                coordinates.append((lat, lon))
+                bearings.append(line.bearing + random.uniform(-40, 40))
+        expected = []
+        for location, bearing in zip(coordinates, bearings):
+            matches = [t.transect_id for t in transects if t.is_on_transect(coordinates=location, bearing=bearing)]
+            expected.append(matches[0] if matches else None)
+        self.assertEqual(expected, transect_index.get_transect_ids(coordinates, bearings))
+        self.assertTrue(any(transect_id is not None for transect_id in expected))
+
+    def test_fill_transect_id_gaps(self):
+        images = [TransectImage() for _ in range(10)]
+        images[1].transect_id = 1
+        images[4].transect_id = 2
+        images[5].transect_id = 3
+        images[8].transect_id = 3
+        apply_transect_id_array(images, fill_transect_id_gaps(get_transect_id_array(images), max_gap=30))
+        self.assertEqual([None, 1, None, None, 2, 3, 3, 3, 3, None], [image.transect_id for image in images])
+
+        transect_ids = [1] + [None] * 8 + [1]
+        self.assertEqual(transect_ids, apply_filled_ids(transect_ids, max_gap=7))
+        self.assertEqual([1] * 10, apply_filled_ids(transect_ids, max_gap=8))
+
+    def test_fill_transect_id_gaps_matches_reference(self):
+        random.seed(0)
+        transect_ids = [random.choice([None, None, None, 1, 2, 3]) for _ in range(2000)]
+        for max_gap in [0, 1, 2, 5, 30]:
+            self.assertEqual(fill_transect_id_gaps_reference(transect_ids, max_gap),
+                             apply_filled_ids(transect_ids, max_gap))
+
+    def test_apply_transect_id_array(self):
+        images = [TransectImage(1), TransectImage(None), TransectImage(2)]
+        self.assertFalse(apply_transect_id_array(images, np.array([1, np.nan, 2])))
+        self.assertTrue(apply_transect_id_array(images, np.array([np.nan, 3, 2])))
+        self.assertEqual([None, 3, 2], [image.transect_id for image in images])
+        self.assertIsInstance(images[1].transect_id, int)
+
+
+def apply_filled_ids(transect_ids, max_gap):
+    images = [TransectImage(transect_id) for transect_id in transect_ids]
+    apply_transect_id_array(images, fill_transect_id_gaps(get_transect_id_array(images), max_gap))
+    return [image.transect_id for image in images]
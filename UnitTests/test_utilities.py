@@ -65,6 +65,16 @@ class Test(TestCase):
         self.assertFalse(bearing_within_target_threshold(-170, -175, 4))
         self.assertFalse(bearing_within_target_threshold(170, 175, 4))
 
+    def test_bearings_within_target_threshold(self):
+        cases = [(0, 0, 0), (-180, 180, 0), (180, -180, 0), (90, 0, 90), (-90, 0, 90), (-170, 170, 20),
+                 (170, -170, 20), (-170, -175, 10), (170, 175, 10), (1, 0, 0), (0, 11, 10), (-179, 180, 0),
+                 (90, 0, 89), (-170, 170, 19), (170, 175, 4)]
+        for threshold in [0, 4, 10, 19, 20, 89, 90]:
+            bearings = [bearing for bearing, _, _ in cases]
+            targets = [target for _, target, _ in cases]
+            expected = [bearing_within_target_threshold(bearing, target, threshold) for bearing, target, _ in cases]
+            self.assertEqual(expected, list(bearings_within_target_threshold(bearings, targets, threshold)))
+
     def test_index_out_of_range(self):
         self.assertTrue(index_out_of_range(-1, [1, 2, 3]))
         self.assertFalse(index_out_of_range(0, [1, 2, 3]))
@@ -1,3 +1,4 @@
+import os
 from unittest import TestCase
 
 from UnitTests.unit_test_helpers import test_image_paths, testing_output_dir
@@ -9,6 +10,13 @@ class TestWaldoSurveyConverter(TestCase):
     def test_get_waldo_directories(self):
         pass
 
+    def test_get_image_pairs(self):
+        paths = [os.path.join("A", "1_000_00_000.jpg"), os.path.join("A", "0_000_00_000.jpg"),
+                 os.path.join("A", "0_000_00_001.jpg"), os.path.join("B", "1_000_00_000.jpg"),
+                 os.path.join("A", "1_999_00_0002.jpg"), os.path.join("A", "notes.jpg")]
+        pairs = WaldoSurveyConverter.get_image_pairs(paths)
+        self.assertEqual([(paths[0], paths[1]), (None, paths[2]), (paths[3], None), (paths[4], None)], pairs)
+
     def test_get_path_mapping(self):
         img_paths = [[test_image_paths[1], test_image_paths[6]], [test_image_paths[2], test_image_paths[7]]]
         mapping = WaldoSurveyConverter.get_path_mapping(paths=img_paths, image_out_dir=testing_output_dir)
@@ -2,6 +2,8 @@ import os
 import shutil
 from unittest import TestCase
 
+from PIL import Image
+
 from SurveyEntities.waldo_survey import WaldoSurvey
 from Utilities.utilities import rmdir_if_exists
 from os.path import abspath, join, realpath
@@ -55,3 +57,13 @@ def delete_all_test_surveys():
     for survey_path in Survey.get_all_survey_dirs():
         if os.path.dirname(survey_path).startswith('_'):
             shutil.rmtree(survey_path)
+
+
+def create_test_image(directory, resolution=(1100, 700), file_name="0_000_00_000.jpg"):
+    path = join(directory, file_name)
+    image = Image.new("RGB", resolution)
+    for x in range(0, resolution[0], 50):
+        for y in range(0, resolution[1], 50):
+            image.putpixel((x, y), (255, 0, 0))
+    image.save(path)
+    return path
@@ -1,12 +1,11 @@
-import copy
 import os
 import re
 import shutil
 from glob import glob
 from tqdm import tqdm
 from os.path import realpath, join, exists
-from Utilities.WaldoUtilities.waldo_image_name import WaldoImageName
 from Utilities.WaldoUtilities.waldo_survey_path import WaldoSurveyPath
+from Utilities.file_operations import FileMover
 from Utilities.path_mapping import PathMapping
 from Utilities.utilities import prompt_user
 from Utilities.WaldoUtilities.waldo_utilities import is_waldo_file_name
@@ -41,40 +40,35 @@ class WaldoSurveyConverter:
 
     @staticmethod
     def get_image_pairs(image_paths):
+        """
+        Pairs left and right camera images taken at the same time, keyed by their directory and name without the
+        camera id. The paths come from a directory listing, so pairs are built without checking files exist.
+        :return: (left path, right path) tuples in order of the first image of each pair. Missing images are None.
+        """
+        image_regex = re.compile(WALDO_IMAGE_REGEX)
         image_pair_dict = {}
         for path in image_paths:
-            if re.search(WALDO_IMAGE_REGEX, path):
-                waldo_image = WaldoImageName.from_path(path)
-                postfix = str(waldo_image.image_postfix)
-                parent = os.path.dirname(path)
-                key = os.path.join(parent, postfix)
-                if key not in image_pair_dict.keys():
-
-                    waldo_image_left = copy.deepcopy(waldo_image)
-                    waldo_image_left.camera_type = "left"
-                    waldo_image_right = copy.deepcopy(waldo_image)
-                    waldo_image_right.camera_type = "right"
-
-                    left_path = os.path.join(parent, waldo_image_left.file_name)
-                    right_path = os.path.join(parent, waldo_image_right.file_name)
-
-                    if not exists(left_path):
-                        left_path = None
-                    if not exists(right_path):
-                        right_path = None
-
-                    image_pair_dict[key] = (left_path, right_path)
-
-        return list(image_pair_dict.values())
+            parent, file_name = os.path.split(path)
+            result = image_regex.search(file_name)
+            if result is None:
+                continue
+            camera_id, on_transect_id, transect_id, image_id, _ = result.groups()
+            key = (parent, on_transect_id, int(transect_id), int(image_id))
+            pair = image_pair_dict.setdefault(key, [None, None])
+            if camera_id == "1":
+                pair[0] = path
+            elif camera_id == "0":
+                pair[1] = path
+        return [tuple(pair) for pair in image_pair_dict.values()]
 
     @staticmethod
-    def move_and_rename_images(path_mapping):
-        with tqdm(path_mapping.items()) as path_mapping:
-            path_mapping.set_description("Moving Images")
-            for src, dest in path_mapping:
-                if not src:
-                    continue
-                shutil.move(src, dest)
+    def move_and_rename_images(path_mapping, manifest_path=None):
+        """
+        Moves images to their new paths. The path mapping is saved to the manifest path before moving, so an
+        interrupted move can be resumed or rolled back (see FileMover).
+        """
+        path_mapping = PathMapping({src: dest for src, dest in path_mapping.items() if src})
+        FileMover(path_mapping, manifest_path=manifest_path).run(description="Moving Images")
 
     @staticmethod
     def create_images_dir(parent_dir):
@@ -88,22 +82,30 @@ class WaldoSurveyConverter:
     @classmethod
     def get_path_mapping(cls, paths, image_out_dir):
         path_mapping = PathMapping()
+        image_out_dir = realpath(image_out_dir)
+        real_dirs = {}
+
+        def get_realpath(path):
+            # Resolved once per directory rather than once per image
+            parent, file_name = os.path.split(path)
+            if parent not in real_dirs:
+                real_dirs[parent] = realpath(parent)
+            return os.path.join(real_dirs[parent], file_name)
+
         for index, image_pair in enumerate(paths):
             image_id = index % increment_transect_id_count
             transect_id = int(index / increment_transect_id_count)
             left_path, right_path = image_pair
 
             if left_path:
-                left_path = realpath(left_path)
                 left_dest_name = cls.get_image_name("1", transect_id, image_id)
-                left_dest_path = realpath(os.path.join(image_out_dir, left_dest_name))
-                path_mapping.add_path(original_path=left_path, current_path=left_dest_path)
+                path_mapping.add_path(original_path=get_realpath(left_path),
+                                      current_path=os.path.join(image_out_dir, left_dest_name))
 
             if right_path:
-                right_path = realpath(right_path)
                 right_dest_name = cls.get_image_name("0", transect_id, image_id)
-                right_dest_path = realpath(os.path.join(image_out_dir, right_dest_name))
-                path_mapping.add_path(original_path=right_path, current_path=right_dest_path)
+                path_mapping.add_path(original_path=get_realpath(right_path),
+                                      current_path=os.path.join(image_out_dir, right_dest_name))
 
         return path_mapping
 
@@ -155,6 +157,10 @@ class WaldoSurveyConverter:
             if response is False:
                 raise Exception("Cancelled actions due to user response.")
 
+    @staticmethod
+    def get_path_mapping_file_path(month_day_path):
+        return join(month_day_path, "image_path_mapping.csv")
+
     @classmethod
     def run_for_day(cls, path):
         waldo_path = WaldoSurveyPath(path)
@@ -164,16 +170,37 @@ class WaldoSurveyConverter:
             print("Waldo files have already been converted. Skipping...")
             return join(str(waldo_path), "Images")
         image_dirs = cls.get_waldo_directories(path)
-        image_paths = []
-        for dir in image_dirs:
-            image_paths += cls.get_image_paths_in_dir(dir)
-        image_pairs = cls.get_image_pairs(image_paths)
-        image_out_dir = cls.create_images_dir(waldo_path.month_day_path)
-        path_mapping = cls.get_path_mapping(image_pairs, image_out_dir)
-        cls.validate_path_mapping(path_mapping, image_dirs)
-        cls.move_and_rename_images(path_mapping)
+        path_mapping_file_path = cls.get_path_mapping_file_path(waldo_path.month_day_path)
+        if exists(path_mapping_file_path):
+            print(f"Resuming interrupted conversion using path mapping [{path_mapping_file_path}]")
+            path_mapping = PathMapping.load(path_mapping_file_path)
+            image_out_dir = join(waldo_path.month_day_path, "Images")
+        else:
+            image_paths = []
+            for dir in image_dirs:
+                image_paths += cls.get_image_paths_in_dir(dir)
+            image_pairs = cls.get_image_pairs(image_paths)
+            image_out_dir = cls.create_images_dir(waldo_path.month_day_path)
+            path_mapping = cls.get_path_mapping(image_pairs, image_out_dir)
+            cls.validate_path_mapping(path_mapping, image_dirs)
+        cls.move_and_rename_images(path_mapping, manifest_path=path_mapping_file_path)
         cls.move_waldo_files(path)
         cls.remove_waldo_image_dirs(image_dirs)
-        path_mapping.save(file_path=join(waldo_path.month_day_path, "image_path_mapping.csv"))
-        print(f"Finished. {len(image_paths)} have been renamed and moved to [{image_out_dir}]")
+        print(f"Finished. {len(path_mapping)} have been renamed and moved to [{image_out_dir}]")
         return image_out_dir
+
+    @classmethod
+    def rollback_day(cls, path):
+        """
+        Moves images of an interrupted conversion back to their original paths
+        """
+        waldo_path = WaldoSurveyPath(path)
+        path_mapping_file_path = cls.get_path_mapping_file_path(waldo_path.month_day_path)
+        if exists(join(str(waldo_path), "WaldoFiles")):
+            raise Exception("Cannot roll back a completed conversion. Waldo files have already been moved.")
+        FileMover.load(path_mapping_file_path).rollback(description="Restoring Images")
+        image_out_dir = join(waldo_path.month_day_path, "Images")
+        if exists(image_out_dir) and len(os.listdir(image_out_dir)) == 0:
+            os.rmdir(image_out_dir)
+        os.remove(path_mapping_file_path)
+        print("Restored images to their original directories.")
@@ -0,0 +1,184 @@
+import json
+import os
+import shutil
+from datetime import datetime, timedelta
+from os.path import exists, join
+from typing import List
+
+from Utilities.utilities import get_file_hash
+
+BLOBS_DIR = "Blobs"
+MANIFESTS_DIR = "Manifests"
+
+
+class BackupStore:
+    """
+    Incremental backups of a directory. File contents are stored once as blobs named by their hash, and each backup is
+    a manifest of the backed up paths with the hash, size and modified time of each file. Files with the same size and
+    modified time as in the latest backup aren't hashed again, so backing up unchanged files only costs a stat.
+
+    Layout:
+     - Blobs/<first 2 characters of hash>/<hash>
+     - Manifests/<backup name>.json
+    """
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+
+    @property
+    def blobs_dir(self):
+        return join(self.store_dir, BLOBS_DIR)
+
+    @property
+    def manifests_dir(self):
+        return join(self.store_dir, MANIFESTS_DIR)
+
+    def get_blob_path(self, file_hash):
+        return join(self.blobs_dir, file_hash[:2], file_hash)
+
+    def get_manifest_path(self, backup_name):
+        return join(self.manifests_dir, f"{backup_name}.json")
+
+    def load_manifest(self, backup_name):
+        manifest_path = self.get_manifest_path(backup_name)
+        if not exists(manifest_path):
+            raise FileNotFoundError(f"Backup not found: '{backup_name}'")
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_manifest(self, manifest):
+        os.makedirs(self.manifests_dir, exist_ok=True)
+        manifest_path = self.get_manifest_path(manifest["name"])
+        temp_file_path = f"{manifest_path}.tmp"
+        with open(temp_file_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temp_file_path, manifest_path)
+        return manifest_path
+
+    def list_backups(self) -> List[dict]:
+        """
+        :return: Manifests of all backups, oldest first
+        """
+        if not exists(self.manifests_dir):
+            return []
+        manifests = [self.load_manifest(file[:-len(".json")]) for file in os.listdir(self.manifests_dir)
+                     if file.endswith(".json")]
+        return sorted(manifests, key=lambda manifest: manifest["created"])
+
+    def get_unique_backup_name(self, backup_name):
+        unique_name, idx = backup_name, 1
+        while exists(self.get_manifest_path(unique_name)):
+            idx += 1
+            unique_name = f"{backup_name}_{idx}"
+        return unique_name
+
+    def create_backup(self, source_dir, backup_name, exclude=()):
+        """
+        Backs up all files in the source dir
+        :param exclude: Names of files and directories in the top level of the source dir to skip
+        :return: Path of the backup manifest
+        """
+        backups = self.list_backups()
+        previous_files = backups[-1]["files"] if len(backups) > 0 else {}
+        exclude = set(exclude)
+        files, dirs = {}, []
+        for root, dir_names, file_names in os.walk(source_dir):
+            relative_root = os.path.relpath(root, source_dir)
+            if relative_root == ".":
+                dir_names[:] = [name for name in dir_names if name not in exclude]
+                file_names = [name for name in file_names if name not in exclude]
+            else:
+                dirs.append(relative_root.replace(os.sep, "/"))
+            for file_name in file_names:
+                path = join(root, file_name)
+                relative_path = os.path.relpath(path, source_dir).replace(os.sep, "/")
+                files[relative_path] = self.backup_file(path, previous_files.get(relative_path))
+        manifest = {
+            "name": self.get_unique_backup_name(backup_name),
+            "created": datetime.now().isoformat(),
+            "source_dir": os.path.abspath(source_dir),
+            "dirs": sorted(dirs),
+            "files": files,
+        }
+        return self.save_manifest(manifest)
+
+    def backup_file(self, path, previous_entry=None):
+        """
+        Stores the file's content as a blob, unless a blob with the same content already exists
+        :return: Manifest entry of the file
+        """
+        stat = os.stat(path)
+        if previous_entry is not None and previous_entry["size"] == stat.st_size \
+                and previous_entry["mtime_ns"] == stat.st_mtime_ns and exists(self.get_blob_path(previous_entry["hash"])):
+            return previous_entry
+        file_hash = get_file_hash(path)
+        blob_path = self.get_blob_path(file_hash)
+        if not exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            temp_file_path = f"{blob_path}.tmp"
+            shutil.copy2(path, temp_file_path)
+            os.replace(temp_file_path, blob_path)
+        return {"hash": file_hash, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def restore(self, backup_name, dest_dir):
+        """
+        Restores the files of a backup to the dest dir. Files that aren't in the backup are left unchanged.
+        :return: Relative paths of the restored files
+        """
+        manifest = self.load_manifest(backup_name)
+        for dir_path in manifest["dirs"]:
+            os.makedirs(join(dest_dir, dir_path), exist_ok=True)
+        for relative_path, entry in manifest["files"].items():
+            blob_path = self.get_blob_path(entry["hash"])
+            if not exists(blob_path):
+                raise FileNotFoundError(f"Backup '{backup_name}' is missing the data of file '{relative_path}'")
+            dest_path = join(dest_dir, relative_path)
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            temp_file_path = f"{dest_path}.restore.tmp"
+            shutil.copyfile(blob_path, temp_file_path)
+            os.replace(temp_file_path, dest_path)
+            os.utime(dest_path, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+        return list(manifest["files"])
+
+    def delete_backup(self, backup_name):
+        os.remove(self.get_manifest_path(backup_name))
+
+    def prune(self, keep_last=None, keep_days=None, exclude_prefix=None):
+        """
+        Deletes backups outside of the retention limits and the blobs no remaining backup references. The latest
+        backup is always kept.
+        :param keep_last: Number of most recent backups to keep
+        :param keep_days: Keep backups created within this many days
+        :param exclude_prefix: Backups with names starting with this prefix are never counted or deleted
+        :return: Names of deleted backups
+        """
+        backups = [manifest for manifest in self.list_backups()
+                   if exclude_prefix is None or not manifest["name"].startswith(exclude_prefix)]
+        min_created = (datetime.now() - timedelta(days=keep_days)).isoformat() if keep_days is not None else None
+        deleted = []
+        for idx, manifest in enumerate(backups[:-1]):
+            num_newer = len(backups) - idx - 1
+            if (keep_last is not None and num_newer >= keep_last) or \
+                    (min_created is not None and manifest["created"] < min_created):
+                self.delete_backup(manifest["name"])
+                deleted.append(manifest["name"])
+        if len(deleted) > 0:
+            self.collect_garbage()
+        return deleted
+
+    def collect_garbage(self):
+        """
+        Deletes blobs that no backup references
+        :return: Number of bytes freed
+        """
+        if not exists(self.blobs_dir):
+            return 0
+        referenced = {entry["hash"] for manifest in self.list_backups() for entry in manifest["files"].values()}
+        freed_bytes = 0
+        for root, _, file_names in os.walk(self.blobs_dir):
+            for file_name in file_names:
+                if file_name not in referenced:
+                    path = join(root, file_name)
+                    freed_bytes += os.path.getsize(path)
+                    os.remove(path)
+        return freed_bytes
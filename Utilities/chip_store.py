@@ -0,0 +1,154 @@
+import json
+import os
+import shutil
+from os.path import exists, join
+import numpy as np
+from PIL import Image
+
+DEFAULT_CHIP_SIZE = 128
+DEFAULT_CHIP_CONTEXT_SCALE = 3
+
+
+class ChipStore:
+    """
+    Fixed size crops (chips) of the area around predictions. All chips of a survey are stored as raw RGB rows in a
+    single file, which is memory mapped for reading, along with a json index of each chip's row and crop region.
+    """
+
+    VERSION = 1
+    DATA_FILE = "chips.bin"
+    INDEX_FILE = "chips.json"
+
+    def __init__(self, chip_dir, chip_size=DEFAULT_CHIP_SIZE, context_scale=DEFAULT_CHIP_CONTEXT_SCALE):
+        """
+        :param chip_dir: Dir the chip store files are written to
+        :param chip_size: Width and height of chips in pixels
+        :param context_scale: Size of the cropped region relative to the larger side of the prediction box
+        """
+        self.chip_dir = chip_dir
+        self.chip_size = chip_size
+        self.context_scale = context_scale
+        self.chips = {}
+        self.data = None
+
+    def __repr__(self):
+        return f"Chip Store: {self.chip_dir} ({len(self)} chips)"
+
+    def __len__(self):
+        return len(self.chips)
+
+    def __contains__(self, prediction):
+        return self.get_chip_key(prediction) in self.chips
+
+    @property
+    def data_path(self):
+        return join(self.chip_dir, self.DATA_FILE)
+
+    @property
+    def index_path(self):
+        return join(self.chip_dir, self.INDEX_FILE)
+
+    @property
+    def chip_shape(self):
+        return self.chip_size, self.chip_size, 3
+
+    @property
+    def chip_nbytes(self):
+        return self.chip_size * self.chip_size * 3
+
+    def load(self):
+        """
+        Loads the chip index. Stores created with a different chip size or context scale are ignored.
+        :return: Whether a valid chip store was loaded
+        """
+        self.chips = {}
+        self.data = None
+        if not exists(self.index_path):
+            return False
+        try:
+            with open(self.index_path, 'r') as index_file:
+                index = json.load(index_file)
+            if index["version"] != self.VERSION or index["chip_size"] != self.chip_size \
+                    or index["context_scale"] != self.context_scale:
+                return False
+            self.chips = index["chips"]
+            return True
+        except Exception as ex:
+            print(f"Error loading chip store index '{self.index_path}'. Error: {ex}")
+            return False
+
+    def save(self):
+        os.makedirs(self.chip_dir, exist_ok=True)
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, 'w') as index_file:
+            json.dump({"version": self.VERSION, "chip_size": self.chip_size, "context_scale": self.context_scale,
+                       "chips": self.chips}, index_file)
+        os.replace(temp_path, self.index_path)
+
+    def clear(self):
+        self.chips = {}
+        self.data = None
+        if exists(self.chip_dir):
+            shutil.rmtree(self.chip_dir, ignore_errors=True)
+
+    @staticmethod
+    def get_chip_key(prediction):
+        return f"{prediction.image_name}:{round(prediction.xmin)},{round(prediction.ymin)}," \
+               f"{round(prediction.xmax)},{round(prediction.ymax)}"
+
+    def get_chip_region(self, prediction):
+        """
+        Square region of the image cropped for a prediction, centered on the prediction.
+        :return: (x, y, side) in standard image coordinates
+        """
+        side = max(int(max(prediction.width, prediction.height) * self.context_scale), self.chip_size)
+        return int(prediction.x - side / 2), int(prediction.y - side / 2), side
+
+    def get_missing_predictions(self, predictions):
+        return [prediction for prediction in predictions if prediction not in self]
+
+    def get_chip(self, prediction):
+        """
+        :return: (chip_size, chip_size, 3) uint8 RGB array, or None if the prediction has no chip
+        """
+        chip = self.chips.get(self.get_chip_key(prediction))
+        if chip is None:
+            return None
+        if self.data is None or len(self.data) <= chip[0]:
+            self.data = np.memmap(self.data_path, dtype=np.uint8, mode='r', shape=(len(self),) + self.chip_shape)
+        return np.array(self.data[chip[0]])
+
+    def get_chip_box(self, prediction):
+        """
+        Bounding box of a prediction within its chip.
+        :return: (xmin, ymin, xmax, ymax) in standard chip pixel coordinates
+        """
+        _, x, y, side = self.chips[self.get_chip_key(prediction)]
+        scale = self.chip_size / side
+        return ((prediction.xmin - x) * scale, (prediction.ymin - y) * scale,
+                (prediction.xmax - x) * scale, (prediction.ymax - y) * scale)
+
+    def add_image_chips(self, image_path, predictions):
+        """
+        Crops chips for predictions from a single image, decoding the image once, and appends them to the store.
+        The index is not written until save is called.
+        """
+        predictions = list({self.get_chip_key(prediction): prediction
+                            for prediction in self.get_missing_predictions(predictions)}.values())
+        if not predictions:
+            return
+        regions = [self.get_chip_region(prediction) for prediction in predictions]
+        with Image.open(image_path) as image:
+            image = image.convert("RGB")
+            chips = [image.crop((x, y, x + side, y + side)).resize((self.chip_size, self.chip_size),
+                                                                     Image.BILINEAR)
+                     for x, y, side in regions]
+        os.makedirs(self.chip_dir, exist_ok=True)
+        self.data = None
+        with open(self.data_path, 'r+b' if exists(self.data_path) else 'wb') as data_file:
+            # Drop rows written after the last saved index, e.g. from an interrupted extraction
+            data_file.truncate(len(self) * self.chip_nbytes)
+            data_file.seek(len(self) * self.chip_nbytes)
+            for prediction, region, chip in zip(predictions, regions, chips):
+                data_file.write(chip.tobytes())
+                self.chips[self.get_chip_key(prediction)] = [len(self), *region]
@@ -0,0 +1,13 @@
+import os
+
+"""
+Setup shared by the command line entry points (helper scripts, batch runs and benchmarks)
+"""
+
+
+def disable_kivy_argument_parsing():
+    """
+    Kivy parses the command line when imported by the project modules, which would reject the script arguments. Must
+    be called before importing the project modules.
+    """
+    os.environ.setdefault("KIVY_NO_ARGS", "1")
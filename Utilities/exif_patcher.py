@@ -0,0 +1,168 @@
+import mmap
+import struct
+
+EXIF_TAG_ORIENTATION = 0x0112
+EXIF_TAG_DATETIME_ORIGINAL = 0x9003
+EXIF_TAG_EXIF_IFD_POINTER = 0x8769
+
+EXIF_TYPE_ASCII = 2
+EXIF_TYPE_SHORT = 3
+EXIF_TYPE_LONG = 4
+EXIF_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 7: 1, 9: 4, 10: 8}
+
+JPEG_SOI = b"\xff\xd8"
+JPEG_APP1 = 0xE1
+JPEG_SOS = 0xDA
+EXIF_HEADER = b"Exif\x00\x00"
+
+
+class ExifEntry:
+    """
+    Location of a tag's value within a file
+    """
+
+    __slots__ = ["tag", "type", "count", "value_position"]
+
+    def __init__(self, tag, type, count, value_position):
+        self.tag = tag
+        self.type = type
+        self.count = count
+        self.value_position = value_position
+
+    @property
+    def size(self):
+        return EXIF_TYPE_SIZES.get(self.type, 0) * self.count
+
+
+class ExifTagPatcher:
+    """
+    Reads and overwrites EXIF tag values of a jpeg in place through a memory map, so changing a tag only writes the
+    tag's bytes instead of rewriting the whole image. Supports tags of the primary image (IFD0) and the EXIF IFD with
+    ASCII, SHORT and LONG values. Values can only be replaced by values of the same size, set returns False when a tag
+    can't be patched in place so callers can fall back to rewriting the file.
+
+    with ExifTagPatcher(path) as patcher:
+        if patcher.get(EXIF_TAG_ORIENTATION) == 1:
+            patcher.set(EXIF_TAG_ORIENTATION, 3)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.buffer = None
+        self.byte_order = "<"
+        self.entries = {}
+
+    def __enter__(self):
+        self.file = open(self.path, "r+b")
+        try:
+            self.buffer = mmap.mmap(self.file.fileno(), 0)
+            self.entries = self.find_entries()
+        except Exception:
+            self.close()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        if self.buffer is not None:
+            self.buffer.flush()
+            self.buffer.close()
+            self.buffer = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def find_tiff_header_position(self):
+        """
+        :return: Position of the TIFF header in the APP1 Exif segment, or None if the file has no Exif segment
+        """
+        buffer = self.buffer
+        if buffer[0:2] != JPEG_SOI:
+            return None
+        position = 2
+        while position + 4 <= len(buffer):
+            if buffer[position] != 0xFF:
+                return None
+            marker = buffer[position + 1]
+            if marker == JPEG_SOS:
+                return None
+            segment_length = struct.unpack(">H", buffer[position + 2:position + 4])[0]
+            if marker == JPEG_APP1 and buffer[position + 4:position + 10] == EXIF_HEADER:
+                return position + 10
+            position += 2 + segment_length
+        return None
+
+    def find_entries(self):
+        tiff_position = self.find_tiff_header_position()
+        if tiff_position is None:
+            return {}
+        byte_order = self.buffer[tiff_position:tiff_position + 2]
+        if byte_order not in (b"II", b"MM"):
+            return {}
+        self.byte_order = "<" if byte_order == b"II" else ">"
+        ifd_offset = self.unpack("I", tiff_position + 4)
+        entries = self.read_ifd(tiff_position, ifd_offset)
+        exif_ifd_pointer = entries.get(EXIF_TAG_EXIF_IFD_POINTER)
+        if exif_ifd_pointer is not None:
+            exif_ifd_offset = self.read_value(exif_ifd_pointer)
+            entries.update({tag: entry for tag, entry in self.read_ifd(tiff_position, exif_ifd_offset).items()
+                            if tag not in entries})
+        return entries
+
+    def read_ifd(self, tiff_position, ifd_offset):
+        entries = {}
+        position = tiff_position + ifd_offset
+        num_entries = self.unpack("H", position)
+        for idx in range(num_entries):
+            entry_position = position + 2 + idx * 12
+            tag, type, count = struct.unpack(self.byte_order + "HHI", self.buffer[entry_position:entry_position + 8])
+            entry = ExifEntry(tag, type, count, entry_position + 8)
+            if entry.size > 4:
+                entry.value_position = tiff_position + self.unpack("I", entry_position + 8)
+            entries[tag] = entry
+        return entries
+
+    def unpack(self, value_format, position):
+        size = struct.calcsize(value_format)
+        return struct.unpack(self.byte_order + value_format, self.buffer[position:position + size])[0]
+
+    def read_value(self, entry: ExifEntry):
+        if entry.type == EXIF_TYPE_ASCII:
+            return bytes(self.buffer[entry.value_position:entry.value_position + entry.count]).split(b"\x00")[0]\
+                .decode("ascii", errors="replace")
+        if entry.type == EXIF_TYPE_SHORT and entry.count == 1:
+            return self.unpack("H", entry.value_position)
+        if entry.type == EXIF_TYPE_LONG and entry.count == 1:
+            return self.unpack("I", entry.value_position)
+        return None
+
+    def get(self, tag):
+        """
+        :return: Tag value, or None if the tag is missing or its type isn't supported
+        """
+        entry = self.entries.get(tag)
+        return self.read_value(entry) if entry is not None else None
+
+    def set(self, tag, value):
+        """
+        Overwrites a tag value in place
+        :return: False if the tag is missing, has an unsupported type or the new value has a different size
+        """
+        entry = self.entries.get(tag)
+        if entry is None:
+            return False
+        if entry.type == EXIF_TYPE_ASCII:
+            value_bytes = str(value).encode("ascii") + b"\x00"
+            if len(value_bytes) != entry.count:
+                return False
+        elif entry.type == EXIF_TYPE_SHORT and entry.count == 1:
+            value_bytes = struct.pack(self.byte_order + "H", int(value))
+        elif entry.type == EXIF_TYPE_LONG and entry.count == 1:
+            value_bytes = struct.pack(self.byte_order + "I", int(value))
+        else:
+            return False
+        self.buffer[entry.value_position:entry.value_position + len(value_bytes)] = value_bytes
+        return True
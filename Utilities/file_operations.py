@@ -0,0 +1,205 @@
+import errno
+import hashlib
+import os
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+from tqdm import tqdm
+
+from Utilities.path_mapping import PathMapping
+
+"""
+Copies and moves large sets of files (e.g. survey images). Copies avoid duplicating data where the filesystem allows
+it, moves are planned up front so an interrupted move can be resumed or rolled back.
+
+File modes:
+ - copy: Regular copy
+ - reflink: Copy-on-write clone of the file (Btrfs, XFS, ...). The clone shares data blocks with the source until
+   either file is modified, so it behaves like a copy. Falls back to a copy when the filesystem doesn't support it
+ - hardlink: Both paths refer to the same file, so modifying one modifies the other (files replaced with os.replace are
+   not affected). Falls back to a copy across drives or when the filesystem doesn't support links
+"""
+
+FILE_MODE_COPY = "copy"
+FILE_MODE_REFLINK = "reflink"
+FILE_MODE_HARDLINK = "hardlink"
+FILE_MODES = [FILE_MODE_COPY, FILE_MODE_REFLINK, FILE_MODE_HARDLINK]
+
+FICLONE = 0x40049409  # Linux ioctl cloning a file's extents
+PARTIAL_FILE_SUFFIX = ".partial"
+COPY_BUFFER_SIZE = 8 * 1024 * 1024
+
+
+def reflink_file(src, dst):
+    """
+    Creates a copy-on-write clone of src at dst
+    :raises OSError: If the platform or filesystem doesn't support reflinks
+    """
+    if not sys.platform.startswith("linux"):
+        raise OSError(errno.EOPNOTSUPP, "Reflinks are not supported on this platform", src)
+    import fcntl
+    with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+        try:
+            fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+        except OSError:
+            dst_file.close()
+            os.remove(dst)
+            raise
+    shutil.copystat(src, dst)
+
+
+def hash_file(path):
+    file_hash = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(COPY_BUFFER_SIZE):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def copy_and_hash_file(src, dst):
+    """
+    Copies a file with its metadata, hashing it in the same pass
+    :return: sha256 of the copied data
+    """
+    file_hash = hashlib.sha256()
+    with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+        while chunk := src_file.read(COPY_BUFFER_SIZE):
+            file_hash.update(chunk)
+            dst_file.write(chunk)
+    shutil.copystat(src, dst)
+    return file_hash.hexdigest()
+
+
+def link_or_copy_file(src, dst, mode=FILE_MODE_COPY):
+    """
+    Copies src to dst using the given file mode, falling back to a regular copy if the mode isn't supported
+    :return: File mode that was used
+    """
+    if mode not in FILE_MODES:
+        raise Exception(f"Unknown file mode: '{mode}'. Must be one of: {FILE_MODES}")
+    if os.path.isdir(dst):
+        dst = os.path.join(dst, os.path.basename(src))
+    if mode == FILE_MODE_HARDLINK:
+        try:
+            os.link(src, dst)
+            return FILE_MODE_HARDLINK
+        except (FileExistsError, FileNotFoundError):
+            raise
+        except OSError:
+            pass
+    elif mode == FILE_MODE_REFLINK:
+        try:
+            reflink_file(src, dst)
+            return FILE_MODE_REFLINK
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+    return FILE_MODE_COPY
+
+
+def link_or_copy_files(file_pairs: List[Tuple[str, str]], mode=FILE_MODE_COPY, max_workers=8, description=None):
+    """
+    Copies (src, dst) file pairs in a thread pool using the given file mode
+    :return: Number of files handled by each file mode
+    """
+    mode_counts = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, tqdm(total=len(file_pairs)) as progress:
+        if description:
+            progress.set_description(description)
+        futures = [executor.submit(link_or_copy_file, src, dst, mode) for src, dst in file_pairs]
+        try:
+            for future in futures:
+                used_mode = future.result()
+                mode_counts[used_mode] = mode_counts.get(used_mode, 0) + 1
+                progress.update(1)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+    return mode_counts
+
+
+class FileMover:
+    """
+    Moves files according to a PathMapping (original path -> new path) that is saved as a manifest before any file is
+    moved. Files are renamed when the source and destination are on the same drive. Across drives, files are copied to
+    a temporary file, verified, renamed to the destination and only then deleted from the source.
+
+    Every file is in one of these states, so the manifest is enough to resume or roll back an interrupted move:
+     - Only the source exists: not moved yet
+     - Source and destination exist: copied but not deleted yet (the destination is always a complete copy)
+     - Only the destination exists: moved
+    """
+
+    def __init__(self, path_mapping: PathMapping, manifest_path=None, max_workers=8):
+        self.path_mapping = path_mapping
+        self.manifest_path = manifest_path
+        self.max_workers = max_workers
+
+    @classmethod
+    def load(cls, manifest_path, max_workers=8):
+        return cls(PathMapping.load(manifest_path), manifest_path=manifest_path, max_workers=max_workers)
+
+    def validate(self):
+        destinations = list(self.path_mapping.values())
+        if len(set(destinations)) != len(destinations):
+            raise Exception("Cannot move files. Several files are mapped to the same destination path.")
+        missing = [src for src, dst in self.path_mapping.items() if not os.path.exists(src) and not os.path.exists(dst)]
+        if len(missing) > 0:
+            raise FileNotFoundError(f"Cannot move files. {len(missing)} files were not found, e.g. '{missing[0]}'")
+
+    def run(self, description="Moving Files"):
+        """
+        Moves all files that haven't been moved yet. An existing manifest must match the path mapping, it belongs to
+        another move that has to be resumed or rolled back first otherwise.
+        """
+        self.validate()
+        if self.manifest_path and os.path.exists(self.manifest_path):
+            if PathMapping.load(self.manifest_path) != self.path_mapping:
+                raise FileExistsError(f"Cannot move files. The manifest '{self.manifest_path}' belongs to another "
+                                      f"move. Resume or roll back that move first.")
+        elif self.manifest_path:
+            self.path_mapping.save(self.manifest_path)
+        self.move_files(list(self.path_mapping.items()), description)
+
+    def rollback(self, description="Restoring Files"):
+        """
+        Moves files back to their original paths
+        """
+        self.move_files([(dst, src) for src, dst in self.path_mapping.items()], description)
+
+    def move_files(self, moves: List[Tuple[str, str]], description):
+        moves = [(src, dst) for src, dst in moves if os.path.exists(src)]
+        for dir_path in {os.path.dirname(dst) for _, dst in moves}:
+            os.makedirs(dir_path, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor, tqdm(total=len(moves)) as progress:
+            progress.set_description(description)
+            futures = [executor.submit(self.move_file, src, dst) for src, dst in moves]
+            try:
+                for future in futures:
+                    future.result()
+                    progress.update(1)
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    @staticmethod
+    def move_file(src, dst):
+        if os.path.exists(dst):
+            # Copied by an interrupted move, unless the destination is an unrelated file
+            if os.path.getsize(src) != os.path.getsize(dst) or hash_file(src) != hash_file(dst):
+                raise FileExistsError(f"Cannot move '{src}'. A different file already exists at '{dst}'")
+            os.remove(src)
+            return
+        if os.stat(src).st_dev == os.stat(os.path.dirname(dst)).st_dev:
+            os.rename(src, dst)
+            return
+        partial_path = dst + PARTIAL_FILE_SUFFIX
+        if copy_and_hash_file(src, partial_path) != hash_file(partial_path):
+            os.remove(partial_path)
+            raise OSError(f"Verification failed copying '{src}' to '{dst}'")
+        os.replace(partial_path, dst)
+        os.remove(src)
@@ -0,0 +1,170 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
+from PIL import Image
+from Utilities.image_pyramid import ImagePyramid, DEFAULT_TILE_SIZE
+
+BYTES_PER_MB = 1024 * 1024
+DEFAULT_IMAGE_CACHE_MEMORY_MB = 1024
+
+
+class CachedImage:
+    """
+    Decoded RGB bitmap of an image, stored as raw bytes (origin at top left, EXIF orientation not applied).
+    """
+
+    def __init__(self, path, size, data: bytes):
+        self.path = path
+        self.size = size
+        self.data = data
+
+    def __repr__(self):
+        return f"Cached Image: {self.path} {self.size}"
+
+    @property
+    def nbytes(self):
+        return len(self.data)
+
+    @staticmethod
+    def from_file(path):
+        with Image.open(path) as image:
+            image = image.convert("RGB")
+            return CachedImage(path, image.size, image.tobytes())
+
+
+class ImageCache:
+    """
+    Thread safe LRU cache of decoded images, limited by the total size of the cached bitmaps.
+    """
+
+    def __init__(self, max_memory_mb=DEFAULT_IMAGE_CACHE_MEMORY_MB):
+        self.max_memory = int(max_memory_mb * BYTES_PER_MB)
+        self.memory_usage = 0
+        self.images = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __contains__(self, path):
+        return path in self.images
+
+    def __len__(self):
+        return len(self.images)
+
+    def get(self, path):
+        with self.lock:
+            cached_image = self.images.get(path)
+            if cached_image is not None:
+                self.images.move_to_end(path)
+            return cached_image
+
+    def put(self, cached_image: CachedImage):
+        """
+        Adds an image to the cache, evicting the least recently used images to stay within the memory budget.
+        :return: False if the image is larger than the entire memory budget and was not cached
+        """
+        if cached_image.nbytes > self.max_memory:
+            return False
+        with self.lock:
+            previous_image = self.images.pop(cached_image.path, None)
+            if previous_image is not None:
+                self.memory_usage -= previous_image.nbytes
+            self.images[cached_image.path] = cached_image
+            self.memory_usage += cached_image.nbytes
+            self.evict()
+        return True
+
+    def set_max_memory_mb(self, max_memory_mb):
+        with self.lock:
+            self.max_memory = int(max_memory_mb * BYTES_PER_MB)
+            self.evict()
+
+    def evict(self):
+        while self.memory_usage > self.max_memory and self.images:
+            _, cached_image = self.images.popitem(last=False)
+            self.memory_usage -= cached_image.nbytes
+
+    def clear(self):
+        with self.lock:
+            self.images.clear()
+            self.memory_usage = 0
+
+
+class ImagePrefetcher:
+    """
+    Loads images in a background worker ahead of when they are displayed. Without a cache dir images are
+    decoded into the image cache; with a cache dir their image pyramids are loaded or generated instead.
+    Prefetch requests replace any prefetches still queued from a previous request, so the worker only
+    spends time on images near the current one.
+    """
+
+    def __init__(self, image_cache: ImageCache, max_workers=1):
+        self.image_cache = image_cache
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.futures = {}
+        self.required_keys = set()
+        self.lock = threading.RLock()
+
+    def load(self, path, cache_dir=None, tile_size=DEFAULT_TILE_SIZE, callback=None):
+        """
+        Loads an image in the background. Unlike prefetches this is never cancelled.
+        :param callback: Called from the worker thread with the loaded CachedImage or ImagePyramid
+        """
+        self.submit((path, cache_dir), partial(self.load_image, path, cache_dir, tile_size), callback=callback,
+                    cancelable=False)
+
+    def prefetch(self, paths, cache_dir=None, tile_size=DEFAULT_TILE_SIZE):
+        """
+        Prefetches images in priority order, cancelling queued prefetches of images not in paths.
+        """
+        keys = [(path, cache_dir) for path in paths]
+        with self.lock:
+            for key, future in list(self.futures.items()):
+                if key not in keys and key not in self.required_keys:
+                    future.cancel()
+        for path, key in zip(paths, keys):
+            if cache_dir is None and self.image_cache.get(path) is not None:
+                continue
+            self.submit(key, partial(self.load_image, path, cache_dir, tile_size))
+
+    def submit(self, key, task, callback=None, cancelable=True):
+        """
+        Queues a task unless a task with the same key is already queued or running.
+        """
+        with self.lock:
+            future = self.futures.get(key)
+            if future is None or future.cancelled():
+                future = self.executor.submit(task)
+                self.futures[key] = future
+                future.add_done_callback(partial(self.on_task_done, key))
+            if not cancelable:
+                self.required_keys.add(key)
+        if callback is not None:
+            future.add_done_callback(partial(self.run_callback, callback))
+        return future
+
+    def on_task_done(self, key, future):
+        with self.lock:
+            if self.futures.get(key) is future:
+                self.futures.pop(key)
+                self.required_keys.discard(key)
+        if not future.cancelled() and future.exception() is not None:
+            print(f"Error loading image {key[0]}. Error: {future.exception()}")
+
+    @staticmethod
+    def run_callback(callback, future):
+        if not future.cancelled() and future.exception() is None:
+            callback(future.result())
+
+    def load_image(self, path, cache_dir=None, tile_size=DEFAULT_TILE_SIZE):
+        if cache_dir is not None:
+            return ImagePyramid(path, cache_dir, tile_size=tile_size).load_or_generate()
+        cached_image = self.image_cache.get(path)
+        if cached_image is None:
+            cached_image = CachedImage.from_file(path)
+            self.image_cache.put(cached_image)
+        return cached_image
+
+    def wait(self):
+        with self.lock:
+            futures = list(self.futures.values())
+        wait(futures)
@@ -5,6 +5,8 @@ from PIL import Image
 import exif
 from exif import Orientation
 
+from Utilities.exif_patcher import ExifTagPatcher, EXIF_TAG_ORIENTATION, EXIF_TAG_DATETIME_ORIGINAL
+
 
 class ImageProcessing:
 
@@ -16,43 +18,58 @@ class ImageProcessing:
     @staticmethod
     def update_utc_image_time(path, force=False, reverse=False):
         time_format = "%Y:%m:%d %H:%M:%S"
-        with open(path, 'rb') as img_file:
-            exif_data = exif.Image(img_file)
-        img_dttm_str = exif_data.datetime_original
-        img_dttm = datetime.strptime(img_dttm_str, time_format)
-        modified_dttm = ImageProcessing.get_modified_dttm(path)
-        modified_time_delta = img_dttm - modified_dttm
-        if force or timedelta(hours=7, minutes=58) < modified_time_delta < timedelta(hours=8, minutes=2):
+        with ExifTagPatcher(path) as patcher:
+            img_dttm_str = patcher.get(EXIF_TAG_DATETIME_ORIGINAL)
+            exif_data = None
+            if img_dttm_str is None:
+                with open(path, 'rb') as img_file:
+                    exif_data = exif.Image(img_file)
+                img_dttm_str = exif_data.datetime_original
+            img_dttm = datetime.strptime(img_dttm_str, time_format)
+            modified_dttm = ImageProcessing.get_modified_dttm(path)
+            modified_time_delta = img_dttm - modified_dttm
+            if not (force or timedelta(hours=7, minutes=58) < modified_time_delta < timedelta(hours=8, minutes=2)):
+                print(f"Modified time delta out of range: {modified_time_delta}")
+                return
             if reverse:
                 akst_corrected_img_dttm = img_dttm + timedelta(hours=8)
             else:
                 akst_corrected_img_dttm = img_dttm - timedelta(hours=8)
-            exif_data.datetime_original = akst_corrected_img_dttm.strftime(time_format)
-            with open(path, 'wb') as img_file:
-                img_file.write(exif_data.get_file())
-        else:
-            print(f"Modified time delta out of range: {modified_time_delta}")
+            if patcher.set(EXIF_TAG_DATETIME_ORIGINAL, akst_corrected_img_dttm.strftime(time_format)):
+                return
+        # The tag couldn't be patched in place, rewrite the whole file
+        if exif_data is None:
+            with open(path, 'rb') as img_file:
+                exif_data = exif.Image(img_file)
+        exif_data.datetime_original = akst_corrected_img_dttm.strftime(time_format)
+        with open(path, 'wb') as img_file:
+            img_file.write(exif_data.get_file())
 
     @staticmethod
     def rotate_image_to_180(path):
-        try:
-            with open(path, 'rb') as img_file:
-                exif_data = exif.Image(img_file)
-            if exif_data.orientation == Orientation.TOP_LEFT:
-                exif_data.orientation = Orientation.BOTTOM_RIGHT
-                with open(path, 'wb') as img_file:
-                    img_file.write(exif_data.get_file())
-        except Exception as ex:
-            print(f"Error rotating image [{path}]")
-            raise ex
+        ImageProcessing.set_image_orientation(path, Orientation.TOP_LEFT, Orientation.BOTTOM_RIGHT)
 
     @staticmethod
     def rotate_image_to_normal(path):
+        ImageProcessing.set_image_orientation(path, Orientation.BOTTOM_RIGHT, Orientation.TOP_LEFT)
+
+    @staticmethod
+    def set_image_orientation(path, from_orientation, to_orientation):
+        """
+        Changes the EXIF orientation of an image currently in from_orientation. The orientation tag is patched in place,
+        the file is only rewritten if the tag can't be patched.
+        """
         try:
+            with ExifTagPatcher(path) as patcher:
+                orientation = patcher.get(EXIF_TAG_ORIENTATION)
+                if orientation is not None and orientation != from_orientation:
+                    return
+                if orientation == from_orientation and patcher.set(EXIF_TAG_ORIENTATION, to_orientation):
+                    return
             with open(path, 'rb') as img_file:
                 exif_data = exif.Image(img_file)
-            if exif_data.orientation == Orientation.BOTTOM_RIGHT:
-                exif_data.orientation = Orientation.TOP_LEFT
+            if exif_data.orientation == from_orientation:
+                exif_data.orientation = to_orientation
                 with open(path, 'wb') as img_file:
                     img_file.write(exif_data.get_file())
         except Exception as ex:
@@ -0,0 +1,177 @@
+import json
+import math
+import os
+import shutil
+from os.path import exists, join
+from PIL import Image
+from Utilities.utilities import get_file_name_without_extension
+
+DEFAULT_TILE_SIZE = 512
+TILE_JPEG_QUALITY = 90
+
+
+class PyramidTile:
+    """
+    Single tile of an image pyramid. Position and size are in full resolution (level 0) standard
+    image coordinates (origin at top left).
+    """
+
+    def __init__(self, level, col, row, path, x, y, width, height):
+        self.level = level
+        self.col = col
+        self.row = row
+        self.path = path
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+
+    def __repr__(self):
+        return f"Tile (level: {self.level}, col: {self.col}, row: {self.row})"
+
+    @property
+    def key(self):
+        return self.level, self.col, self.row
+
+
+class ImagePyramid:
+    """
+    Tiled multi-resolution pyramid of an image, cached on disk. Level 0 is full resolution and each
+    following level is half the resolution of the previous one, down to a level that fits in a single
+    tile. Pixel data is tiled as stored in the file (EXIF orientation is not applied), which matches how
+    the viewer displays full images.
+    """
+
+    METADATA_FILE = "pyramid.json"
+
+    def __init__(self, image_path, cache_dir, tile_size=DEFAULT_TILE_SIZE):
+        self.image_path = image_path
+        self.pyramid_dir = join(cache_dir, get_file_name_without_extension(image_path))
+        self.tile_size = tile_size
+        self.resolution = None
+        self.num_levels = 0
+
+    def __repr__(self):
+        return f"Image Pyramid: {self.image_path}"
+
+    @property
+    def metadata_path(self):
+        return join(self.pyramid_dir, self.METADATA_FILE)
+
+    @property
+    def is_loaded(self):
+        return self.num_levels > 0
+
+    @property
+    def overview_level(self):
+        return self.num_levels - 1
+
+    @property
+    def overview_tile_path(self):
+        return self.get_tile_path(self.overview_level, 0, 0)
+
+    def get_source_signature(self):
+        stat = os.stat(self.image_path)
+        return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+    def load(self):
+        """
+        Loads pyramid metadata from the cache. Cached pyramids are ignored if the source image has changed.
+        :return: Whether a valid cached pyramid was loaded
+        """
+        if not exists(self.metadata_path):
+            return False
+        try:
+            with open(self.metadata_path, 'r') as metadata_file:
+                metadata = json.load(metadata_file)
+            if metadata["source"] != self.get_source_signature() or metadata["tile_size"] != self.tile_size:
+                return False
+            self.resolution = tuple(metadata["resolution"])
+            self.num_levels = metadata["num_levels"]
+            return True
+        except Exception as ex:
+            print(f"Error loading image pyramid metadata '{self.metadata_path}'. Error: {ex}")
+            return False
+
+    def generate(self):
+        """
+        Decodes the source image once and writes every level of the pyramid to the cache. Metadata is written
+        last, so an interrupted generation is never loaded as a valid pyramid.
+        """
+        source_signature = self.get_source_signature()
+        if exists(self.pyramid_dir):
+            shutil.rmtree(self.pyramid_dir, ignore_errors=True)
+        with Image.open(self.image_path) as image:
+            level_image = image.convert("RGB")
+        resolution = level_image.size
+        num_levels = self.get_num_levels(resolution, self.tile_size)
+        for level in range(num_levels):
+            if level > 0:
+                level_image = level_image.reduce(2)
+            self.save_level_tiles(level, level_image)
+        with open(self.metadata_path, 'w') as metadata_file:
+            json.dump({"resolution": resolution, "num_levels": num_levels, "tile_size": self.tile_size,
+                       "source": source_signature}, metadata_file)
+        self.resolution = resolution
+        self.num_levels = num_levels
+        return self
+
+    def load_or_generate(self):
+        if not self.load():
+            self.generate()
+        return self
+
+    def save_level_tiles(self, level, level_image: Image.Image):
+        level_dir = join(self.pyramid_dir, str(level))
+        os.makedirs(level_dir, exist_ok=True)
+        width, height = level_image.size
+        for row in range(math.ceil(height / self.tile_size)):
+            for col in range(math.ceil(width / self.tile_size)):
+                box = (col * self.tile_size, row * self.tile_size,
+                       min((col + 1) * self.tile_size, width), min((row + 1) * self.tile_size, height))
+                level_image.crop(box).save(self.get_tile_path(level, col, row), quality=TILE_JPEG_QUALITY)
+
+    def get_tile_path(self, level, col, row):
+        return join(self.pyramid_dir, str(level), f"{col}_{row}.jpg")
+
+    def get_level_for_zoom(self, zoom):
+        """
+        Lowest resolution level that still has at least one image pixel per screen pixel at the given zoom.
+        """
+        if zoom <= 0:
+            return self.overview_level
+        level = int(math.floor(math.log2(1 / zoom))) if zoom < 1 else 0
+        return max(0, min(level, self.overview_level))
+
+    def get_tiles(self, level, region=None):
+        """
+        Gets the tiles of a level that intersect a region of the image.
+        :param level: Pyramid level
+        :param region: (x_min, y_min, x_max, y_max) in full resolution standard image coordinates. Entire image
+        if None.
+        :return: List of PyramidTile
+        """
+        width, height = self.resolution
+        scale = 2 ** level
+        level_tile_size = self.tile_size * scale
+        x_min, y_min, x_max, y_max = region or (0, 0, width, height)
+        x_min, y_min = max(0, x_min), max(0, y_min)
+        x_max, y_max = min(width, x_max), min(height, y_max)
+        if x_min >= x_max or y_min >= y_max:
+            return []
+        tiles = []
+        for row in range(int(y_min // level_tile_size), int(math.ceil(y_max / level_tile_size))):
+            for col in range(int(x_min // level_tile_size), int(math.ceil(x_max / level_tile_size))):
+                x, y = col * level_tile_size, row * level_tile_size
+                tiles.append(PyramidTile(level, col, row, self.get_tile_path(level, col, row), x, y,
+                                         min(level_tile_size, width - x), min(level_tile_size, height - y)))
+        return tiles
+
+    @staticmethod
+    def get_num_levels(resolution, tile_size):
+        max_dimension = max(resolution)
+        num_levels = 1
+        while max_dimension > tile_size:
+            max_dimension = math.ceil(max_dimension / 2)
+            num_levels += 1
+        return num_levels
@@ -0,0 +1,102 @@
+import os
+import shutil
+import subprocess
+
+import piexif
+from PIL import Image
+
+"""
+Crops a border off jpegs. When the crop offsets fall on MCU (minimum coded unit) boundaries, the crop is done losslessly
+in the DCT domain with jpegtran, which copies the compressed blocks instead of decoding and re-encoding the image. Other
+crops, and systems without jpegtran, fall back to decoding with PIL and re-encoding.
+
+Functions only take picklable arguments so they can run in a process pool.
+"""
+
+CROP_METHOD_LOSSLESS = "lossless"
+CROP_METHOD_REENCODE = "reencode"
+
+DCT_BLOCK_SIZE = 8
+# MCU size of 4:2:0 subsampled jpegs, the largest in common use. Borders that are a multiple of it can be cropped
+# losslessly from any common jpeg.
+MAX_MCU_SIZE = 16
+EXIF_IFDS = ["0th", "Exif", "GPS", "Interop", "1st"]
+
+
+def get_jpegtran_path():
+    return shutil.which("jpegtran")
+
+
+def get_mcu_size(img: Image.Image):
+    """
+    :return: (width, height) of the image's MCUs, or None if the image isn't a jpeg
+    """
+    layers = getattr(img, "layer", None)
+    if img.format != "JPEG" or not layers:
+        return None
+    if len(layers) == 1:
+        # Single component images aren't interleaved, so each block is its own MCU
+        return DCT_BLOCK_SIZE, DCT_BLOCK_SIZE
+    return max(layer[1] for layer in layers) * DCT_BLOCK_SIZE, max(layer[2] for layer in layers) * DCT_BLOCK_SIZE
+
+
+def is_mcu_aligned(img: Image.Image, box):
+    """
+    The right and bottom edges of a crop don't need to be aligned, jpegtran keeps partial MCUs at the edges
+    """
+    mcu_size = get_mcu_size(img)
+    return mcu_size is not None and box[0] % mcu_size[0] == 0 and box[1] % mcu_size[1] == 0
+
+
+def crop_losslessly(image_path, output_path, box, jpegtran_path):
+    left, top, right, bottom = box
+    subprocess.run([jpegtran_path, "-copy", "all", "-crop", f"{right - left}x{bottom - top}+{left}+{top}",
+                    "-outfile", output_path, image_path], check=True, capture_output=True)
+    expected_size = (right - left, bottom - top)
+    with Image.open(output_path) as cropped_img:
+        if cropped_img.size != expected_size:
+            raise OSError(f"jpegtran cropped '{image_path}' to {cropped_img.size} instead of {expected_size}")
+
+
+def get_lossless_border(border):
+    """
+    :return: Nearest border to the given border that can be cropped losslessly
+    """
+    return round(border / MAX_MCU_SIZE) * MAX_MCU_SIZE
+
+
+def load_exif(img: Image.Image):
+    try:
+        return piexif.load(img.info.get("exif", b""))
+    except Exception:
+        return {ifd: {} for ifd in EXIF_IFDS}
+
+
+def crop_image_border(image_path, output_path, border, gps_ifd=None, quality=100):
+    """
+    Crops border pixels off every edge of the image. The EXIF of the image is kept.
+    :param gps_ifd: piexif GPS IFD replacing the image's GPS tags
+    :param quality: Jpeg quality when the crop can't be done losslessly
+    :return: Crop method used
+    """
+    with Image.open(image_path) as img:
+        width, height = img.size
+        box = (border, border, width - border, height - border)
+        exif_dict = load_exif(img)
+        if gps_ifd is not None:
+            exif_dict["GPS"] = gps_ifd
+        exif_bytes = piexif.dump(exif_dict)
+
+        jpegtran_path = get_jpegtran_path()
+        if jpegtran_path and is_mcu_aligned(img, box):
+            try:
+                crop_losslessly(image_path, output_path, box, jpegtran_path)
+                piexif.insert(exif_bytes, output_path)
+                return CROP_METHOD_LOSSLESS
+            except (OSError, ValueError, subprocess.CalledProcessError) as ex:
+                print(f"Lossless crop of '{image_path}' failed, re-encoding instead: {ex}")
+                if os.path.exists(output_path):
+                    os.remove(output_path)
+
+        img.crop(box).save(output_path, quality=quality, exif=exif_bytes)
+        return CROP_METHOD_REENCODE
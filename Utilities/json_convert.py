@@ -1,4 +1,6 @@
 import json
+import os
+import threading
 
 
 class JsonConvert(object):
@@ -13,21 +15,31 @@ class JsonConvert(object):
             # Raise exception instead of silently returning None
             raise ValueError('Unable to find a matching class for object: {!s}'.format(d))
 
+    @staticmethod
+    def get_attributes(obj):
+        """
+        Attributes of an object, including attributes stored in slots.
+        """
+        if hasattr(obj, '__dict__'):
+            return obj.__dict__
+        slots = [slot for cls in type(obj).__mro__ for slot in getattr(cls, '__slots__', ())]
+        return {slot: getattr(obj, slot) for slot in slots if hasattr(obj, slot)}
+
     @classmethod
     def complex_handler(clsself, Obj):
-        if hasattr(Obj, '__dict__'):
-            return Obj.__dict__
+        if hasattr(Obj, '__dict__') or hasattr(Obj, '__slots__'):
+            return clsself.get_attributes(Obj)
         else:
             raise TypeError('Object of type %s with value of %s is not JSON serializable' % (type(Obj), repr(Obj)))
 
     @classmethod
     def register(clsself, cls):
-        clsself.mappings[frozenset(tuple([attr for attr, val in cls().__dict__.items()]))] = cls
+        clsself.mappings[frozenset(tuple([attr for attr, val in clsself.get_attributes(cls()).items()]))] = cls
         return cls
 
     @classmethod
     def to_json(clsself, obj):
-        return json.dumps(obj.__dict__, default=clsself.complex_handler, indent=4)
+        return json.dumps(clsself.get_attributes(obj), default=clsself.complex_handler, indent=4)
 
     @classmethod
     def from_json(clsself, json_str):
@@ -35,8 +47,11 @@ class JsonConvert(object):
 
     @classmethod
     def to_file(clsself, obj, path):
-        with open(path, 'w') as jfile:
+        # Written to a temporary file first, so processes reading the file never see a partially written file
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as jfile:
             jfile.writelines([clsself.to_json(obj)])
+        os.replace(tmp_path, path)
         return path
 
     @classmethod
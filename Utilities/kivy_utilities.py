@@ -1,4 +1,5 @@
 from kivy.graphics import Rectangle
+from kivy.graphics.texture import Texture
 
 
 def set_background_color(widget, color):
@@ -19,6 +20,16 @@ def get_standard_image_coordinates(coordinates, resolution):
     return x, height-y
 
 
+def create_rgb_texture(data: bytes, size):
+    """
+    Creates a texture from raw RGB pixel data with its origin at the top left.
+    """
+    texture = Texture.create(size=size, colorfmt='rgb')
+    texture.blit_buffer(data, colorfmt='rgb', bufferfmt='ubyte')
+    texture.flip_vertical()
+    return texture
+
+
 def switch_scene(obj, scene, direction="left", duration=.5):
     manager = obj.manager
     if manager.current != scene:
@@ -2,14 +2,53 @@ import csv
 
 
 class PathMapping(dict):
+    """
+    Mapping of original paths to current paths. Current paths are indexed, so looking up the original path of a
+    current path doesn't scan the mapping. Current paths are expected to be unique.
+    """
 
     csv_headers = ["Original Path", "New Path"]
 
     def __init__(self, *args):
-        super().__init__(*args)
+        super().__init__()
+        self.original_paths = {}
+        self.update(*args)
+
+    def __setitem__(self, original_path, current_path):
+        if original_path in self:
+            self.original_paths.pop(self[original_path], None)
+        super().__setitem__(original_path, current_path)
+        self.original_paths[current_path] = original_path
+
+    def __delitem__(self, original_path):
+        self.original_paths.pop(self[original_path], None)
+        super().__delitem__(original_path)
+
+    def update(self, *args, **kwargs):
+        for original_path, current_path in dict(*args, **kwargs).items():
+            self[original_path] = current_path
+
+    def pop(self, original_path, *default):
+        if original_path in self:
+            self.original_paths.pop(self[original_path], None)
+        return super().pop(original_path, *default)
+
+    def popitem(self):
+        original_path, current_path = super().popitem()
+        self.original_paths.pop(current_path, None)
+        return original_path, current_path
+
+    def setdefault(self, original_path, current_path=None):
+        if original_path not in self:
+            self[original_path] = current_path
+        return self[original_path]
+
+    def clear(self):
+        super().clear()
+        self.original_paths.clear()
 
     def get_original_path(self, current_path):
-        return next(key for key, value in self.items() if value == current_path)
+        return self.original_paths.get(current_path)
 
     def remove_path(self, current_path):
         key = self.get_original_path(current_path)
@@ -18,13 +57,13 @@ class PathMapping(dict):
         self.pop(key)
 
     def add_path(self, original_path, current_path):
-        self.update({original_path: current_path})
+        self[original_path] = current_path
 
     def update_path(self, current_path, new_path):
-        key = next(key for key, value in self.items() if value == current_path)
+        key = self.get_original_path(current_path)
         if key is None:
             raise Exception(f"Could not find path mapping for {current_path}.")
-        self.update({key: new_path})
+        self[key] = new_path
 
     def save(self, file_path):
         with open(file_path, "w", newline="") as csv_file:
@@ -0,0 +1,293 @@
+import contextvars
+import csv
+import functools
+import json
+import os
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from os.path import join
+from time import perf_counter
+
+PROFILE_SAMPLERS = ["cprofile", "pyinstrument"]
+
+# Id of the run that stages timed in the current thread belong to
+_current_run_id = contextvars.ContextVar("current_profile_run_id", default=None)
+
+
+class StageTiming:
+    """
+    Accumulated wall clock time of one processing stage
+    """
+
+    __slots__ = ["name", "calls", "items", "total", "min", "max"]
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.items = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, elapsed, items=1):
+        self.calls += 1
+        self.items += items
+        self.total += elapsed
+        self.min = elapsed if self.min is None else min(self.min, elapsed)
+        self.max = elapsed if self.max is None else max(self.max, elapsed)
+
+    @property
+    def mean(self):
+        return self.total / self.calls if self.calls else 0
+
+    @property
+    def rate(self):
+        """
+        Items processed per second
+        """
+        return self.items / self.total if self.total else None
+
+    def to_dict(self, wall_time=None):
+        return {
+            "stage": self.name,
+            "calls": self.calls,
+            "items": self.items,
+            "total_s": round(self.total, 4),
+            "mean_s": round(self.mean, 6),
+            "min_s": round(self.min or 0, 6),
+            "max_s": round(self.max or 0, 6),
+            "items_per_s": round(self.rate, 3) if self.rate is not None else None,
+            "percent_of_run": round(100 * self.total / wall_time, 2) if wall_time else None,
+        }
+
+
+class Profiler:
+    """
+    Lightweight timers and counters for processing stages. Stages are timed with the profile_stage decorator or the
+    stage context manager and accumulate until the run ends, when a json/csv profile of where the run's time went is
+    written. Optionally also runs cProfile or pyinstrument for the duration of a run.
+    Stages nest, so the time of a stage includes the time of the stages it calls. Only stages timed on the thread that
+    started the run, or in work it hands to other threads with in_current_run, are recorded. Stages timed outside of
+    a run (e.g. GUI saves while a command runs on another thread) are ignored.
+    """
+
+    _instance = None
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.counters = Counter()
+        self.run_name = None
+        self.run_id = None
+        self.run_started = None
+        self.run_start_time = None
+        self.sampler_name = None
+        self.sampler = None
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            cls._instance = Profiler()
+        return cls._instance
+
+    @property
+    def is_running(self):
+        return self.run_name is not None
+
+    @property
+    def is_recording(self):
+        """
+        True if a run is active and the current thread belongs to it
+        """
+        return self.run_id is not None and _current_run_id.get() is self.run_id
+
+    @contextmanager
+    def stage(self, name, items=1):
+        start_time = perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, perf_counter() - start_time, items)
+
+    def record(self, name, elapsed, items=1):
+        if not self.is_recording:
+            return
+        with self.lock:
+            stage = self.stages.get(name)
+            if stage is None:
+                stage = self.stages[name] = StageTiming(name)
+            stage.add(elapsed, items)
+
+    def count(self, name, amount=1):
+        if not self.is_recording:
+            return
+        with self.lock:
+            self.counters[name] += amount
+
+    def reset(self):
+        with self.lock:
+            self.stages = {}
+            self.counters = Counter()
+
+    def start_run(self, run_name, sampler=None):
+        """
+        Clears stage timings and starts timing a run on the calling thread.
+        :param sampler: Optional call profiler to run alongside the stage timers: 'cprofile' or 'pyinstrument'.
+        Only calls made on the thread starting the run are sampled.
+        """
+        self.reset()
+        self.run_name = run_name
+        self.run_id = object()
+        _current_run_id.set(self.run_id)
+        self.run_started = datetime.now()
+        self.run_start_time = perf_counter()
+        self.start_sampler(sampler)
+
+    def end_run(self, output_dir=None):
+        """
+        Stops timing the run and writes its profile.
+        :param output_dir: Directory the profile is written to. Nothing is written if None.
+        :return: Paths of the written profile files
+        """
+        wall_time = perf_counter() - self.run_start_time
+        try:
+            if output_dir is None:
+                self.stop_sampler()
+                return []
+            os.makedirs(output_dir, exist_ok=True)
+            base_path = join(output_dir, f"Profile({self.run_name})_{self.run_started.strftime('%Y%m%d_%H%M%S')}")
+            file_paths = self.stop_sampler(base_path)
+            return [self.save_json(base_path + ".json", wall_time), self.save_csv(base_path + ".csv", wall_time)] \
+                + file_paths
+        finally:
+            self.sampler = None
+            self.run_name = None
+            self.run_id = None
+
+    def get_report(self, wall_time=None):
+        with self.lock:
+            stages = sorted(self.stages.values(), key=lambda stage: stage.total, reverse=True)
+            return {
+                "run": self.run_name,
+                "started": self.run_started.isoformat(timespec="seconds") if self.run_started else None,
+                "wall_time_s": round(wall_time, 4) if wall_time is not None else None,
+                "sampler": self.sampler_name,
+                "stages": [stage.to_dict(wall_time) for stage in stages],
+                "counters": dict(self.counters),
+            }
+
+    def save_json(self, file_path, wall_time=None):
+        with open(file_path, "w") as f:
+            json.dump(self.get_report(wall_time), f, indent=2)
+        return file_path
+
+    def save_csv(self, file_path, wall_time=None):
+        stages = self.get_report(wall_time)["stages"]
+        headers = list(StageTiming("").to_dict().keys())
+        with open(file_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=headers)
+            writer.writeheader()
+            writer.writerows(stages)
+        return file_path
+
+    def start_sampler(self, sampler=None):
+        self.sampler_name, self.sampler = None, None
+        if not sampler:
+            return
+        if sampler == "cprofile":
+            import cProfile
+            self.sampler = cProfile.Profile()
+            self.sampler.enable()
+        elif sampler == "pyinstrument":
+            try:
+                import pyinstrument
+            except ImportError:
+                print("Unable to start pyinstrument profiler: pyinstrument is not installed.")
+                return
+            self.sampler = pyinstrument.Profiler()
+            self.sampler.start()
+        else:
+            raise Exception(f"Unknown profiler: '{sampler}'. Must be one of: {PROFILE_SAMPLERS}")
+        self.sampler_name = sampler
+
+    def stop_sampler(self, base_path=None):
+        """
+        :return: Paths of the written sampler output
+        """
+        if self.sampler is None:
+            return []
+        sampler, self.sampler = self.sampler, None
+        if self.sampler_name == "cprofile":
+            sampler.disable()
+            file_path = base_path and base_path + ".prof"
+            if file_path:
+                sampler.dump_stats(file_path)
+        else:
+            sampler.stop()
+            file_path = base_path and base_path + ".html"
+            if file_path:
+                with open(file_path, "w") as f:
+                    f.write(sampler.output_html())
+        return [file_path] if file_path else []
+
+
+def profile_stage(name):
+    """
+    Decorator timing every call of a function as a processing stage
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Profiler.instance().stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def in_current_run(func):
+    """
+    Wraps a function so stages it times on other threads (e.g. in a thread pool) are recorded in the calling thread's
+    run
+    """
+    run_id = _current_run_id.get()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _current_run_id.set(run_id)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current_run_id.reset(token)
+    return wrapper
+
+
+@contextmanager
+def profile_run(run_name, get_output_dir, sampler=None, enabled=True):
+    """
+    Times a run and writes its profile once it completes or fails. Runs inside another run are timed as part of the
+    outer run, runs started on another thread while a run is active aren't timed.
+    :param get_output_dir: Returns the directory to write the profile to once the run ends, or None to skip writing
+    :param sampler: Optional call profiler, see Profiler.start_run
+    :param enabled: Set False to skip profiling
+    """
+    profiler = Profiler.instance()
+    if not enabled or profiler.is_running:
+        yield profiler
+        return
+    profiler.start_run(run_name, sampler=sampler)
+    try:
+        yield profiler
+    finally:
+        try:
+            output_dir = get_output_dir()
+        except Exception as ex:
+            print(f"Unable to locate output directory for profile of run '{run_name}'. Error: {ex}")
+            output_dir = None
+        try:
+            file_paths = profiler.end_run(output_dir)
+            if file_paths:
+                print(f"Saved processing profile: {file_paths[0]}")
+        except Exception as ex:
+            print(f"Error saving processing profile for run '{run_name}'. Error: {ex}")
@@ -0,0 +1,72 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+
+class SurveySaveWorker:
+    """
+    Saves surveys on a background thread, so large saves don't block the GUI. A snapshot of the survey is taken when
+    a save is requested and written while the survey keeps being edited. Requests made while a save is running are
+    coalesced into a single save of the latest state once it completes.
+    """
+
+    def __init__(self, run_on_main_thread=None):
+        """
+        :param run_on_main_thread: Schedules a task on the thread saves are requested from, e.g. Clock.schedule_once.
+        Without it, completion is handled on the worker thread.
+        """
+        self.run_on_main_thread = run_on_main_thread or (lambda task: task())
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.is_saving = False
+        self.pending_save = None
+        self.idle = threading.Event()
+        self.idle.set()
+
+    def save(self, survey, callback=None):
+        """
+        Snapshots a survey on the calling thread and writes it on the worker thread.
+        :param callback: Called on the main thread with (survey, error) after saving. Error is None if saved. Callbacks
+        of coalesced requests are all called once the coalesced save completes.
+        :return: False if the save was queued behind a running save
+        """
+        callbacks = [] if callback is None else [callback]
+        if self.is_saving:
+            if self.pending_save is not None:
+                callbacks = self.pending_save[1] + callbacks
+            self.pending_save = (survey, callbacks)
+            return False
+        self.start_save(survey, callbacks)
+        return True
+
+    def start_save(self, survey, callbacks):
+        self.is_saving = True
+        self.idle.clear()
+        self.executor.submit(self.write_snapshot, survey, survey.create_snapshot(), callbacks)
+
+    def write_snapshot(self, survey, snapshot, callbacks):
+        error = None
+        try:
+            snapshot.save()
+        except Exception as ex:
+            print(f"Error saving survey '{survey}'. Error: {ex}")
+            error = ex
+        self.run_on_main_thread(partial(self.on_save_complete, survey, callbacks, error))
+
+    def on_save_complete(self, survey, callbacks, error, *args):
+        self.is_saving = False
+        for callback in callbacks:
+            callback(survey, error)
+        if self.pending_save is not None:
+            pending_survey, pending_callbacks = self.pending_save
+            self.pending_save = None
+            self.start_save(pending_survey, pending_callbacks)
+        if not self.is_saving:
+            self.idle.set()
+
+    def wait(self, timeout=None):
+        """
+        Waits for the running save and any pending save to complete. Must not be called from the main thread when
+        completion is handled on the main thread.
+        :return: False if the timeout expired first
+        """
+        return self.idle.wait(timeout)
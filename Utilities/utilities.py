@@ -1,6 +1,7 @@
 import asyncio
 import copy
 import csv
+import hashlib
 import math
 import os
 import shutil
@@ -15,6 +16,8 @@ from os.path import exists, join, realpath
 from datetime import datetime
 from pathlib import Path
 
+FEET_PER_METER = 3.28084
+
 
 class PromptUserNotification:
 
@@ -148,7 +151,7 @@ def get_datetime_str(format="%m%d%Y-%H%M%S"):
 
 
 def meters_to_feet(meters):
-    return float(meters) * 3.28084
+    return float(meters) * FEET_PER_METER
 
 
 def print_title(text):
@@ -178,6 +181,21 @@ def get_file_name_without_extension(file_path):
     return Path(file_path).stem
 
 
+def get_file_hash(path, chunk_size=1024 * 1024):
+    file_hash = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def get_xml_tag(element):
+    """
+    Element tag name without namespace
+    """
+    return element.tag.rsplit('}', 1)[-1]
+
+
 def get_normalized_pixel_pos(pos, resolution):
     return pos[0]/resolution[0], pos[1]/resolution[1]
 
@@ -222,6 +240,26 @@ def bearing_within_target_threshold(bearing, target, threshold):
         return bearing >= threshold_low or bearing <= threshold_high
 
 
+def format_compass_bearings(degrees):
+    """
+    Vectorized format_compass_bearing for numpy arrays of bearings.
+    """
+    degrees = numpy.mod(degrees, 360)
+    return numpy.where(degrees > 180, degrees - 360, degrees)
+
+
+def bearings_within_target_threshold(bearings, targets, threshold):
+    """
+    Vectorized bearing_within_target_threshold. Bearings and targets can be arrays (of equal shape) or scalars.
+    """
+    bearings = format_compass_bearings(numpy.asarray(bearings, dtype=float))
+    threshold_low = format_compass_bearings(numpy.asarray(targets, dtype=float) - threshold)
+    threshold_high = format_compass_bearings(numpy.asarray(targets, dtype=float) + threshold)
+    within_range = (threshold_low <= bearings) & (bearings <= threshold_high)
+    within_wrapped_range = (bearings >= threshold_low) | (bearings <= threshold_high)
+    return numpy.where(threshold_low <= threshold_high, within_range, within_wrapped_range)
+
+
 def get_loaded_modules():
     return sorted(sys.modules.keys())
 
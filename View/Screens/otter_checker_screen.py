@@ -25,6 +25,7 @@ from View.Elements.rounded_card import RoundedCard
 from View.Elements.transparent_icon_button import TransparentIconButton
 from View.Elements.wide_icon_button import WideIconButton
 from View.Widgets.annotation_image import AnnotationImage
+from View.Widgets.chip_grid_panel import ChipGridPanel
 from View.Widgets.current_image_info_header import CurrentImageInfoHeader
 from View.Widgets.filter_settings_card import FilterSettingsCard
 from View.Widgets.image_info_card import ImageInfoCard
@@ -60,6 +61,7 @@ class OtterCheckerScreen(SurveyScreenBase):
     # Panels
     navigation_panel = None
     image_overlay_control_panel = None
+    image_stencil_box = None
 
     def __init__(self, controller: SeeOtterController, survey_images: List[SurveyImage] = None, **kwargs):
         super().__init__(**kwargs)
@@ -67,6 +69,7 @@ class OtterCheckerScreen(SurveyScreenBase):
         self.survey_images = survey_images
         self.controller: SeeOtterController = controller
         self.image_panel = AnnotationImage(controller)
+        self.chip_grid_panel = ChipGridPanel(controller)
         self.left_panel = self.build_left_panel()
         self.top_button_panel = self.build_top_button_panel()
         self.right_panel = self.build_right_panel()
@@ -106,9 +109,9 @@ class OtterCheckerScreen(SurveyScreenBase):
     def build_right_panel(self):
         right_panel = BoxLayout(orientation="vertical")
         right_panel.add_widget(self.top_button_panel)
-        stencil_box = BoxStencil()
-        stencil_box.add_widget(self.image_panel)
-        right_panel.add_widget(stencil_box)
+        self.image_stencil_box = BoxStencil()
+        self.image_stencil_box.add_widget(self.image_panel)
+        right_panel.add_widget(self.image_stencil_box)
         return right_panel
 
     def build_left_panel(self):
@@ -124,11 +127,14 @@ class OtterCheckerScreen(SurveyScreenBase):
                                                         icon="image-filter-center-focus-strong",
                                                         tooltip="Pan to selected annotation",
                                                         size_hint_x=None, width=60)
+        chip_grid_button = TransparentIconButton(callback=self.controller.toggle_grid_mode, icon="view-grid",
+                                                 tooltip="Toggle chip grid validation", size_hint_x=None, width=60)
         bottom_panel = MDBoxLayout(orientation="horizontal", size_hint=(1, None), height=35)
         bottom_panel.add_widget(self.zoom_label)
         bottom_panel.add_widget(self.toggle_grid_button)
         bottom_panel.add_widget(center_image_button)
         bottom_panel.add_widget(focus_annotation_button)
+        bottom_panel.add_widget(chip_grid_button)
         left_panel.add_widget(FilterSettingsCard(self.controller.filter_controller,
                                                  lambda x: self.navigation_drawer.set_state("open")))
         left_panel.add_widget(ImageInfoCard(self.controller))
@@ -206,6 +212,9 @@ class OtterCheckerScreen(SurveyScreenBase):
         self.program_status_popup = ProgramStatusPopup(controller=self.controller)
 
     def handle_key_down(self, keyboard, keycode, text, modifiers, *args):
+        if self.controller.grid_mode:
+            self.handle_grid_mode_key_down(keycode)
+            return
         if keycode == KeyBinding.HIDE_ANNOTATIONS:
             self.image_panel.annotations_visible = False
         if keycode == KeyBinding.EDIT_ANNOTATIONS:
@@ -231,12 +240,38 @@ class OtterCheckerScreen(SurveyScreenBase):
         if keycode == KeyBinding.VALIDATE_AMBIGUOUS:
             self.validation_buttons.on_ambiguous_validation_pressed()
 
+    def handle_grid_mode_key_down(self, keycode):
+        if keycode == KeyBinding.PREVIOUS_PREDICTION:
+            self.controller.previous_grid_prediction()
+        if keycode == KeyBinding.NEXT_PREDICTION:
+            self.controller.next_grid_prediction()
+        if keycode == KeyBinding.NEXT_IMAGE:
+            self.controller.next_grid_page()
+        if keycode == KeyBinding.PREVIOUS_IMAGE:
+            self.controller.previous_grid_page()
+        if keycode == KeyBinding.VALIDATE_CORRECT:
+            self.controller.validate_current_selection(ValidationState.CORRECT)
+        if keycode == KeyBinding.VALIDATE_INCORRECT:
+            self.controller.validate_current_selection(ValidationState.INCORRECT)
+        if keycode == KeyBinding.VALIDATE_AMBIGUOUS:
+            self.validation_buttons.on_ambiguous_validation_pressed()
+
     def handle_key_up(self, keyboard, keycode, text, *args):
         if keycode == KeyBinding.HIDE_ANNOTATIONS:
             self.image_panel.annotations_visible = True
         if keycode == KeyBinding.EDIT_ANNOTATIONS:
             self.image_panel.mode = OTTER_CHECKER_MODE.DEFAULT
 
+    def on_grid_mode_changed(self, *args):
+        self.image_stencil_box.clear_widgets()
+        if self.controller.grid_mode:
+            self.image_stencil_box.add_widget(self.chip_grid_panel)
+            self.chip_grid_panel.show_page()
+            self.navigation_panel.disabled = True
+        else:
+            self.image_stencil_box.add_widget(self.image_panel)
+            self.navigation_panel.disabled = False
+
     def on_mode_changed(self, *args):
         if self.controller.default_mode:
             self.left_panel.disabled = False
@@ -264,6 +299,7 @@ class OtterCheckerScreen(SurveyScreenBase):
         self.image_panel.event.bind(on_zoom_level_changed=self.update_zoom_label)
         self.controller.bind(current_image=self.tags_card.update_tag_state)
         self.controller.bind(mode=self.on_mode_changed)
+        self.controller.bind(grid_mode=self.on_grid_mode_changed)
         self.controller.bind(survey=self.on_survey_changed)
 
     def on_enter(self, *args, **kwargs):
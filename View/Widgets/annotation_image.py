@@ -11,6 +11,7 @@ from SurveyEntities.survey_image import SurveyImage
 from View.Elements.annotation_box import AnnotationBox
 from View.Elements.gridlines import GridLines
 from View.Widgets.pannable_image import PannableImage
+from config import IMAGE_CACHE_DIR
 
 
 class AnnotationImage(PannableImage):
@@ -23,21 +24,33 @@ class AnnotationImage(PannableImage):
     def __init__(self, controller: SeeOtterControllerBase, **kwargs):
         self.controller = controller
         self.annotations = []
+        self.tile_size = self.controller.config.IMAGE_TILE_SIZE
+        self.image_cache.set_max_memory_mb(self.controller.config.IMAGE_CACHE_MEMORY_MB)
         super(AnnotationImage, self).__init__(**kwargs)
         self.gridlines = GridLines()
         self.bind_events()
 
+    @property
+    def image_cache_dir(self):
+        if self.controller.survey is None or not self.controller.config.USE_IMAGE_TILE_CACHE:
+            return None
+        return self.controller.survey.get_relative_path(IMAGE_CACHE_DIR)
+
     def on_current_image_changed(self, instance, value):
         self.is_new_image = True
+        cache_dir = None
         if isinstance(value, SurveyImage):
             path = value.file_path
+            cache_dir = self.image_cache_dir
         elif isinstance(value, str):
             path = value
         else:
             raise Exception(f"Invalid type. Value: {value}, Type: {type(value)}. Must be SurveyImage or String.")
-        self.set_image(path)
+        self.set_image(path, cache_dir=cache_dir)
         self.gridlines.initialize_grid()
         self.event.image_changed()
+        self.prefetch_images([image.file_path for image in self.controller.get_images_to_prefetch()],
+                             cache_dir=cache_dir)
 
     def on_current_prediction_changed(self, instance, value):
         prediction: ObjectPredictionData = value
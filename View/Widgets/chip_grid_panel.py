@@ -0,0 +1,134 @@
+from kivy.graphics import Color, Line
+from kivy.uix.gridlayout import GridLayout
+from kivy.uix.image import Image
+from kivymd.uix.boxlayout import MDBoxLayout
+from kivymd.uix.label import MDLabel
+from Controller.see_otter_controller_base import SeeOtterControllerBase
+from SurveyEntities.object_prediction_data import ObjectPredictionData
+from Utilities.kivy_utilities import create_rgb_texture
+from View.Elements.transparent_icon_button import TransparentIconButton
+
+MISSING_CHIP_COLOR = (.15, .15, .17, 1)
+
+
+class ChipTile(Image):
+    """
+    Displays the chip of a single prediction, outlined in the color of its validation state.
+    """
+
+    def __init__(self, controller: SeeOtterControllerBase, **kwargs):
+        super().__init__(allow_stretch=True, keep_ratio=True, **kwargs)
+        self.controller = controller
+        self.prediction = None
+        self.chip_box = None
+        self.is_selected = False
+        self.bind(pos=self.redraw, size=self.redraw)
+
+    def set_prediction(self, prediction: ObjectPredictionData):
+        self.prediction = prediction
+        self.chip_box = None
+        chip_store = self.controller.chip_store
+        chip = chip_store.get_chip(prediction) if prediction and chip_store else None
+        if chip is not None:
+            self.texture = create_rgb_texture(chip.tobytes(), (chip_store.chip_size, chip_store.chip_size))
+            self.color = (1, 1, 1, 1)
+            self.chip_box = chip_store.get_chip_box(prediction)
+        else:
+            self.texture = None
+            self.color = MISSING_CHIP_COLOR if prediction else (0, 0, 0, 0)
+        self.redraw()
+
+    def redraw(self, *args):
+        self.canvas.after.clear()
+        if self.prediction is None:
+            return
+        image_width, image_height = self.norm_image_size
+        x, y = self.center_x - image_width / 2, self.center_y - image_height / 2
+        config = self.controller.config
+        with self.canvas.after:
+            if self.chip_box:
+                scale = image_width / self.controller.chip_store.chip_size
+                xmin, ymin, xmax, ymax = self.chip_box
+                Color(*config.get_validation_color(self.prediction.validation_state))
+                Line(width=1, rectangle=(x + xmin * scale, y + image_height - ymax * scale,
+                                         (xmax - xmin) * scale, (ymax - ymin) * scale))
+            if self.is_selected:
+                Color(*config.ANNOTATION_SELECTED_COLOR)
+            else:
+                Color(*config.get_validation_color(self.prediction.validation_state))
+            Line(width=3 if self.is_selected else 2, rectangle=(x, y, image_width, image_height))
+
+    def on_touch_down(self, touch):
+        if self.prediction is None or not self.collide_point(*touch.pos):
+            return super().on_touch_down(touch)
+        if touch.is_double_tap:
+            self.controller.open_grid_prediction(self.prediction)
+        else:
+            self.controller.set_current_grid_prediction(self.prediction)
+        return True
+
+
+class ChipGridPanel(MDBoxLayout):
+    """
+    Pages through the chips of the filtered predictions in a grid, so predictions can be validated without loading
+    full images. Double clicking a chip opens the prediction in the full image.
+    """
+
+    def __init__(self, controller: SeeOtterControllerBase, **kwargs):
+        super().__init__(orientation="vertical", padding=10, spacing=10, **kwargs)
+        self.controller = controller
+        self.page_idx = None
+        self.page_label = None
+        self.tiles = []
+        self.build()
+        self.bind_events()
+
+    def build(self):
+        config = self.controller.config
+        header = MDBoxLayout(orientation="horizontal", size_hint=(1, None), height=40)
+        self.page_label = MDLabel(text="", halign="center")
+        header.add_widget(TransparentIconButton(callback=self.controller.previous_grid_page, icon="chevron-left",
+                                                tooltip="Previous Page"))
+        header.add_widget(self.page_label)
+        header.add_widget(TransparentIconButton(callback=self.controller.next_grid_page, icon="chevron-right",
+                                                tooltip="Next Page"))
+        grid = GridLayout(cols=config.GRID_VALIDATION_COLUMNS, rows=config.GRID_VALIDATION_ROWS, spacing=6)
+        self.tiles = [ChipTile(self.controller) for _ in range(self.controller.grid_page_size)]
+        for tile in self.tiles:
+            grid.add_widget(tile)
+        self.add_widget(header)
+        self.add_widget(grid)
+
+    def bind_events(self):
+        self.controller.bind(grid_predictions=self.show_page)
+        self.controller.bind(grid_prediction_idx=self.on_grid_prediction_idx_changed)
+
+    def on_grid_prediction_idx_changed(self, *args):
+        if self.controller.grid_page_idx != self.page_idx:
+            self.show_page()
+        else:
+            self.redraw_tiles()
+
+    def show_page(self, *args):
+        self.page_idx = self.controller.grid_page_idx
+        page_start = self.page_idx * self.controller.grid_page_size
+        predictions = self.controller.grid_predictions[page_start:page_start + len(self.tiles)]
+        for i, tile in enumerate(self.tiles):
+            tile.set_prediction(predictions[i] if i < len(predictions) else None)
+        self.redraw_tiles()
+
+    def redraw_tiles(self, *args):
+        current_grid_prediction = self.controller.current_grid_prediction
+        for tile in self.tiles:
+            tile.is_selected = tile.prediction is not None and tile.prediction is current_grid_prediction
+            tile.redraw()
+        self.update_page_label()
+
+    def update_page_label(self):
+        num_predictions = len(self.controller.grid_predictions)
+        page_size = self.controller.grid_page_size
+        num_pages = max(1, -(-num_predictions // page_size))
+        num_validated = len([prediction for prediction in self.controller.grid_predictions
+                             if prediction.is_validated])
+        self.page_label.text = f"Page {self.page_idx + 1}/{num_pages}    " \
+                               f"Validated: {num_validated}/{num_predictions}"
@@ -1,5 +1,6 @@
 import PIL
 import kivy
+from functools import partial
 from os.path import exists
 from kivy.animation import Animation
 from kivy.clock import Clock
@@ -9,8 +10,11 @@ from kivy.uix.image import Image
 from kivy.app import App
 from kivy.uix.stencilview import StencilView
 from kivy.uix.widget import Widget
-from kivy.graphics import Rectangle, Color, StencilPush, StencilUse, StencilUnUse, StencilPop, Ellipse
-from Utilities.kivy_utilities import get_kivy_coordinates, get_standard_image_coordinates
+from kivy.graphics import Rectangle, Color, StencilPush, StencilUse, StencilUnUse, StencilPop, Ellipse, \
+    InstructionGroup
+from Utilities.image_cache import ImageCache, ImagePrefetcher
+from Utilities.image_pyramid import ImagePyramid, DEFAULT_TILE_SIZE
+from Utilities.kivy_utilities import get_kivy_coordinates, get_standard_image_coordinates, create_rgb_texture
 from Utilities.utilities import get_root_path
 from View.Events.pannable_image_event_dispatcher import PannableImageEventDispatcher
 
@@ -24,6 +28,10 @@ class PannableImage(Widget):
     zoom_in_factor = .75
     zoom_out_factor = 1.25
     background_image = get_root_path("View/Images/OtterCheckerBackground1.jpg")
+    tile_size = DEFAULT_TILE_SIZE
+    # Decoded images and image pyramids are loaded one at a time in the background
+    image_cache = ImageCache()
+    image_prefetcher = ImagePrefetcher(image_cache)
 
     def __init__(self, **kwargs):
         super(PannableImage, self).__init__(**kwargs)
@@ -35,6 +43,9 @@ class PannableImage(Widget):
         self.mouse_click_offset = (0, 0)
         self.image = None
         self.image_path = None
+        self.image_pyramid: ImagePyramid = None
+        self.tiles = {}
+        self.tile_group = InstructionGroup()
         self.is_dragging = False
         self.disable_panning = False
 
@@ -58,19 +69,40 @@ class PannableImage(Widget):
             StencilUse()
             Color(1, 1, 1, 1)  # set the colour
             self.canvas.add(self.image)
+            self.canvas.add(self.tile_group)
             StencilUnUse()
             self.canvas.add(mask)
             StencilPop()
 
     def bind_events(self):
         self.event.bind(on_image_changed=self.refresh_actual_zoom_level)
+        self.event.bind(on_image_changed=self.refresh_tiles)
         self.bind(size=self.update_mask)
-
-    def set_image(self, path):
+        self.bind(size=self.refresh_tiles)
+
+    def set_image(self, path, cache_dir=None):
+        """
+        Sets the displayed image. If a cache dir is given the image is displayed from a tiled image pyramid,
+        where only the tiles visible at the current zoom and position are loaded. When no pyramid has been
+        cached yet, the full image is displayed while the pyramid is generated in the background. Images
+        already decoded by the prefetcher are displayed from memory.
+        """
         print("Set Image")
         self.image_path = path
-        self.resolution = self.get_resolution(self.image_path)
-        self.image = Rectangle(source=path, size_hint=(None, None), size=self.resolution)
+        self.clear_tiles()
+        self.image_pyramid = self.load_image_pyramid(path, cache_dir)
+        cached_image = self.image_cache.get(path) if self.image_pyramid is None else None
+        if self.image_pyramid:
+            self.resolution = self.image_pyramid.resolution
+            self.image = Rectangle(source=self.image_pyramid.overview_tile_path, size_hint=(None, None),
+                                   size=self.resolution)
+        elif cached_image:
+            self.resolution = cached_image.size
+            self.image = Rectangle(texture=create_rgb_texture(cached_image.data, cached_image.size),
+                                   size_hint=(None, None), size=self.resolution)
+        else:
+            self.resolution = self.get_resolution(self.image_path)
+            self.image = Rectangle(source=path, size_hint=(None, None), size=self.resolution)
         self.aspect_ratio = self.image.size[0] / self.image.size[1]
         if self.current_image_is_background:
             self.stretch_image()
@@ -78,6 +110,66 @@ class PannableImage(Widget):
             self.fit_image()
         self.update_mask()
 
+    def prefetch_images(self, paths, cache_dir=None):
+        """
+        Loads upcoming images in the background so that displaying them does not wait on disk and decode.
+        :param paths: Image paths in priority order
+        """
+        self.image_prefetcher.prefetch([path for path in paths if path != self.image_path], cache_dir=cache_dir,
+                                       tile_size=self.tile_size)
+
+    def load_image_pyramid(self, path, cache_dir):
+        if cache_dir is None:
+            return None
+        image_pyramid = ImagePyramid(path, cache_dir, tile_size=self.tile_size)
+        if image_pyramid.load():
+            return image_pyramid
+        self.image_prefetcher.load(path, cache_dir=cache_dir, tile_size=self.tile_size,
+                                   callback=lambda pyramid: Clock.schedule_once(
+                                       partial(self.on_image_pyramid_generated, pyramid)))
+        return None
+
+    def on_image_pyramid_generated(self, image_pyramid: ImagePyramid, *args):
+        if self.image_path == image_pyramid.image_path and self.image_pyramid is None:
+            self.image_pyramid = image_pyramid
+            self.image.source = image_pyramid.overview_tile_path
+            self.refresh_tiles()
+
+    def clear_tiles(self):
+        self.tile_group.clear()
+        self.tiles.clear()
+
+    def get_visible_image_region(self, scale):
+        """
+        Region of the image visible in the widget, in full resolution standard image coordinates.
+        """
+        img_x, img_y = self.image.pos
+        height = self.resolution[1]
+        return ((self.x - img_x) / scale, height - (self.top - img_y) / scale,
+                (self.right - img_x) / scale, height - (self.y - img_y) / scale)
+
+    def refresh_tiles(self, *args):
+        if self.image_pyramid is None or self.image is None:
+            return
+        scale = self.image.size[0] / self.resolution[0]
+        level = self.image_pyramid.get_level_for_zoom(scale)
+        if level == self.image_pyramid.overview_level:
+            visible_tiles = []
+        else:
+            visible_tiles = self.image_pyramid.get_tiles(level, self.get_visible_image_region(scale))
+        visible_tile_keys = {tile.key for tile in visible_tiles}
+        for key in [key for key in self.tiles if key not in visible_tile_keys]:
+            self.tile_group.remove(self.tiles.pop(key))
+        img_x, img_y = self.image.pos
+        for tile in visible_tiles:
+            tile_rect = self.tiles.get(tile.key)
+            if tile_rect is None:
+                tile_rect = Rectangle(source=tile.path)
+                self.tiles[tile.key] = tile_rect
+                self.tile_group.add(tile_rect)
+            tile_rect.pos = (img_x + tile.x * scale, img_y + (self.resolution[1] - tile.y - tile.height) * scale)
+            tile_rect.size = (tile.width * scale, tile.height * scale)
+
     def apply_background_image(self):
         self.set_image(self.background_image)
         self.stretch_image()
@@ -128,6 +220,7 @@ class PannableImage(Widget):
         if self.is_dragging:
             self.image.pos = (touch.pos[0] + self.mouse_click_offset[0], touch.pos[1] + self.mouse_click_offset[1])
             self.limit_image_pos()
+            self.refresh_tiles()
             self.image_moved(None)
 
     def on_touch_up(self, touch):
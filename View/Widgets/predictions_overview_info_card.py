@@ -41,12 +41,13 @@ class PredictionsOverviewInfoCard(StackCard):
         survey = self.controller.survey
         if not survey:
             return
-        if len(self.controller.survey.validated_predictions) > 0:
+        statistics = survey.statistics
+        if statistics.num_validated_predictions > 0:
             validation_fields = {
-                "Unvalidated": (len(survey.predictions) - len(survey.validated_predictions), [.4, .4, .4, 1]),
-                "Correct": (len(survey.validated_correct_predictions), [.05, .8, .05, 1]),
-                "Incorrect": (len(survey.validated_incorrect_predictions), [1, 0, 0, 1]),
-                "Ambiguous": (len(survey.validated_ambiguous_predictions), [.3, .6, .9, 1])
+                "Unvalidated": (statistics.num_unvalidated_predictions, [.4, .4, .4, 1]),
+                "Correct": (statistics.num_correct_predictions, [.05, .8, .05, 1]),
+                "Incorrect": (statistics.num_incorrect_predictions, [1, 0, 0, 1]),
+                "Ambiguous": (statistics.num_ambiguous_predictions, [.3, .6, .9, 1])
             }
         else:
             validation_fields = {
@@ -72,12 +73,13 @@ class PredictionsOverviewInfoCard(StackCard):
         self.ambiguous.value = ""
 
     def set_fields(self, survey: Survey):
-        self.predictions.value = str(len(survey.predictions))
-        self.validated.value = str(len(survey.validated_predictions))
-        self.unvalidated.value = str(len(survey.predictions) - len(survey.validated_predictions))
-        self.correct.value = str(len(survey.validated_correct_predictions))
-        self.incorrect.value = str(len(survey.validated_incorrect_predictions))
-        self.ambiguous.value = str(len(survey.validated_ambiguous_predictions))
+        statistics = survey.statistics
+        self.predictions.value = str(statistics.num_predictions)
+        self.validated.value = str(statistics.num_validated_predictions)
+        self.unvalidated.value = str(statistics.num_unvalidated_predictions)
+        self.correct.value = str(statistics.num_correct_predictions)
+        self.incorrect.value = str(statistics.num_incorrect_predictions)
+        self.ambiguous.value = str(statistics.num_ambiguous_predictions)
         self.add_pie_chart()
 
     def update_fields(self, *args, **kwargs):
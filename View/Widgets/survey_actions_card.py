@@ -11,7 +11,7 @@ class SurveyActionsCard(StackCard):
     def __init__(self, controller: SeeOtterController, title, **kwargs):
         super().__init__(title, **kwargs)
         self.controller = controller
-        self.height = 560
+        self.height = 600
         self.build()
         self.controller.bind(state=self.on_state_changed)
         self.on_state_changed()
@@ -25,6 +25,8 @@ class SurveyActionsCard(StackCard):
                                     on_press=commands.force_run_pre_processing))
         self.add(SurveyActionButton(text="Run Post-Processing", controller=self.controller,
                                     on_press=commands.run_post_processing))
+        self.add(SurveyActionButton(text="Extract Prediction Chips", controller=self.controller,
+                                    on_press=commands.extract_prediction_chips))
 
         self.add(CardSectionHeader(text="Survey Management"))
         self.add(SurveyActionButton(text="Create Backup", controller=self.controller,
@@ -36,9 +36,10 @@ class SurveyInfoCard(PropertyStackCard):
 
     def set_fields(self, survey: Survey):
 
-        num_images = survey.num_images
-        num_pre_processed = len(survey.pre_processed_images)
-        num_processed = len(survey.processed_images)
+        statistics = survey.statistics
+        num_images = statistics.num_images
+        num_pre_processed = statistics.num_pre_processed_images
+        num_processed = statistics.num_processed_images
         pre_processed_percent = f"({format_percent_str(current=num_pre_processed, max=num_images, no_decimals=True)})" \
             if survey.has_images else ""
         processed_percent = f"({format_percent_str(current=num_processed, max=num_images, no_decimals=True)})" \
@@ -52,4 +53,4 @@ class SurveyInfoCard(PropertyStackCard):
         self.images.value = str(num_images)
         self.pre_processed_images.value = f"{num_pre_processed}   {pre_processed_percent}"
         self.processed_images.value = f"{num_processed}   {processed_percent}"
-        self.excluded.value = str(len(survey.excluded_images))
+        self.excluded.value = str(statistics.num_excluded_images)
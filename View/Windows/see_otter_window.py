@@ -110,5 +110,8 @@ class SeeOtterWindow(SeeOtterWindowBase):
             return True
 
     def save_and_exit(self, *args):
-        self.controller.survey.save()
-        Window.close()
+        self.controller.save(callback=self.close_after_save)
+
+    def close_after_save(self, survey, error):
+        if error is None:
+            Window.close()
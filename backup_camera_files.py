@@ -1,7 +1,10 @@
+import hashlib
+import json
 import os
 import shutil
 import logging
 import threading
+from concurrent.futures import ThreadPoolExecutor
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 
@@ -12,6 +15,234 @@ logging.basicConfig(
     format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
+MANIFEST_FILE = "backup_manifest.jsonl"
+CHECKSUM_FILE = "checksums.sha256"
+DEFAULT_BUFFER_SIZE = 16 * 1024 * 1024
+
+
+class MultiDestinationCopier:
+    """
+    Copies a folder to several destinations, reading each source file once. Every chunk read from the source is hashed
+    and written to all destinations concurrently. Each destination gets a manifest (one json line per copied file with
+    its size, modified time and sha256) that is appended as files complete, so an interrupted backup resumes with the
+    files that are missing, and is used to verify the destination once all files are copied. A 'sha256sum -c'
+    compatible checksum file is written next to the manifest.
+    """
+
+    def __init__(self, source, backup_paths, buffer_size=DEFAULT_BUFFER_SIZE, fsync=True, progress_callback=None):
+        """
+        :param backup_paths: Destination folders the source folder is copied to
+        :param progress_callback: Called with (stage, files done, total files, bytes done, total bytes, file path)
+        """
+        self.source = source
+        self.backup_paths = list(backup_paths)
+        self.buffer_size = buffer_size
+        self.fsync = fsync
+        self.progress_callback = progress_callback
+        self.manifests = {backup_path: {} for backup_path in self.backup_paths}
+        self.failed = {}
+
+    @property
+    def active_backup_paths(self):
+        return [backup_path for backup_path in self.backup_paths if backup_path not in self.failed]
+
+    def list_source_files(self):
+        files = []
+        for root, _, file_names in os.walk(self.source):
+            for file_name in file_names:
+                path = os.path.join(root, file_name)
+                files.append(os.path.relpath(path, self.source).replace(os.sep, "/"))
+        return sorted(files)
+
+    def list_source_dirs(self):
+        return [os.path.relpath(os.path.join(root, name), self.source)
+                for root, dirs, _ in os.walk(self.source) for name in dirs]
+
+    def report_progress(self, stage, files_done, total_files, bytes_done, total_bytes, file_path):
+        if self.progress_callback:
+            self.progress_callback(stage, files_done, total_files, bytes_done, total_bytes, file_path)
+
+    @staticmethod
+    def load_manifest(backup_path):
+        """
+        :return: Manifest entries of the files already copied to the backup path by relative path
+        """
+        manifest = {}
+        manifest_path = os.path.join(backup_path, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Last line of an interrupted backup
+                        continue
+                    manifest[entry["path"]] = entry
+        return manifest
+
+    @staticmethod
+    def open_manifest(backup_path):
+        manifest_path = os.path.join(backup_path, MANIFEST_FILE)
+        with open(manifest_path, "ab+") as f:
+            # Terminate a partial last line of an interrupted backup
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+        return open(manifest_path, "a", encoding="utf-8")
+
+    def is_copied(self, backup_path, relative_path, stat):
+        entry = self.manifests[backup_path].get(relative_path)
+        dest_path = os.path.join(backup_path, relative_path)
+        return entry is not None and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns \
+            and os.path.exists(dest_path) and os.path.getsize(dest_path) == stat.st_size
+
+    def run(self, verify=True):
+        """
+        Copies the source to all backup paths, then verifies them
+        :return: Errors by backup path. Backup paths without errors are not included.
+        """
+        for backup_path in self.backup_paths:
+            try:
+                os.makedirs(backup_path, exist_ok=True)
+                self.manifests[backup_path] = self.load_manifest(backup_path)
+                for dir_path in self.list_source_dirs():
+                    os.makedirs(os.path.join(backup_path, dir_path), exist_ok=True)
+            except OSError as ex:
+                self.fail(backup_path, ".", ex)
+        self.copy_files()
+        for backup_path in self.active_backup_paths:
+            self.write_checksum_file(backup_path)
+        if verify:
+            self.verify()
+        return self.failed
+
+    def copy_files(self):
+        files = self.list_source_files()
+        total_bytes = sum(os.path.getsize(os.path.join(self.source, file)) for file in files)
+        bytes_done = 0
+        manifest_files = {backup_path: self.open_manifest(backup_path) for backup_path in self.active_backup_paths}
+        try:
+            with ThreadPoolExecutor(max_workers=max(len(self.backup_paths), 1)) as executor:
+                for idx, relative_path in enumerate(files):
+                    src_path = os.path.join(self.source, relative_path)
+                    stat = os.stat(src_path)
+                    backup_paths = [backup_path for backup_path in self.active_backup_paths
+                                    if not self.is_copied(backup_path, relative_path, stat)]
+                    if backup_paths:
+                        file_hash = self.copy_file(executor, src_path, relative_path, backup_paths)
+                        entry = {"path": relative_path, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                                 "sha256": file_hash}
+                        for backup_path in backup_paths:
+                            if backup_path not in self.failed:
+                                self.manifests[backup_path][relative_path] = entry
+                                manifest_files[backup_path].write(json.dumps(entry) + "\n")
+                                manifest_files[backup_path].flush()
+                    bytes_done += stat.st_size
+                    self.report_progress("Copying", idx + 1, len(files), bytes_done, total_bytes, relative_path)
+        finally:
+            for manifest_file in manifest_files.values():
+                manifest_file.close()
+
+    def copy_file(self, executor, src_path, relative_path, backup_paths):
+        """
+        Streams the source file to all backup paths, writing to temp files that replace the destination files once
+        complete. A destination that fails is marked failed and skipped for the rest of the backup.
+        :return: sha256 of the source file
+        """
+        file_hash = hashlib.sha256()
+        dest_files = {}
+        for backup_path in backup_paths:
+            try:
+                dest_files[backup_path] = open(os.path.join(backup_path, relative_path) + ".partial", "wb")
+            except OSError as ex:
+                self.fail(backup_path, relative_path, ex)
+
+        def wait(pending):
+            for backup_path, future in pending:
+                try:
+                    future.result()
+                except OSError as ex:
+                    self.fail(backup_path, relative_path, ex)
+                    dest_files.pop(backup_path).close()
+
+        with open(src_path, "rb") as src_file:
+            pending = []
+            # The next chunk is read and hashed while the previous chunk is being written
+            while chunk := src_file.read(self.buffer_size):
+                file_hash.update(chunk)
+                wait(pending)
+                pending = [(backup_path, executor.submit(dest_file.write, chunk))
+                           for backup_path, dest_file in dest_files.items()]
+            wait(pending)
+        wait([(backup_path, executor.submit(self.finish_file, dest_file, src_path))
+              for backup_path, dest_file in dest_files.items()])
+        return file_hash.hexdigest()
+
+    def finish_file(self, dest_file, src_path):
+        if self.fsync:
+            dest_file.flush()
+            os.fsync(dest_file.fileno())
+        dest_file.close()
+        dest_path = dest_file.name[:-len(".partial")]
+        os.replace(dest_file.name, dest_path)
+        shutil.copystat(src_path, dest_path)
+
+    def fail(self, backup_path, relative_path, ex):
+        self.failed.setdefault(backup_path, []).append(f"Failed to copy '{relative_path}': {ex}")
+        logging.error(f"Backup failed for {backup_path} ({relative_path}): {ex}")
+
+    def write_checksum_file(self, backup_path):
+        with open(os.path.join(backup_path, CHECKSUM_FILE), "w", encoding="utf-8") as f:
+            for relative_path, entry in sorted(self.manifests[backup_path].items()):
+                f.write(f"{entry['sha256']}  {relative_path}\n")
+
+    def verify(self):
+        """
+        Re-reads every file of each backup path, in parallel between backup paths, and compares its sha256 to the
+        manifest
+        """
+        files = self.list_source_files()
+        backup_paths = self.active_backup_paths
+        total_bytes = sum(self.manifests[backup_path][file]["size"] for backup_path in backup_paths
+                          for file in files if file in self.manifests[backup_path])
+        progress = {"files": 0, "bytes": 0}
+        lock = threading.Lock()
+
+        def verify_backup_path(backup_path):
+            errors = []
+            for relative_path in files:
+                entry = self.manifests[backup_path].get(relative_path)
+                dest_path = os.path.join(backup_path, relative_path)
+                if entry is None or not os.path.exists(dest_path):
+                    errors.append(f"Missing file: '{relative_path}'")
+                    continue
+                if hash_file(dest_path, self.buffer_size) != entry["sha256"]:
+                    errors.append(f"Checksum mismatch: '{relative_path}'")
+                with lock:
+                    progress["files"] += 1
+                    progress["bytes"] += entry["size"]
+                    self.report_progress("Verifying", progress["files"], len(files) * len(backup_paths),
+                                         progress["bytes"], total_bytes, relative_path)
+            return errors
+
+        with ThreadPoolExecutor(max_workers=max(len(backup_paths), 1)) as executor:
+            for backup_path, errors in zip(backup_paths, executor.map(verify_backup_path, backup_paths)):
+                if errors:
+                    self.failed.setdefault(backup_path, []).extend(errors)
+                    logging.error(f"Verification failed for {backup_path}: {len(errors)} errors")
+                else:
+                    logging.info(f"Verified {len(files)} files in {backup_path}")
+
+
+def hash_file(path, buffer_size=DEFAULT_BUFFER_SIZE):
+    file_hash = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(buffer_size):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
 class BackupApp:
     def __init__(self, root):
         self.root = root
@@ -25,7 +256,8 @@ class BackupApp:
             "1. Backup Camera Files to hard drive\n"
             "a. Select the folder to backup\n"
             "b. Add one or more destination folders\n"
-            "c. Click 'Start Backup' to copy the folder to each destination"
+            "c. Click 'Start Backup' to copy the folder to each destination\n"
+            "Each backup is verified against checksums. Restarting an interrupted backup resumes it."
         )
         tk.Label(self.root, text=instruction_text, justify="left").grid(row=0, column=0, columnspan=3, padx=10, pady=10)
 
@@ -45,6 +277,8 @@ class BackupApp:
         # Progress bar
         self.progress = ttk.Progressbar(self.root, orient="horizontal", length=300, mode="determinate")
         self.progress.grid(row=4, column=0, columnspan=3, padx=10, pady=10)
+        self.status = tk.StringVar()
+        tk.Label(self.root, textvariable=self.status, justify="left").grid(row=6, column=0, columnspan=3, padx=10, pady=5, sticky="w")
 
         # Start Backup button
         tk.Button(self.root, text="Start Backup", command=self.start_backup).grid(row=5, column=2, padx=10, pady=10)
@@ -71,34 +305,52 @@ class BackupApp:
             logging.error("Backup failed: No destination folders selected.")
             return
 
-        self.progress["maximum"] = len(self.destination_folders)
+        self.progress["maximum"] = 100
         self.progress["value"] = 0
 
         # Run backup in a separate thread to allow UI updates
         threading.Thread(target=self.do_backup, args=(source,), daemon=True).start()
 
     def do_backup(self, source):
+        backup_paths = []
         for dest in self.destination_folders:
             backup_path = os.path.join(dest, f"{os.path.basename(source)}_backup")
-            try:
-                if os.path.exists(backup_path):
-                    self.root.after(0, lambda bp=backup_path: messagebox.showwarning("Warning", f"Backup folder already exists: {bp}"))
-                    logging.warning(f"Backup skipped: Folder already exists at {backup_path}")
-                else:
-                    shutil.copytree(source, backup_path)
-                    logging.info(f"Backup successful: {backup_path}")
-            except Exception as e:
-                self.root.after(0, lambda bp=backup_path, err=e: messagebox.showerror("Error", f"Failed to backup to {bp}: {err}"))
-                logging.error(f"Backup failed for {backup_path}: {e}")
-            # Safely update progress bar on the main thread
-            self.root.after(0, self.update_progress)
-
-        self.root.after(0, lambda: messagebox.showinfo("Success", "Backup completed successfully!"))
+            # Folders with a manifest are interrupted backups and are resumed
+            if os.path.exists(backup_path) and not os.path.exists(os.path.join(backup_path, MANIFEST_FILE)):
+                self.root.after(0, lambda bp=backup_path: messagebox.showwarning("Warning", f"Backup folder already exists: {bp}"))
+                logging.warning(f"Backup skipped: Folder already exists at {backup_path}")
+            else:
+                backup_paths.append(backup_path)
+
+        try:
+            copier = MultiDestinationCopier(source, backup_paths, progress_callback=self.on_progress)
+            failed = copier.run(verify=True)
+        except Exception as e:
+            self.root.after(0, lambda err=e: messagebox.showerror("Error", f"Backup failed: {err}"))
+            logging.error(f"Backup failed: {e}")
+            self.root.after(0, self.root.quit)
+            return
+        for backup_path, errors in failed.items():
+            self.root.after(0, lambda bp=backup_path, errs=errors: messagebox.showerror(
+                "Error", f"Failed to backup to {bp}:\n" + "\n".join(errs[:10])))
+        for backup_path in backup_paths:
+            if backup_path not in failed:
+                logging.info(f"Backup successful: {backup_path}")
+
+        if not failed:
+            self.root.after(0, lambda: messagebox.showinfo("Success", "Backup completed and verified successfully!"))
         logging.info("Backup process completed.")
         self.root.after(0, self.root.quit)
 
-    def update_progress(self):
-        self.progress["value"] += 1
+    def on_progress(self, stage, files_done, total_files, bytes_done, total_bytes, file_path):
+        percent = 100 * bytes_done / total_bytes if total_bytes else 100
+        status = f"{stage} {files_done}/{total_files}: {file_path}"
+        # Safely update progress bar on the main thread
+        self.root.after(0, self.update_progress, percent, status)
+
+    def update_progress(self, percent, status):
+        self.progress["value"] = percent
+        self.status.set(status)
 
 if __name__ == "__main__":
     root = tk.Tk()
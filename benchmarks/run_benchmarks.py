@@ -0,0 +1,255 @@
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import tracemalloc
+from datetime import datetime
+from os.path import join
+from time import perf_counter
+
+from Utilities.command_line import disable_kivy_argument_parsing
+
+disable_kivy_argument_parsing()
+
+from benchmarks.synthetic_survey import SyntheticSurveyGenerator
+from Calibration.calibration_settings import CalibrationSettings
+from Calibration.temporal_calibration import TemporalCalibration
+from Camera.camera_calibration import CameraCalibration
+from Config.see_otter_config import SeeOtterConfig
+from DataGenerators.results_generator import ResultsGenerator
+from Processing.survey_processing import calculate_bearing, post_processing, flag_prediction_overlap, \
+    get_distinct_predictions
+from SurveyEntities.object_prediction_data import ObjectPredictionData
+from SurveyEntities.survey import Survey
+from SurveyEntities.transect import Transect
+from SurveyEntities.waldo_survey import WaldoSurvey
+from Utilities.utilities import print_title
+from version import version
+
+"""
+Times the processing hot paths on synthetic surveys at several scales and saves the results as json, so runs of
+different versions can be compared.
+
+Example:
+    python -m benchmarks.run_benchmarks --scales 100 1000 10000 --repeat 3
+    python -m benchmarks.run_benchmarks --scales 1000 --compare benchmarks/results/<previous results>.json
+"""
+
+DEFAULT_SCALES = [100, 1000]
+DEFAULT_RESULTS_DIR = join(os.path.dirname(os.path.abspath(__file__)), "results")
+REGRESSION_THRESHOLD = 1.2
+SURVEY_NAME = "SyntheticBenchmarkSurvey"
+
+
+def config() -> SeeOtterConfig:
+    return SeeOtterConfig.instance()
+
+
+class BenchmarkRunner:
+
+    def __init__(self, work_dir, repeat=3, seed=0, verbose=False):
+        self.work_dir = work_dir
+        self.repeat = repeat
+        self.seed = seed
+        self.verbose = verbose
+        self.results = []
+
+    def time(self, name, scale, func, setup=None, repeat=None):
+        """
+        Times a function, recording the time of each repetition. Setup runs before each repetition and isn't timed.
+        :return: Result of the last repetition
+        """
+        times, result = [], None
+        for _ in range(repeat or self.repeat):
+            if setup is not None:
+                self.quiet(setup)
+            gc.collect()
+            start_time = perf_counter()
+            result = self.quiet(func)
+            times.append(perf_counter() - start_time)
+        self.results.append({
+            "benchmark": name,
+            "scale": scale,
+            "times_s": [round(t, 6) for t in times],
+            "min_s": round(min(times), 6),
+            "mean_s": round(sum(times) / len(times), 6),
+        })
+        print(f"  {name:<32} {min(times):10.4f}s")
+        return result
+
+    def measure_memory(self, name, scale, func, count):
+        """
+        Records memory allocated by a function and still held once it returns, per item
+        """
+        gc.collect()
+        tracemalloc.start()
+        try:
+            result = self.quiet(func)
+            allocated_bytes, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.results.append({
+            "benchmark": name,
+            "scale": scale,
+            "bytes": allocated_bytes,
+            "bytes_per_item": round(allocated_bytes / max(count, 1), 1),
+        })
+        print(f"  {name:<32} {allocated_bytes / max(count, 1):10.0f} bytes/item")
+        return result
+
+    def quiet(self, func):
+        if self.verbose:
+            return func()
+        with contextlib.redirect_stdout(io.StringIO()):
+            return func()
+
+    def run_scale(self, num_images):
+        print_title(f"Benchmarking survey with {num_images} images")
+        survey_path = join(self.work_dir, f"{SURVEY_NAME}_{num_images}")
+        generator = SyntheticSurveyGenerator(survey_path, num_images, seed=self.seed)
+        self.quiet(generator.generate)
+        kml_path = join(survey_path, "Transects", "SyntheticTransects.kml")
+
+        survey = self.time("survey_new", num_images,
+                           lambda: WaldoSurvey.new(SURVEY_NAME, survey_path=survey_path, overwrite=True, force=True))
+        generator.add_predictions(survey)
+        self.time("calculate_bearing", num_images, lambda: calculate_bearing(survey))
+        self.time("parse_transects_kml", num_images, lambda: Transect.load_transects_from_kml(kml_path, use_cache=False))
+        self.time("assign_transects", num_images, lambda: assign_transects(survey))
+        self.time("survey_save", num_images, survey.save)
+        self.time("survey_load", num_images, lambda: Survey.load(survey_path))
+        self.time("survey_quick_load", num_images, lambda: Survey.load(survey_path, quick_load=True))
+        self.time("post_processing", num_images, lambda: run_post_processing(survey))
+        self.time("flag_prediction_overlap", num_images, lambda: flag_prediction_overlap(survey))
+        self.time("get_distinct_predictions", num_images, lambda: get_distinct_predictions(survey))
+        self.time("results_reports", num_images, lambda: save_results_reports(survey))
+        temporal_points = generator.get_temporal_points(survey, num_points=max(num_images // 50, 2))
+        self.time("temporal_calibration", num_images, lambda: run_temporal_calibration(survey, temporal_points),
+                  repeat=1)
+
+        self.measure_memory("survey_load_memory", num_images, lambda: Survey.load(survey_path), num_images)
+        self.measure_memory("prediction_memory", num_images,
+                            lambda: [ObjectPredictionData(image_name="0_000_00_000.jpg", score=.5)
+                                     for _ in range(num_images)], num_images)
+
+    def run(self, scales):
+        for scale in scales:
+            self.run_scale(scale)
+        return self.get_report(scales)
+
+    def get_report(self, scales):
+        return {
+            "version": str(version),
+            "git_commit": get_git_commit(),
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": self.seed,
+            "repeat": self.repeat,
+            "scales": scales,
+            "results": self.results,
+        }
+
+
+def assign_transects(survey: Survey):
+    survey.assign_transect_ids_to_images()
+    survey.fill_off_transect_gaps()
+
+
+def run_post_processing(survey: Survey):
+    # Chips are cropped from the image files, which are placeholders in synthetic surveys
+    extract_prediction_chips = config().EXTRACT_PREDICTION_CHIPS
+    config().EXTRACT_PREDICTION_CHIPS = False
+    try:
+        post_processing(survey)
+    finally:
+        config().EXTRACT_PREDICTION_CHIPS = extract_prediction_chips
+
+
+def save_results_reports(survey: Survey):
+    results = ResultsGenerator(survey)
+    results.save_reports(results.all_reports())
+
+
+def run_temporal_calibration(survey: Survey, temporal_points):
+    calibration = TemporalCalibration(survey=survey, temporal_points=temporal_points)
+    calibration_settings = CalibrationSettings(range=CameraCalibration(angle_x=4, angle_y=4, angle_z=2),
+                                               increment=CameraCalibration(angle_x=2, angle_y=2, angle_z=1))
+    calibration.run_default_calibration(calibration_settings)
+
+
+def get_git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare_results(previous_report, report, threshold=REGRESSION_THRESHOLD):
+    """
+    Compares benchmarks found in both reports by their fastest time (or bytes for memory benchmarks)
+    :return: Benchmarks slower than the previous report by more than the threshold ratio
+    """
+    def get_value(result):
+        return result.get("min_s", result.get("bytes_per_item"))
+
+    previous_results = {(result["benchmark"], result["scale"]): result for result in previous_report["results"]}
+    print_title(f"Comparison with version {previous_report['version']} ({previous_report.get('git_commit')})")
+    regressions = []
+    for result in report["results"]:
+        previous_result = previous_results.get((result["benchmark"], result["scale"]))
+        if previous_result is None or not get_value(previous_result):
+            continue
+        ratio = get_value(result) / get_value(previous_result)
+        flag = " <-- REGRESSION" if ratio > threshold else ""
+        print(f"  {result['benchmark']:<32} {result['scale']:>8} {get_value(previous_result):>12} -> "
+              f"{get_value(result):>12} ({ratio:.2f}x){flag}")
+        if ratio > threshold:
+            regressions.append({**result, "previous": get_value(previous_result), "ratio": round(ratio, 3)})
+    return regressions
+
+
+def save_report(report, results_dir):
+    os.makedirs(results_dir, exist_ok=True)
+    file_path = join(results_dir, f"benchmark_v{report['version']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(file_path, "w") as f:
+        json.dump(report, f, indent=2)
+    return file_path
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(description="Benchmark SeeOtter processing on synthetic surveys")
+    parser.add_argument("--scales", nargs="+", type=int, default=DEFAULT_SCALES, help="Survey sizes in images")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions of each benchmark")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic surveys")
+    parser.add_argument("--results-dir", default=DEFAULT_RESULTS_DIR, help="Directory results are saved to")
+    parser.add_argument("--work-dir", default=None,
+                        help="Directory synthetic surveys are generated in. Defaults to a temporary directory")
+    parser.add_argument("--compare", default=None, help="Previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="Ratio to previous results reported as a regression")
+    parser.add_argument("--verbose", action="store_true", help="Show output of benchmarked functions")
+    return parser.parse_args(args)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="see_otter_benchmarks_")
+    try:
+        runner = BenchmarkRunner(work_dir, repeat=args.repeat, seed=args.seed, verbose=args.verbose)
+        report = runner.run(args.scales)
+    finally:
+        if args.work_dir is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    print(f"Saved benchmark results: {save_report(report, args.results_dir)}")
+    if args.compare:
+        with open(args.compare, "r") as f:
+            regressions = compare_results(json.load(f), report, threshold=args.threshold)
+        exit(1 if regressions else 0)
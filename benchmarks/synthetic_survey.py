@@ -0,0 +1,226 @@
+import io
+import os
+import random
+from datetime import datetime, timedelta
+from os.path import join
+
+import geopy.distance
+import piexif
+from PIL import Image
+
+from SurveyEntities.object_prediction_data import ObjectPredictionData, ValidationState
+from SurveyEntities.survey import Survey
+from Utilities.WaldoUtilities.waldo_survey_converter import WaldoSurveyConverter
+from Utilities.utilities import get_bearing
+from config import IMAGE_DIR, TRANSECT_DIR, INCLINOMETER_DATA_DIR
+
+"""
+Generates synthetic Waldo surveys for benchmarks: images with realistic Waldo file names and EXIF/GPS headers along a
+simulated flight over parallel transects, an HWT905 inclinometer log, a kml transect file and randomized predictions.
+Images are tiny jpegs whose EXIF headers report the full Waldo resolution, so geo-referencing behaves like a real
+survey without gigabytes of image data.
+"""
+
+WALDO_RESOLUTION = (8688, 5792)
+IMAGE_PAIRS_PER_GROUP = 1000  # Matches WaldoSurveyConverter's image id rollover
+
+
+class SyntheticSurveyGenerator:
+
+    def __init__(self, survey_path, num_images, seed=0, start_coordinates=(57.55, -135.45),
+                 start_datetime=datetime(2022, 6, 5, 10, 52, 10), num_transects=8, transect_length_m=10000,
+                 transect_spacing_m=2000, speed_mps=50, capture_interval_s=2, altitude_m=300):
+        """
+        :param num_images: Number of images, split evenly between the left and right camera
+        """
+        self.survey_path = survey_path
+        self.num_images = num_images
+        self.rand = random.Random(seed)
+        self.start_coordinates = start_coordinates
+        self.start_datetime = start_datetime
+        self.num_transects = num_transects
+        self.transect_length_m = transect_length_m
+        self.transect_spacing_m = transect_spacing_m
+        self.speed_mps = speed_mps
+        self.capture_interval_s = capture_interval_s
+        self.altitude_m = altitude_m
+        self.transect_lines = self.get_transect_lines()
+
+    @property
+    def images_dir(self):
+        return join(self.survey_path, IMAGE_DIR)
+
+    @property
+    def num_image_pairs(self):
+        return self.num_images // 2
+
+    def generate(self):
+        """
+        Writes images, transects and inclinometer data to the survey directory. The survey itself is created with
+        Survey.new, e.g. WaldoSurvey.new(name, survey_path=generator.survey_path).
+        :return: Flight track of the image pairs as (datetime, latitude, longitude, altitude, bearing)
+        """
+        for directory in [self.images_dir, join(self.survey_path, TRANSECT_DIR),
+                          join(self.survey_path, INCLINOMETER_DATA_DIR)]:
+            os.makedirs(directory, exist_ok=True)
+        track = self.get_flight_track()
+        self.write_images(track)
+        self.write_transects_kml(join(self.survey_path, TRANSECT_DIR, "SyntheticTransects.kml"))
+        self.write_inclinometer_log(track)
+        return track
+
+    def get_transect_lines(self):
+        """
+        Parallel east-west transects, each a single line from its start point to its end point
+        """
+        lines = []
+        for i in range(self.num_transects):
+            start = geopy.distance.distance(meters=i * self.transect_spacing_m).destination(self.start_coordinates, 180)
+            end = geopy.distance.distance(meters=self.transect_length_m).destination(start, 90)
+            lines.append(((start.latitude, start.longitude), (end.latitude, end.longitude)))
+        return lines
+
+    def get_flight_track(self):
+        """
+        Flies each transect in alternating directions and turns to the next transect between them. Images taken while
+        turning are off transect.
+        """
+        track = []
+        step_m = self.speed_mps * self.capture_interval_s
+        current_datetime = self.start_datetime
+        transect_idx = 0
+        while len(track) < self.num_image_pairs:
+            start, end = self.transect_lines[transect_idx % self.num_transects]
+            if transect_idx % 2 == 1:
+                start, end = end, start
+            legs = [(start, end)]
+            next_start = self.transect_lines[(transect_idx + 1) % self.num_transects][transect_idx % 2 == 0]
+            legs.append((end, next_start))
+            for leg_start, leg_end in legs:
+                distance_m = geopy.distance.geodesic(leg_start, leg_end).m
+                bearing = get_bearing(leg_start, leg_end)
+                for step in range(max(int(distance_m / step_m), 1)):
+                    if len(track) >= self.num_image_pairs:
+                        break
+                    point = geopy.distance.distance(meters=step * step_m).destination(leg_start, bearing)
+                    altitude = self.altitude_m + self.rand.uniform(-15, 15)
+                    track.append((current_datetime, point.latitude, point.longitude, altitude, bearing))
+                    current_datetime += timedelta(seconds=self.capture_interval_s)
+            transect_idx += 1
+        return track
+
+    def write_images(self, track):
+        base_image = io.BytesIO()
+        Image.new("RGB", (32, 24), color=(40, 70, 90)).save(base_image, format="jpeg")
+        base_image = base_image.getvalue()
+        for pair_idx, (image_datetime, latitude, longitude, altitude, _) in enumerate(track):
+            for camera_type in ["1", "0"]:
+                file_name = WaldoSurveyConverter.get_image_name(camera_type, pair_idx // IMAGE_PAIRS_PER_GROUP,
+                                                                pair_idx % IMAGE_PAIRS_PER_GROUP)
+                exif_bytes = self.get_exif_bytes(image_datetime, latitude, longitude, altitude)
+                piexif.insert(exif_bytes, base_image, join(self.images_dir, file_name))
+
+    def get_exif_bytes(self, image_datetime, latitude, longitude, altitude):
+        zeroth = {
+            piexif.ImageIFD.Make: "SONY",
+            piexif.ImageIFD.Model: "ILCE-7RM4",
+            piexif.ImageIFD.Orientation: 1,
+            piexif.ImageIFD.DateTime: image_datetime.strftime("%Y:%m:%d %H:%M:%S"),
+        }
+        exif = {
+            piexif.ExifIFD.DateTimeOriginal: image_datetime.strftime("%Y:%m:%d %H:%M:%S"),
+            piexif.ExifIFD.PixelXDimension: WALDO_RESOLUTION[0],
+            piexif.ExifIFD.PixelYDimension: WALDO_RESOLUTION[1],
+            piexif.ExifIFD.ISOSpeedRatings: 400,
+            piexif.ExifIFD.FNumber: (56, 10),
+            piexif.ExifIFD.ExposureTime: (1, 2000),
+            piexif.ExifIFD.FocalLength: (50, 1),
+        }
+        gps = {
+            piexif.GPSIFD.GPSLatitudeRef: "N" if latitude >= 0 else "S",
+            piexif.GPSIFD.GPSLatitude: decimal_to_dms(abs(latitude)),
+            piexif.GPSIFD.GPSLongitudeRef: "E" if longitude >= 0 else "W",
+            piexif.GPSIFD.GPSLongitude: decimal_to_dms(abs(longitude)),
+            piexif.GPSIFD.GPSAltitudeRef: 0,
+            piexif.GPSIFD.GPSAltitude: (int(altitude * 1000), 1000),
+        }
+        return piexif.dump({"0th": zeroth, "Exif": exif, "GPS": gps})
+
+    def write_transects_kml(self, path):
+        placemarks = []
+        for transect_id, (start, end) in enumerate(self.transect_lines, start=1):
+            placemarks.append(
+                f"<Placemark><ExtendedData><SchemaData>"
+                f"<SimpleData name=\"length_km\">{self.transect_length_m / 1000}</SimpleData>"
+                f"<SimpleData name=\"trans_id\">{transect_id}</SimpleData>"
+                f"</SchemaData></ExtendedData><LineString><coordinates>"
+                f"{start[1]},{start[0]},0 {end[1]},{end[0]},0"
+                f"</coordinates></LineString></Placemark>")
+        with open(path, "w") as f:
+            f.write("<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n<kml xmlns=\"http://www.opengis.net/kml/2.2\">"
+                    f"<Document>{''.join(placemarks)}</Document></kml>\n")
+
+    def write_inclinometer_log(self, track, records_per_second=2):
+        start, end = track[0][0], track[-1][0]
+        file_name = start.strftime("%y%m%d%H%M%S") + ".txt"
+        headers = ["address", "Time(s)", "ax(g)", "ay(g)", "az(g)", "wx(deg/s)", "wy(deg/s)", "wz(deg/s)",
+                   "AngleX(deg)", "AngleY(deg)", "AngleZ(deg)", "T(°)", "hx", "hy", "hz"]
+        rows = []
+        num_records = int((end - start).total_seconds() * records_per_second) + 1
+        for i in range(num_records):
+            record_datetime = start + timedelta(seconds=i / records_per_second)
+            angles = [self.rand.gauss(0, 2), self.rand.gauss(0, 2), self.rand.uniform(0, 360)]
+            values = [self.rand.gauss(0, .05), self.rand.gauss(0, .05), 1 + self.rand.gauss(0, .02)] + \
+                     [self.rand.gauss(0, 1) for _ in range(3)] + angles + [15.5, 1794, 76, -3833]
+            rows.append("\t".join(["0x50", " " + record_datetime.strftime("%H:%M:%S.%f")[:-3]] +
+                                  [f"{value:.4f}" for value in values]))
+        with open(join(self.survey_path, INCLINOMETER_DATA_DIR, file_name), "w", encoding="utf-8") as f:
+            f.write(f"StartTime: {start.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]}\n")
+            f.write("\t".join(headers) + "\n")
+            f.write("\n".join(rows) + "\n")
+
+    def add_predictions(self, survey: Survey, predictions_per_image=.3, validated_ratio=.5):
+        """
+        Adds randomized predictions to the survey's images and marks the images as processed
+        :param predictions_per_image: Average number of predictions per image
+        :param validated_ratio: Ratio of predictions with a validation state
+        """
+        validation_states = [ValidationState.CORRECT, ValidationState.INCORRECT, ValidationState.AMBIGUOUS]
+        for image in survey.images:
+            image.has_been_processed = True
+            image.predictions = []
+            num_predictions = sum(1 for _ in range(5) if self.rand.random() < predictions_per_image / 5)
+            for _ in range(num_predictions):
+                width, height = self.rand.uniform(20, 80), self.rand.uniform(20, 80)
+                left = self.rand.uniform(0, WALDO_RESOLUTION[0] - width)
+                top = self.rand.uniform(0, WALDO_RESOLUTION[1] - height)
+                validation_state = self.rand.choice(validation_states) if self.rand.random() < validated_ratio \
+                    else ValidationState.UNVALIDATED
+                image.predictions.append(ObjectPredictionData(
+                    image_name=image.file_name, score=self.rand.random(), xmin=left, xmax=left + width, ymin=top,
+                    ymax=top + height, category_id=0, category_name="o", validation_state=validation_state))
+        survey.statistics.invalidate()
+
+    def get_temporal_points(self, survey: Survey, num_points):
+        """
+        Temporal calibration points from consecutive images of the same camera
+        """
+        from Calibration.temporal_point import TemporalPoint
+        images_by_name = {image.file_name: image for image in survey.images}
+        points = []
+        for pair_idx in range(min(num_points, self.num_image_pairs - 1)):
+            group, image_id = pair_idx // IMAGE_PAIRS_PER_GROUP, pair_idx % IMAGE_PAIRS_PER_GROUP
+            image1 = WaldoSurveyConverter.get_image_name("1", group, image_id)
+            image2 = WaldoSurveyConverter.get_image_name("1", (pair_idx + 1) // IMAGE_PAIRS_PER_GROUP,
+                                                         (pair_idx + 1) % IMAGE_PAIRS_PER_GROUP)
+            if image1 in images_by_name and image2 in images_by_name:
+                points.append(TemporalPoint(image1, (self.rand.randint(0, WALDO_RESOLUTION[0]), 1000),
+                                            image2, (self.rand.randint(0, WALDO_RESOLUTION[0]), 4500)))
+        return points
+
+
+def decimal_to_dms(decimal):
+    total_seconds = round(decimal * 3600 * 10000)
+    degrees, remainder = divmod(total_seconds, 3600 * 10000)
+    minutes, seconds = divmod(remainder, 60 * 10000)
+    return (degrees, 1), (minutes, 1), (seconds, 10000)
@@ -24,6 +24,10 @@ MODEL_WEIGHTS_DIR = 'ModelWeights'
 INCLINOMETER_DATA_DIR = 'InclinometerData'
 RESULTS_DIR = 'Results'
 AMBIGUOUS_VOTE_DIR = f"{RESULTS_DIR}/AmbiguousVote"
+PROFILES_DIR = f"{RESULTS_DIR}/Profiles"
+IMAGE_CACHE_DIR = 'ImageCache'
+CHIP_DIR = 'Chips'
+TRANSECT_CACHE_DIR = 'TransectCache'
 
 # Files
 IMAGE_EXT = '.JPG'
@@ -56,7 +60,8 @@ KEEP_WHEN_OVERWRITING_PROJECT = [IMAGE_DIR,
                                  TEMPORAL_CALIBRATION_POINTS_FILE,
                                  LOCATION_CALIBRATION_POINTS_FILE]
 
-EXCLUDE_FROM_BACKUP = [IMAGE_DIR, BACKUP_DIR]
+EXCLUDE_FROM_BACKUP = [IMAGE_DIR, BACKUP_DIR, IMAGE_CACHE_DIR, CHIP_DIR]
+RESTORE_BACKUP_PREFIX = 'before_restore_'
 
 # Camera
 WALDO_HORIZONTAL_FOV = 39.6
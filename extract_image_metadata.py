@@ -1,5 +1,6 @@
 import os
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import filedialog, messagebox
 from PIL import Image
 from PIL.ExifTags import TAGS, GPSTAGS
@@ -71,8 +72,8 @@ def extract_metadata_from_image(img_path):
         'Altitude': 'NA'
     }
     try:
-        img = Image.open(img_path)
-        exif = get_exif_data(img)
+        with Image.open(img_path) as img:
+            exif = get_exif_data(img)
 
         # Attempt to get the original timestamp from common tags
         datetime_original = exif.get("DateTimeOriginal") or exif.get("DateTime")
@@ -98,24 +99,25 @@ def extract_metadata_from_image(img_path):
     return metadata
 
 
-def extract_metadata_from_folder(folder_path):
+def extract_metadata_from_folder(folder_path, max_workers=8):
     """
     Walks through the provided folder and extracts metadata from all image files.
+    Images are read in a thread pool, rows keep the order of the walk.
     Returns a DataFrame with standardized columns.
     """
-    data = []
+    img_paths = []
     for root_dir, dirs, files in os.walk(folder_path):
         for file in files:
             if file.lower().endswith(('.png', '.jpg', '.jpeg')):
-                img_path = os.path.join(root_dir, file)
-                metadata = extract_metadata_from_image(img_path)
-                data.append([
-                    metadata['Filepath'],
-                    metadata['DatetimeOriginal'],
-                    metadata['Latitude'],
-                    metadata['Longitude'],
-                    metadata['Altitude']
-                ])
+                img_paths.append(os.path.join(root_dir, file))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        data = [[
+            metadata['Filepath'],
+            metadata['DatetimeOriginal'],
+            metadata['Latitude'],
+            metadata['Longitude'],
+            metadata['Altitude']
+        ] for metadata in executor.map(extract_metadata_from_image, img_paths)]
     return pd.DataFrame(data, columns=['Filepath', 'DatetimeOriginal', 'Latitude', 'Longitude', 'Altitude'])
 
 
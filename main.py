@@ -31,10 +31,11 @@ MapGenerator.survey_transect_map(survey, performance_mode=False).save("survey_tr
 
 # Generate Results
 print_title("GENERATE RESULTS")
-ResultsGenerator(survey).all_otters().save('results_all_otters.csv')
-ResultsGenerator(survey).distinct_otters().save('results_distinct_otters.csv')
-ResultsGenerator(survey).all_predictions().save('results_all_predictions.csv')
-ResultsGenerator(survey).distinct_otter_count_by_image().save('results_distinct_otter_count_by_image.csv')
-ResultsGenerator(survey).survey_overview().save('survey_overview.csv')
+results = ResultsGenerator(survey)
+results.save_reports({'results_all_otters.csv': results.all_otters_report(),
+                      'results_distinct_otters.csv': results.distinct_otters_report(),
+                      'results_all_predictions.csv': results.all_predictions_report(),
+                      'results_distinct_otter_count_by_image.csv': results.distinct_otter_count_by_image_report(),
+                      'survey_overview.csv': results.survey_overview_report()})
 
 print_title("DONE")
@@ -1,8 +1,12 @@
 import os
-import shutil
 import tkinter as tk
 from tkinter import filedialog, messagebox
 
+from Utilities.file_operations import FileMover
+from Utilities.path_mapping import PathMapping
+
+MOVE_MANIFEST_FILE = "image_move_manifest.csv"
+
 
 class MoveImageFilesApp:
     def __init__(self, root):
@@ -90,6 +94,8 @@ class MoveImageFilesApp:
         # Row 8: Move Generic Images button
         tk.Button(self.root, text="Move Generic Images", command=self.move_generic_images).grid(row=8, column=1,
                                                                                                 padx=10, pady=10)
+        tk.Button(self.root, text="Roll Back Move", command=self.roll_back_move).grid(row=8, column=2, padx=10,
+                                                                                      pady=10)
 
     def setup_waldo_widgets(self):
         tk.Label(self.root, text="Base Folder:").grid(row=2, column=0, padx=10, pady=5, sticky="e")
@@ -114,6 +120,8 @@ class MoveImageFilesApp:
         tk.Button(self.root, text="Browse", command=self.browse_source_folder).grid(row=5, column=3, padx=10, pady=5)
         tk.Button(self.root, text="Move Waldo Images", command=self.move_waldo_images).grid(row=6, column=1, padx=10,
                                                                                             pady=10)
+        tk.Button(self.root, text="Roll Back Move", command=self.roll_back_move).grid(row=6, column=2, padx=10,
+                                                                                      pady=10)
 
     def browse_base_folder(self):
         folder = filedialog.askdirectory()
@@ -166,22 +174,22 @@ class MoveImageFilesApp:
         if not (base_folder and location and year and mm_dd):
             messagebox.showerror("Error", "Please fill out all fields and select all folders.")
             return
-        errors = []
+        day_folder = os.path.join(base_folder, location, camera, year, mm_dd)
+        path_mapping = PathMapping()
         for folder, cam_choice_var, _ in self.source_folders:
             chosen_camera = cam_choice_var.get().strip()
-            destination_folder = os.path.join(base_folder,location, camera, year, mm_dd, chosen_camera)
-            os.makedirs(destination_folder, exist_ok=True)
-            try:
-                for item in os.listdir(folder):
-                    source_path = os.path.join(folder, item)
-                    dest_path = os.path.join(destination_folder, item)
-                    shutil.move(source_path, dest_path)
-            except Exception as e:
-                errors.append(f"Error moving from {folder}: {e}")
-        if errors:
-            messagebox.showerror("Error", "\n".join(errors))
-        else:
-            messagebox.showinfo("Success", "Images moved successfully!")
+            destination_folder = os.path.join(day_folder, chosen_camera)
+            for root, _, files in os.walk(folder):
+                for file in files:
+                    source_path = os.path.join(root, file)
+                    path_mapping.add_path(source_path,
+                                          os.path.join(destination_folder, os.path.relpath(source_path, folder)))
+        try:
+            self.move_files(path_mapping, day_folder)
+        except Exception as e:
+            messagebox.showerror("Error", f"Error moving images: {e}")
+            return
+        messagebox.showinfo("Success", "Images moved successfully!")
 
     def move_waldo_images(self):
         source_folder = self.source_folder.get().strip()
@@ -194,21 +202,47 @@ class MoveImageFilesApp:
             messagebox.showerror("Error", "Please fill out all fields and select all folders.")
             return
         destination_folder = os.path.join(base_folder, location, camera,  year, mm_dd)
-        os.makedirs(destination_folder, exist_ok=True)
+        path_mapping = PathMapping()
+        for item in os.listdir(source_folder):
+            source_path = os.path.join(source_folder, item)
+            if os.path.isfile(source_path):
+                first_char = item[0]
+                if first_char in ['0', '1']:
+                    path_mapping.add_path(source_path, os.path.join(destination_folder, first_char, item))
         try:
-            for item in os.listdir(source_folder):
-                source_path = os.path.join(source_folder, item)
-                if os.path.isfile(source_path):
-                    first_char = item[0]
-                    if first_char in ['0', '1']:
-                        dest_subfolder = os.path.join(destination_folder, first_char)
-                        os.makedirs(dest_subfolder, exist_ok=True)
-                        dest_path = os.path.join(dest_subfolder, item)
-                        shutil.move(source_path, dest_path)
+            self.move_files(path_mapping, destination_folder)
             messagebox.showinfo("Success", f"Images moved successfully to {destination_folder}!")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to move images: {e}")
 
+    @staticmethod
+    def move_files(path_mapping, day_folder):
+        """
+        Moves files using a manifest in the day folder. An interrupted move found in the folder is completed first.
+        The manifest is kept after moving so the move can be rolled back.
+        """
+        os.makedirs(day_folder, exist_ok=True)
+        manifest_path = os.path.join(day_folder, MOVE_MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            FileMover.load(manifest_path).run(description="Resuming Move")
+            os.remove(manifest_path)
+        FileMover(path_mapping, manifest_path=manifest_path).run(description="Moving Images")
+
+    def roll_back_move(self):
+        day_folder = os.path.join(self.base_folder.get().strip(), self.location_entry_val.get().strip(),
+                                  self.camera_entry_val.get().strip(), self.year_entry_val.get().strip(),
+                                  self.mm_dd_entry_val.get().strip())
+        manifest_path = os.path.join(day_folder, MOVE_MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            messagebox.showerror("Error", f"No move manifest found in {day_folder}")
+            return
+        try:
+            FileMover.load(manifest_path).rollback()
+            os.remove(manifest_path)
+            messagebox.showinfo("Success", "Images moved back to their source folders.")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to roll back move: {e}")
+
 
 if __name__ == "__main__":
     root = tk.Tk()
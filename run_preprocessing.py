@@ -1,17 +1,24 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
-from PIL import Image
-from PIL.ExifTags import TAGS, GPSTAGS
 import os
+import shutil
 import pandas as pd
 import piexif
 import xml.etree.ElementTree as ET
+import csv
 import numpy as np
 
+from extract_image_metadata import extract_metadata_from_folder
+from Utilities.jpeg_cropper import crop_image_border, get_lossless_border, MAX_MCU_SIZE, CROP_METHOD_LOSSLESS, \
+    CROP_METHOD_REENCODE
+
 
 import sys
 print("sys.path:", sys.path)
 
+EXIF_DATETIME_FORMAT = '%Y:%m:%d %H:%M:%S'
+GPS_MATCH_TOLERANCE_S = 3
+
 class ImageMetadataGUI:
     def __init__(self, root):
         self.root = root
@@ -26,6 +33,7 @@ class ImageMetadataGUI:
         self.output_csv = tk.StringVar()
         self.crop_pixel_size = tk.StringVar()
         self.kml_file = tk.StringVar()
+        self.interpolate_gps = tk.BooleanVar(value=False)
 
         # Defaults
         self.crop_pixel_size.set("125")
@@ -55,9 +63,13 @@ class ImageMetadataGUI:
         tk.Label(self.root, text="Select KML File:").grid(row=3, column=0, padx=10, pady=10, sticky="w")
         tk.Entry(self.root, textvariable=self.kml_file, width=40).grid(row=3, column=1, padx=10, pady=10)
         tk.Button(self.root, text="Browse", command=self.browse_kml).grid(row=3, column=2, padx=10, pady=10)
+        tk.Checkbutton(self.root, text="Interpolate GPS", variable=self.interpolate_gps).grid(row=3, column=3, padx=10,
+                                                                                             pady=10, sticky="w")
 
         tk.Label(self.root, text="Crop Pixel Size:").grid(row=4, column=0, padx=10, pady=10, sticky="w")
         tk.Entry(self.root, textvariable=self.crop_pixel_size, width=10).grid(row=4, column=1, padx=10, pady=10)
+        tk.Label(self.root, text=f"Multiples of {MAX_MCU_SIZE} crop losslessly").grid(row=4, column=2, padx=10,
+                                                                                     pady=10, sticky="w")
 
         tk.Label(self.root, text="Min Altitude (m):").grid(row=5, column=0, padx=10, pady=10, sticky="w")
         tk.Entry(self.root, textvariable=self.min_altitude, width=10).grid(row=5, column=1, padx=10, pady=10)
@@ -126,137 +138,128 @@ class ImageMetadataGUI:
             return
 
         self.input_folder.set(self.folder_path.get())
-        self.crop_images_based_on_transect(self.final_metadata_csv.get(),
-                                           self.input_folder.get(),
-                                           self.output_folder.get(),
-                                           crop_amount=int(self.crop_pixel_size.get()))
-        messagebox.showinfo("Success", "Images cropped successfully!")
+        crop_amount = int(self.crop_pixel_size.get())
+        crop_methods = self.crop_images_based_on_transect(self.final_metadata_csv.get(),
+                                                          self.input_folder.get(),
+                                                          self.output_folder.get(),
+                                                          crop_amount=crop_amount)
+        message = f"Images cropped successfully!\nLossless: {crop_methods.get(CROP_METHOD_LOSSLESS, 0)}, " \
+                  f"re-encoded: {crop_methods.get(CROP_METHOD_REENCODE, 0)}"
+        if crop_methods.get(CROP_METHOD_REENCODE) and get_lossless_border(crop_amount) != crop_amount:
+            message += f"\nA crop pixel size of {get_lossless_border(crop_amount)} would crop without re-encoding " \
+                       f"(requires jpegtran)."
+        messagebox.showinfo("Success", message)
 
     # -------------------------------
     # Core logic functions
     # -------------------------------
-    def get_geotagging(self, exif):
-        if not exif:
-            return None
-        geotagging = {}
-        for (idx, tag) in TAGS.items():
-            if tag == 'GPSInfo':
-                if idx not in exif:
-                    return None
-                for (key, val) in GPSTAGS.items():
-                    if key in exif[idx]:
-                        geotagging[val] = exif[idx][key]
-        return geotagging
-
-    def dms_to_decimal(self, degrees, minutes, seconds, ref):
-        decimal = degrees + (minutes / 60.0) + (seconds / 3600.0)
-        if ref in ['S', 'W']:
-            decimal = -decimal
-        return decimal
-
-    def extract_metadata_from_folder(self, folder_path):
-        data = []
-        for root_, dirs, files in os.walk(folder_path):
-            for file in files:
-                if file.lower().endswith(('.png', '.jpg', '.jpeg')):
-                    img_path = os.path.join(root_, file).replace('\\', '/')
-                    try:
-                        img = Image.open(img_path)
-                        exif_data = img._getexif()
-                    except:
-                        exif_data = None
-
-                    if not exif_data:
-                        data.append([img_path, 'NA', 'NA', 'NA', 'NA'])
-                        continue
-
-                    datetime_original = exif_data.get(36867, 'NA')
-                    geotags = self.get_geotagging(exif_data)
-
-                    if not geotags:
-                        data.append([img_path, datetime_original, 'NA', 'NA', 'NA'])
-                        continue
-
-                    # You could parse altitude here if it's a tuple
-                    altitude = geotags.get('GPSAltitude', 'NA')
-                    latitude = 'NA'
-                    longitude = 'NA'
-                    if 'GPSLatitude' in geotags and 'GPSLatitudeRef' in geotags:
-                        lat_tuple = geotags['GPSLatitude']
-                        lat_ref = geotags['GPSLatitudeRef']
-                        latitude = self.dms_to_decimal(*lat_tuple, lat_ref)
-                    if 'GPSLongitude' in geotags and 'GPSLongitudeRef' in geotags:
-                        lon_tuple = geotags['GPSLongitude']
-                        lon_ref = geotags['GPSLongitudeRef']
-                        longitude = self.dms_to_decimal(*lon_tuple, lon_ref)
-
-                    data.append([img_path, datetime_original, latitude, longitude, altitude])
-
-        return pd.DataFrame(data, columns=['Filepath', 'DatetimeOriginal', 'Latitude', 'Longitude', 'Altitude'])
-
-    def extract_and_assign_transects(self, folder_path, transect_file, output_csv):
-        # Automatically fix backslashes in CSV and overwrite
-        df = pd.read_csv(transect_file)
-        if 'start_img' in df.columns and 'end_img' in df.columns:
-            df['start_img'] = df['start_img'].astype(str).apply(lambda x: x.replace('\\', '/') if x else x)
-            df['end_img']   = df['end_img'].astype(str).apply(lambda x: x.replace('\\', '/') if x else x)
-            df.to_csv(transect_file, index=False)
-
+    @staticmethod
+    def extract_metadata_from_folder(folder_path):
+        metadata = extract_metadata_from_folder(folder_path)
+        metadata['Filepath'] = metadata['Filepath'].str.replace('\\', '/')
+        return metadata
+
+    @staticmethod
+    def extract_and_assign_transects(folder_path, transect_file, output_csv):
         transect_assignment = pd.read_csv(transect_file)
-        metadata = self.extract_metadata_from_folder(folder_path)
-        metadata['Transect'] = 'NA'
-
-        for index, row in transect_assignment.iterrows():
-            start_time = None
-            end_time = None
-
-            # If columns exist for start_img/end_img
-            if 'start_img' in row and 'end_img' in row and \
-               pd.notna(row['start_img']) and pd.notna(row['end_img']):
-                start_time_entries = metadata.loc[metadata['Filepath'] == row['start_img'], 'DatetimeOriginal'].values
-                end_time_entries   = metadata.loc[metadata['Filepath'] == row['end_img'], 'DatetimeOriginal'].values
-                if start_time_entries.size > 0 and end_time_entries.size > 0:
-                    start_time = start_time_entries[0]
-                    end_time   = end_time_entries[0]
-
-            # Fallback if times are present
-            if (start_time is None or end_time is None) and \
-               'start_time' in row and 'end_time' in row:
-                start_time = row['start_time']
-                end_time   = row['end_time']
-
-            if not (start_time and end_time):
-                continue
-
-            mask = (metadata['DatetimeOriginal'] >= str(start_time)) & \
-                   (metadata['DatetimeOriginal'] <= str(end_time))
-            metadata.loc[mask, 'Transect'] = row.get('transect_id', 'NA')
-
+        metadata = ImageMetadataGUI.extract_metadata_from_folder(folder_path)
+        metadata['Transect'] = ImageMetadataGUI.assign_transects(metadata, transect_assignment)
         metadata.to_csv(output_csv, index=False)
         return output_csv
 
-    def kml_to_csv(self, kml_filepath, csv_filepath):
-        tree = ET.parse(kml_filepath)
-        root_ = tree.getroot()
-
-        ns = {'kml': 'http://www.opengis.net/kml/2.2'}
-        ns_ext = {'gx': 'http://www.google.com/kml/ext/2.2'}
-
-        coordinates = []
-        timestamps = []
-
-        for placemark in root_.findall(".//kml:Placemark", ns):
-            coords = placemark.findall(".//gx:coord", ns_ext)
-            whens = placemark.findall(".//kml:when", ns)
-            for coord, when_elem in zip(coords, whens):
-                coordinate = coord.text.strip().split(' ')
-                timestamp = when_elem.text
-                coordinates.append(coordinate)
-                timestamps.append(timestamp)
-
-        df = pd.DataFrame(coordinates, columns=["Longitude", "Latitude", "Altitude"])
-        df["Datetime"] = timestamps
-        df.to_csv(csv_filepath, index=False)
+    @staticmethod
+    def parse_datetimes(values):
+        # Image times are in EXIF format, times typed into the transect csv may be in any format pandas can parse
+        values = pd.Series(values, dtype=object)
+        datetimes = pd.to_datetime(values, format=EXIF_DATETIME_FORMAT, errors='coerce')
+        unparsed = datetimes.isna() & values.notna()
+        if unparsed.any():
+            datetimes[unparsed] = pd.to_datetime(values[unparsed].astype(str), format='mixed', errors='coerce')
+        return datetimes
+
+    @staticmethod
+    def assign_transects(metadata, transect_assignment):
+        """
+        Assigns each image to the transect whose time interval contains the image's time, where intervals are given by
+        start and end images ('start_img', 'end_img') or by times ('start_time', 'end_time'). Images are sorted by time
+        once, so each transect is a binary search of its start and end. Later transects take precedence when intervals
+        overlap.
+        :return: Transect id for each image, 'NA' for images outside of all transects
+        """
+        image_times = ImageMetadataGUI.parse_datetimes(metadata['DatetimeOriginal']).to_numpy(dtype='datetime64[ns]')
+        # Images without a time sort last and are excluded from every interval below
+        order = np.argsort(image_times, kind='stable')
+        sorted_times = image_times[order]
+        num_timed = int(np.count_nonzero(~np.isnat(sorted_times)))
+        sorted_times = sorted_times[:num_timed]
+
+        # Image paths in the transect csv may have been written on Windows
+        filepaths = metadata['Filepath'].astype(str).str.replace('\\', '/')
+        time_by_filepath = {}
+        for filepath, image_time in zip(filepaths, image_times):
+            time_by_filepath.setdefault(filepath, image_time)
+
+        def get_image_time(row, column):
+            if column not in row or pd.isna(row[column]):
+                return np.datetime64('NaT')
+            return time_by_filepath.get(str(row[column]).replace('\\', '/'), np.datetime64('NaT'))
+
+        transects = np.full(len(metadata), 'NA', dtype=object)
+        start_times = ImageMetadataGUI.parse_datetimes(transect_assignment.get('start_time'))
+        end_times = ImageMetadataGUI.parse_datetimes(transect_assignment.get('end_time'))
+        for idx, (_, row) in enumerate(transect_assignment.iterrows()):
+            start_time, end_time = get_image_time(row, 'start_img'), get_image_time(row, 'end_img')
+            if np.isnat(start_time) or np.isnat(end_time):
+                if idx >= len(start_times):
+                    continue
+                start_time, end_time = start_times.iloc[idx], end_times.iloc[idx]
+                if pd.isna(start_time) or pd.isna(end_time):
+                    continue
+                start_time, end_time = np.datetime64(start_time, 'ns'), np.datetime64(end_time, 'ns')
+
+            start = np.searchsorted(sorted_times, start_time, side='left')
+            end = np.searchsorted(sorted_times, end_time, side='right')
+            transects[order[start:end]] = row.get('transect_id', 'NA')
+        return transects
+
+    @staticmethod
+    def kml_to_csv(kml_filepath, csv_filepath):
+        # Streams the track, so memory doesn't grow with the length of the flight
+        kml_ns = '{http://www.opengis.net/kml/2.2}'
+        gx_ns = '{http://www.google.com/kml/ext/2.2}'
+        placemark_tag, when_tag, coord_tag = kml_ns + 'Placemark', kml_ns + 'when', gx_ns + 'coord'
+
+        with open(csv_filepath, 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(["Longitude", "Latitude", "Altitude", "Datetime"])
+            parents = []
+            placemark_depth = 0
+            coordinates = []
+            timestamps = []
+            for event, elem in ET.iterparse(kml_filepath, events=('start', 'end')):
+                if event == 'start':
+                    parents.append(elem)
+                    if elem.tag == placemark_tag:
+                        placemark_depth += 1
+                    continue
+                parents.pop()
+                if placemark_depth == 0:
+                    continue
+                if elem.tag == when_tag:
+                    timestamps.append(elem.text)
+                elif elem.tag == coord_tag:
+                    coordinate = elem.text.strip().split(' ')[:3]
+                    coordinates.append(coordinate + [''] * (3 - len(coordinate)))
+                elif elem.tag == placemark_tag:
+                    placemark_depth -= 1
+                    for coordinate, timestamp in zip(coordinates, timestamps):
+                        writer.writerow(coordinate + [timestamp])
+                    coordinates, timestamps = [], []
+                else:
+                    continue
+                # Parsed elements are removed from the tree to free them
+                if parents:
+                    parents[-1].remove(elem)
 
     def integrate_csv_data(self):
         csv1 = pd.read_csv(self.final_metadata_csv.get())
@@ -265,27 +268,53 @@ class ImageMetadataGUI:
             return
 
         csv2 = pd.read_csv(csv2_path)
-        csv1['Datetime'] = pd.to_datetime(csv1['DatetimeOriginal'], format='%Y:%m:%d %H:%M:%S', errors='coerce')
-        csv2['Datetime'] = pd.to_datetime(csv2['Datetime'], format='%Y-%m-%dT%H:%M:%S.%fZ', errors='coerce')
-        csv1['Timestamp'] = csv1['Datetime'].apply(lambda x: x.timestamp() if not pd.isnull(x) else np.nan)
-        csv2['Timestamp'] = csv2['Datetime'].apply(lambda x: x.timestamp() if not pd.isnull(x) else np.nan)
-
-        def find_closest(row):
-            time_diff = (csv2['Timestamp'] - row['Timestamp']).abs()
-            closest_idx = time_diff.idxmin()
-            closest_time_diff = time_diff[closest_idx]
-            if closest_time_diff <= 3:
-                return csv2.loc[closest_idx, ['Latitude', 'Longitude', 'Altitude']]
-            else:
-                return pd.Series([np.nan, np.nan, np.nan], index=['Latitude', 'Longitude', 'Altitude'])
-
-        closest_values = csv1.apply(find_closest, axis=1)
+        closest_values = self.match_gps_track(csv1, csv2, interpolate=self.interpolate_gps.get())
         csv1[['LatitudeNew', 'LongitudeNew', 'AltitudeNew']] = closest_values
         csv1.to_csv(os.path.splitext(self.final_metadata_csv.get())[0] + '_updated.csv', index=False)
 
-    def crop_images_based_on_transect(self, final_metadata_csv, input_folder, output_folder, crop_amount=125):
-        import concurrent.futures
-        import threading
+    @staticmethod
+    def match_gps_track(metadata, track, tolerance_s=GPS_MATCH_TOLERANCE_S, interpolate=False):
+        """
+        Finds the GPS track fix closest in time to each image with a sorted as-of join
+        :param metadata: Image metadata with 'DatetimeOriginal' in EXIF format
+        :param track: GPS track with 'Datetime' in KML format and 'Latitude', 'Longitude', 'Altitude'
+        :param tolerance_s: Images without a fix within this many seconds get no coordinates
+        :param interpolate: Interpolate coordinates linearly in time between the fixes before and after each image
+        :return: Latitude, Longitude and Altitude for each image, in the order and with the index of the metadata
+        """
+        columns = ['Latitude', 'Longitude', 'Altitude']
+        images = pd.DataFrame({
+            'Datetime': pd.to_datetime(metadata['DatetimeOriginal'], format=EXIF_DATETIME_FORMAT, errors='coerce'),
+        }, index=metadata.index)
+        fixes = pd.DataFrame({
+            'Datetime': pd.to_datetime(track['Datetime'], format='%Y-%m-%dT%H:%M:%S.%fZ', errors='coerce'),
+            **{column: pd.to_numeric(track[column], errors='coerce') for column in columns},
+        })
+        # Ties go to the fix listed first in the track, like a scan of the track would
+        fixes = fixes.dropna(subset=['Datetime']).sort_values('Datetime', kind='stable')
+        result = pd.DataFrame(np.nan, index=metadata.index, columns=columns)
+        images = images.dropna(subset=['Datetime']).sort_values('Datetime', kind='stable')
+        if images.empty or fixes.empty:
+            return result
+
+        matched = pd.merge_asof(images.reset_index(), fixes, on='Datetime', direction='nearest',
+                                tolerance=pd.Timedelta(seconds=tolerance_s)).set_index('index')
+        if interpolate:
+            fix_times = fixes['Datetime'].to_numpy(dtype='int64')
+            image_times = images['Datetime'].to_numpy(dtype='int64')
+            has_match = matched[columns[0]].notna().to_numpy()
+            for column in columns:
+                values = np.interp(image_times, fix_times, fixes[column].to_numpy(dtype=float))
+                matched[column] = np.where(has_match, values, np.nan)
+        result.loc[matched.index, columns] = matched[columns].to_numpy()
+        return result
+
+    def crop_images_based_on_transect(self, final_metadata_csv, input_folder, output_folder, crop_amount=125,
+                                      max_workers=None):
+        """
+        :return: Number of images cropped with each crop method
+        """
+        from concurrent.futures import ProcessPoolExecutor
 
         def decimal_to_dms(decimal):
             degrees = int(decimal)
@@ -338,58 +367,55 @@ class ImageMetadataGUI:
             new_filename = f"{prefix}_000_00_{img_count:03d}.jpg"
             valid_images.at[idx, 'NewFilename'] = new_filename
 
-        # 2) Parallelize cropping only, using the pre-assigned filenames
-        def process_single_image(idx, row):
-            if not row['NewFilename']:
-                return (idx, None)  # skipped images
-
-            image_path = row['Filepath']
-            if not os.path.exists(image_path):
-                return (idx, None)
-
-            img = Image.open(image_path)
-            width, height = img.size
-            new_dimensions = (crop_amount, crop_amount, width - crop_amount, height - crop_amount)
-            cropped_img = img.crop(new_dimensions)
-
-            try:
-                exif_data = piexif.load(img.info.get("exif", b""))
-            except:
-                exif_data = {"0th": {}, "Exif": {}, "GPS": {}, "Interop": {}, "1st": {}}
-
+        # 2) Crop in a process pool, using the pre-assigned filenames
+        def get_gps_ifd(row):
             # Embed new lat/lon/alt if columns are present
-            if 'LatitudeNew' in row and not pd.isna(row['LatitudeNew']):
-                gps_ifd = {
-                    piexif.GPSIFD.GPSLatitudeRef: 'S' if row['LatitudeNew'] < 0 else 'N',
-                    piexif.GPSIFD.GPSLatitude: decimal_to_dms(abs(row['LatitudeNew'])),
-                    piexif.GPSIFD.GPSLongitudeRef: 'W' if row['LongitudeNew'] < 0 else 'E',
-                    piexif.GPSIFD.GPSLongitude: decimal_to_dms(abs(row['LongitudeNew'])),
-                    piexif.GPSIFD.GPSAltitudeRef: 0,
-                    piexif.GPSIFD.GPSAltitude: (int(abs(row['AltitudeNew']) * 1000), 1000),
-                }
-                exif_data['GPS'] = gps_ifd
-
-            output_path = os.path.join(output_folder, row['NewFilename'])
-            cropped_img.save(output_path, quality=100, exif=piexif.dump(exif_data))
-
-            return (idx, output_path)
-
-        new_filepaths = {}
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            futures = {executor.submit(process_single_image, idx, row): idx for idx, row in valid_images.iterrows()}
-            for fut in concurrent.futures.as_completed(futures):
-                i, out_path = fut.result()
-                if out_path:
-                    new_filepaths[i] = out_path
-                    print(f"Cropped: {out_path}, Transect: {valid_images.loc[i, 'Transect']}")
-
-        # 3) Update main metadata with new filepaths
-        for i, path_ in new_filepaths.items():
-            metadata.loc[i, 'NewFilepath'] = path_
-
-        metadata.to_csv(final_metadata_csv, index=False)
-        metadata.to_csv(os.path.splitext(final_metadata_csv)[0] + '_updated_filepath.csv', index=False)
+            if 'LatitudeNew' not in row or pd.isna(row['LatitudeNew']):
+                return None
+            return {
+                piexif.GPSIFD.GPSLatitudeRef: 'S' if row['LatitudeNew'] < 0 else 'N',
+                piexif.GPSIFD.GPSLatitude: decimal_to_dms(abs(row['LatitudeNew'])),
+                piexif.GPSIFD.GPSLongitudeRef: 'W' if row['LongitudeNew'] < 0 else 'E',
+                piexif.GPSIFD.GPSLongitude: decimal_to_dms(abs(row['LongitudeNew'])),
+                piexif.GPSIFD.GPSAltitudeRef: 0,
+                piexif.GPSIFD.GPSAltitude: (int(abs(row['AltitudeNew']) * 1000), 1000),
+            }
+
+        if 'NewFilepath' not in metadata.columns:
+            metadata['NewFilepath'] = np.nan
+        metadata['NewFilepath'] = metadata['NewFilepath'].astype(object)
+        updated_filepath_csv = os.path.splitext(final_metadata_csv)[0] + '_updated_filepath.csv'
+        crop_methods = {}
+        with ProcessPoolExecutor(max_workers=max_workers) as executor, \
+                open(updated_filepath_csv, 'w', newline='') as csv_file:
+            futures = {}
+            for idx, row in valid_images.iterrows():
+                if not row['NewFilename'] or not os.path.exists(row['Filepath']):
+                    continue  # skipped images
+                output_path = os.path.join(output_folder, row['NewFilename'])
+                futures[idx] = (output_path, executor.submit(crop_image_border, row['Filepath'], output_path,
+                                                             crop_amount, get_gps_ifd(row)))
+
+            # 3) Stream the metadata with the new filepaths, in order, as the crops finish
+            metadata.iloc[:0].to_csv(csv_file, index=False)
+            num_written = 0
+            for position, i in enumerate(metadata.index):
+                if i not in futures:
+                    continue
+                out_path, future = futures[i]
+                crop_method = future.result()
+                crop_methods[crop_method] = crop_methods.get(crop_method, 0) + 1
+                metadata.loc[i, 'NewFilepath'] = out_path
+                print(f"Cropped: {out_path}, Transect: {valid_images.loc[i, 'Transect']}")
+                metadata.iloc[num_written:position + 1].to_csv(csv_file, header=False, index=False)
+                csv_file.flush()
+                num_written = position + 1
+            metadata.iloc[num_written:].to_csv(csv_file, header=False, index=False)
+
+        shutil.copyfile(updated_filepath_csv, final_metadata_csv)
+        print(f"Crop methods: {crop_methods}")
         print(f"Cropping completed. Cropped images are saved in '{output_folder}'.")
+        return crop_methods
 
 
 if __name__ == "__main__":